@@ -1,3 +1,6 @@
 from .main_router import mainRouter
+from .admin_router import adminRouter
+from .subscription_router import subscriptionRouter
+from .ingest_router import ingestRouter
 
-list_of_routes = [mainRouter]
+list_of_routes = [mainRouter, adminRouter, subscriptionRouter, ingestRouter]
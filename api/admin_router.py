@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from utils import reload_settings
+from .dependencies import require_admin
+
+adminRouter = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+    responses={404: {"detail": "Url not found"}},
+)
+
+
+@adminRouter.post("/settings/reload")
+async def reload_application_settings(request: Request) -> dict:
+    settings = reload_settings()
+    request.app.state.settings = settings
+    request.app.state.storage.settings = settings
+    return {"reloaded": True, "env": settings.ENV}
+
+
+@adminRouter.get("/loop")
+async def loop_lag(request: Request) -> dict:
+    monitor = request.app.state.loop_monitor
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="Loop monitor is disabled")
+    return monitor.report()
+
+
+@adminRouter.get("/memory")
+async def memory_footprint(
+    request: Request,
+    top: int = Query(0, ge=0, le=50, description="Top allocation sites to list"),
+) -> dict:
+    return await request.app.state.memory.collect(top)
@@ -0,0 +1,105 @@
+from datetime import date
+from secrets import compare_digest
+from typing import Annotated, AsyncIterator
+
+from fastapi import Depends, Header, HTTPException, Request
+
+from utils import Settings, get_settings
+from utils.admission import Overloaded
+from utils.compression import negotiate_encoding
+from utils.compute import ComputeExecutor
+from utils.storage import ScheduleStorage
+from utils.subscriptions import SubscriptionHub
+from utils.wire import negotiate
+
+# Tests and embedding applications replace the settings through
+# `app.dependency_overrides[get_settings]`.
+SettingsDep = Annotated[Settings, Depends(get_settings)]
+
+
+def require_admin(
+    settings: SettingsDep, x_admin_token: Annotated[str, Header()] = ""
+) -> None:
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin API is disabled")
+    if not compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def require_ingest(
+    settings: SettingsDep, x_ingest_token: Annotated[str, Header()] = ""
+) -> None:
+    if not settings.INGEST_TOKEN:
+        raise HTTPException(status_code=404, detail="Ingest API is disabled")
+    if not compare_digest(x_ingest_token, settings.INGEST_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid ingest token")
+
+
+async def admit(request: Request) -> AsyncIterator[None]:
+    """
+    Holds an admission slot of the route while the request is handled.
+    """
+    try:
+        async with request.app.state.admission.admit(request.scope["route"].path):
+            yield
+    except Overloaded as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Service is overloaded",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+
+def track_date(request: Request) -> None:
+    """
+    Counts requests per date for the cache warmer.
+    """
+    warmer = request.app.state.warmer
+    value = request.path_params.get("date_format")
+    if warmer is None or value is None:
+        return
+    try:
+        warmer.record(date.fromisoformat(value))
+    except ValueError:
+        pass  # rejected by the endpoint's own validation
+
+
+def get_storage(request: Request, settings: SettingsDep) -> ScheduleStorage:
+    storage = request.app.state.storage
+    storage.settings = settings
+    return storage
+
+
+StorageDep = Annotated[ScheduleStorage, Depends(get_storage)]
+
+
+def get_compute(request: Request) -> ComputeExecutor:
+    return request.app.state.compute
+
+
+ComputeDep = Annotated[ComputeExecutor, Depends(get_compute)]
+
+
+def get_subscriptions(request: Request) -> SubscriptionHub:
+    return request.app.state.subscriptions
+
+
+SubscriptionsDep = Annotated[SubscriptionHub, Depends(get_subscriptions)]
+
+
+def get_wire_format(accept: Annotated[str | None, Header()] = None) -> str:
+    return negotiate(accept)
+
+
+WireFormatDep = Annotated[str, Depends(get_wire_format)]
+
+
+def get_content_encoding(
+    settings: SettingsDep, accept_encoding: Annotated[str | None, Header()] = None
+) -> str | None:
+    if not settings.COMPRESSION_ENABLED:
+        return None
+    return negotiate_encoding(accept_encoding)
+
+
+EncodingDep = Annotated[str | None, Depends(get_content_encoding)]
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from schemas import IngestResultSchema
+from utils.ingest import IngestBusy, IngestError, IngestStream
+from .dependencies import SettingsDep, StorageDep, require_ingest
+
+ingestRouter = APIRouter(
+    prefix="/ingest",
+    tags=["ingest"],
+    dependencies=[Depends(require_ingest)],
+    responses={404: {"detail": "Url not found"}},
+)
+
+NDJSON_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/x-ndjson": {
+                "schema": {"type": "string"},
+                "example": '{"type": "day", "id": 1, "date": "2024-01-15", '
+                '"start": "09:00", "end": "18:00"}\n'
+                '{"type": "timeslot", "id": 1, "day_id": 1, '
+                '"start": "10:00", "end": "11:00"}\n',
+            }
+        },
+    }
+}
+
+
+async def ingest(request: Request, settings, storage, full: bool) -> IngestResultSchema:
+    if not storage.supports_ingest:
+        raise HTTPException(
+            status_code=409,
+            detail="Schedule ingestion needs API_STORAGE_BACKEND=sqlite",
+        )
+    stream = IngestStream(
+        request.stream(),
+        full,
+        max_line=settings.INGEST_MAX_LINE,
+        max_bytes=settings.INGEST_MAX_BYTES,
+    )
+    try:
+        version = await storage.ingest(stream, settings.INGEST_BATCH)
+    except IngestError as exc:
+        raise HTTPException(
+            status_code=422, detail={"line": exc.line, "error": exc.message}
+        ) from exc
+    except IngestBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    counts = stream.counts
+    return IngestResultSchema(
+        version=version,
+        days=counts["day"],
+        timeslots=counts["timeslot"],
+        recurrences=counts["recurrence"],
+        deleted=counts["delete"],
+    )
+
+
+@ingestRouter.put("/schedule", openapi_extra=NDJSON_BODY)
+async def push_schedule(
+    request: Request, settings: SettingsDep, storage: StorageDep
+) -> IngestResultSchema:
+    """
+    Replaces the whole schedule with the pushed NDJSON records.
+    """
+    return await ingest(request, settings, storage, full=True)
+
+
+@ingestRouter.patch("/schedule", openapi_extra=NDJSON_BODY)
+async def patch_schedule(
+    request: Request, settings: SettingsDep, storage: StorageDep
+) -> IngestResultSchema:
+    """
+    Replaces the listed days with their timeslots and removes deleted dates.
+    """
+    return await ingest(request, settings, storage, full=False)
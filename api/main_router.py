@@ -1,84 +1,376 @@
 from datetime import date, time, timedelta
-import aiohttp
-from fastapi import APIRouter, HTTPException, Query
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import ValidationError
 
 from schemas import (
+    BookingSchema,
     ScheduleSchema,
+    ScheduleVersionSchema,
     IntervalSchema,
     TimeSlotSchema,
     IsFreeIntervalSchema,
     FreeIntervalInScheduleSchema,
+    NearestIntervalsSchema,
+    SuggestedIntervalSchema,
+    UtilizationSchema,
+    validate_overnight,
+)
+from utils import DayView, ScheduleSnapshot, interval_has_intersections
+from utils.aggregates import Period
+from utils.booking import BookingConflict, bookings
+from utils.compression import cached_body
+from utils.imports import lazy_import
+from utils.minutes import MINUTES_PER_DAY, localize, to_time
+from utils.storage import ScheduleStorage
+from utils.profiling import stage
+from utils.projection import (
+    decode_cursor,
+    encode_cursor,
+    parse_fields,
+    schedule_page,
+)
+from utils.wire import COLUMNAR, JSON, MSGPACK, encode
+from utils.settings import Settings
+from utils.time_manager import localize_interval
+from .dependencies import (
+    admit,
+    ComputeDep,
+    EncodingDep,
+    SettingsDep,
+    StorageDep,
+    track_date,
+    WireFormatDep,
 )
-from utils import get_schedule, find_free_intervals, interval_has_intersections
+
+aiohttp = lazy_import("aiohttp")
 
 mainRouter = APIRouter(
-    prefix="", tags=["main"], responses={404: {"detail": "Url not found"}}
+    prefix="",
+    tags=["main"],
+    dependencies=[Depends(admit), Depends(track_date)],
+    responses={404: {"detail": "Url not found"}},
 )
 
 
-@mainRouter.get("/")
-async def get_simple_schedule() -> ScheduleSchema:
+async def get_day_view(
+    storage: ScheduleStorage,
+    date_format: date,
+    refresh: bool = True,
+    as_of: int | None = None,
+) -> DayView:
+    if as_of is None:
+        view = await storage.day(date_format, refresh=refresh)
+    else:
+        days = storage.as_of(as_of)
+        if days is None:
+            raise HTTPException(
+                status_code=404, detail=f"Schedule version {as_of} is not kept"
+            )
+        if not days.keeps(date_format):
+            # Versions read date by date only know the dates read meanwhile
+            raise HTTPException(
+                status_code=404,
+                detail=f"Day {date_format} of version {as_of} is not kept",
+            )
+        view = days.day(date_format)
+    if view is None:
+        raise HTTPException(status_code=404, detail="Day not found in schedule")
+    return view
+
+
+# Read endpoints also answer in binary formats chosen by the Accept header
+BINARY_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {"content": {COLUMNAR: {}, MSGPACK: {}}}
+}
+
+
+def render(payload: Any, wire_format: str, item_type: type | None = None) -> Any:
+    if wire_format == JSON:
+        return payload
+    return Response(
+        encode(payload, wire_format, item_type),
+        media_type=wire_format,
+        headers={"Vary": "Accept"},
+    )
+
+
+def render_cached(
+    cache: dict,
+    key: str,
+    payload: Any,
+    wire_format: str,
+    encoding: str | None,
+    settings: Settings,
+    item_type: type | None = None,
+) -> Response:
+    """
+    Serves a response that only depends on the schedule version.
+
+    ``cache`` lives on the snapshot or day view, so the body is encoded and
+    compressed at most once per version, format and content coding.
+    """
+    cached = cached_body(cache, key, payload, wire_format, item_type)
+    body, headers = cached.body, {"Vary": "Accept, Accept-Encoding"}
+    if encoding is not None and len(body) >= settings.COMPRESSION_MIN_SIZE:
+        with stage("compress"):
+            body = cached.compressed(encoding, settings.COMPRESSION_LEVEL)
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=cached.media_type, headers=headers)
+
+
+def render_schedule_page(
+    snapshot: ScheduleSnapshot,
+    wire_format: str,
+    date_from: date | None,
+    date_to: date | None,
+    fields: str | None,
+    cursor: str | None,
+    limit: int | None,
+) -> Response:
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=422, detail="date_from is after date_to")
+    try:
+        include = parse_fields(fields) if fields else None
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    with stage("filter"):
+        page, next_key = schedule_page(snapshot, date_from, date_to, after, limit)
+    with stage("serialize"):
+        body = encode(page, wire_format, include=include)
+    headers = {"Vary": "Accept"}
+    if next_key is not None:
+        headers["X-Next-Cursor"] = encode_cursor(next_key)
+    return Response(body, media_type=wire_format, headers=headers)
+
+
+def _gap_start(view: DayView, duration: int) -> int | None:
+    for start, end in view.free_spans:
+        if end - start >= duration:
+            return start
+    return None
+
+
+def _bitmap_gap_start(view: DayView, duration: int) -> int | None:
+    return view.bitmap.find_gap(duration, *view.bounds)
+
+
+def _first_gap(
+    snapshot: ScheduleSnapshot, duration: int, settings: Settings
+) -> tuple[date, int] | None:
+    gap_start = (
+        _bitmap_gap_start if settings.AVAILABILITY_ENGINE == "bitmap" else _gap_start
+    )
+    for view in snapshot.days():
+        start = gap_start(view, duration)
+        if start is not None:
+            return view.day.date, start
+    return None
+
+
+@mainRouter.get("/", responses=BINARY_RESPONSES)
+async def get_simple_schedule(
+    storage: StorageDep,
+    settings: SettingsDep,
+    wire_format: WireFormatDep,
+    encoding: EncodingDep,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    fields: str | None = Query(
+        None, description="Comma separated sections or fields: days,timeslots.start"
+    ),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the last page"),
+    limit: int | None = Query(None, ge=1, le=10_000, description="Timeslots per page"),
+) -> ScheduleSchema:
     try:
-        return await get_schedule()
+        snapshot = await storage.snapshot()
+        if any(
+            param is not None for param in (date_from, date_to, fields, cursor, limit)
+        ):
+            return render_schedule_page(
+                snapshot, wire_format, date_from, date_to, fields, cursor, limit
+            )
+        return render_cached(
+            snapshot.responses,
+            "schedule",
+            snapshot.schedule,
+            wire_format,
+            encoding,
+            settings,
+        )
     except (aiohttp.ClientError, ValidationError) as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@mainRouter.get("/{date_format}/taken_slots")
-async def get_taken_slots_on_date(date_format: date) -> list[TimeSlotSchema]:
+@mainRouter.get("/{date_format}/taken_slots", responses=BINARY_RESPONSES)
+async def get_taken_slots_on_date(
+    date_format: date,
+    storage: StorageDep,
+    settings: SettingsDep,
+    wire_format: WireFormatDep,
+    encoding: EncodingDep,
+    as_of: int | None = Query(None, ge=0, description="Kept version to read"),
+) -> list[TimeSlotSchema]:
     try:
-        schedule = await get_schedule()
-        # Filter the schedule for the specific date
-        day = schedule.days.get(date_format)
-        if not day:
-            raise HTTPException(status_code=404, detail="Day not found in schedule")
-        day_slots = (
-            [slot for slot in schedule.timeslots if slot.day_id == day.id]
-            if day
-            else []
+        view = await get_day_view(storage, date_format, as_of=as_of)
+        return render_cached(
+            view.responses,
+            "taken_slots",
+            view.slots,
+            wire_format,
+            encoding,
+            settings,
+            TimeSlotSchema,
         )
-        return day_slots
     except (aiohttp.ClientError, ValidationError) as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@mainRouter.get("/{date_format}/free_intervals")
-async def get_free_interval_on_date(date_format: date) -> list[IntervalSchema]:
+@mainRouter.get("/{date_format}/free_intervals", responses=BINARY_RESPONSES)
+async def get_free_interval_on_date(
+    date_format: date,
+    storage: StorageDep,
+    settings: SettingsDep,
+    wire_format: WireFormatDep,
+    encoding: EncodingDep,
+    as_of: int | None = Query(None, ge=0, description="Kept version to read"),
+) -> list[IntervalSchema]:
     try:
-        schedule = await get_schedule()
-        day = schedule.days.get(date_format)
-        if not day:
-            raise HTTPException(status_code=404, detail="Day not found in schedule")
-        day_slots = (
-            [slot for slot in schedule.timeslots if slot.day_id == day.id]
-            if day
-            else []
+        view = await get_day_view(storage, date_format, as_of=as_of)
+        if as_of is None:
+            # Pending bookings make a throwaway view with its own response cache
+            view = bookings.overlay(view)
+        with stage("compute"):
+            free = view.free
+        return render_cached(
+            view.responses,
+            "free_intervals",
+            free,
+            wire_format,
+            encoding,
+            settings,
+            IntervalSchema,
         )
 
-        free_intervals = find_free_intervals(day, day_slots)
-        return free_intervals
-
     except (aiohttp.ClientError, ValidationError) as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@mainRouter.post("/{date_format}/is_free")
+@mainRouter.post("/{date_format}/is_free", responses=BINARY_RESPONSES)
 async def is_this_interval_free_on_date(
-    date_format: date, interval: IntervalSchema
+    date_format: date,
+    interval: IntervalSchema,
+    settings: SettingsDep,
+    storage: StorageDep,
+    wire_format: WireFormatDep,
+    as_of: int | None = Query(None, ge=0, description="Kept version to read"),
 ) -> IsFreeIntervalSchema:
     try:
-        schedule = await get_schedule()
-        day = schedule.days.get(date_format)
-        if not day:
-            raise HTTPException(status_code=404, detail="Day not found in schedule")
-        day_slots = (
-            [slot for slot in schedule.timeslots if slot.day_id == day.id]
-            if day
-            else []
+        view = await get_day_view(storage, date_format, as_of=as_of)
+        if as_of is None:
+            view = bookings.overlay(view)
+        interval = localize_interval(interval, view.day.date, settings.zone)
+        with stage("compute"):
+            # Overlapping slots are only listed when the interval is taken
+            if settings.AVAILABILITY_ENGINE == "bitmap" and view.bitmap.is_free(
+                *view.span(interval.start, interval.end)
+            ):
+                result = IsFreeIntervalSchema(is_free=True, overlaps=[])
+            else:
+                result = interval_has_intersections(interval, view.slots, view.day)
+        return render(result, wire_format)
+
+    except (aiohttp.ClientError, ValidationError) as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@mainRouter.post("/{date_format}/book", status_code=201)
+async def book_interval_on_date(
+    date_format: date,
+    interval: IntervalSchema,
+    settings: SettingsDep,
+    storage: StorageDep,
+) -> BookingSchema:
+    try:
+        async with bookings.lock(date_format):
+            # The latest snapshot is enough, conflicts are caught by the overlay
+            view = await get_day_view(storage, date_format, refresh=False)
+            interval = localize_interval(interval, view.day.date, settings.zone)
+            start, end = view.span(interval.start, interval.end)
+            if start < view.bounds[0] or end > view.bounds[1]:
+                raise HTTPException(
+                    status_code=422, detail="Interval is outside of the day bounds"
+                )
+            with stage("compute"):
+                return bookings.reserve(view, interval)
+
+    except BookingConflict as e:
+        raise HTTPException(
+            status_code=409, detail=e.result.model_dump(mode="json")
+        ) from e
+    except (aiohttp.ClientError, ValidationError) as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+def _suggest(
+    view: DayView, start: int, duration: int, origin: int
+) -> SuggestedIntervalSchema:
+    moment = view.day.date.toordinal() * MINUTES_PER_DAY + start
+    return validate_overnight(
+        SuggestedIntervalSchema,
+        date=view.day.date,
+        start=to_time(start),
+        end=to_time(start + duration),
+        distance=abs(moment - origin),
+    )
+
+
+@mainRouter.get("/{date_format}/nearest")
+async def find_nearest_intervals(
+    date_format: date,
+    settings: SettingsDep,
+    storage: StorageDep,
+    start: time = Query(description="Preferred start, HH:MM or with an offset"),
+    duration: int = Query(60, ge=1),
+    days: int = Query(0, ge=0, le=31, description="Neighbouring days to look at"),
+    as_of: int | None = Query(None, ge=0, description="Kept version to read"),
+) -> NearestIntervalsSchema:
+    try:
+        view = await get_day_view(storage, date_format, as_of=as_of)
+        preferred = view.minute(localize(start, date_format, settings.zone))
+        origin = date_format.toordinal() * MINUTES_PER_DAY + preferred
+        with stage("compute"):
+            before = view.gap_index.before(preferred, duration)
+            after = view.gap_index.after(preferred, duration)
+        result = NearestIntervalsSchema(
+            before=None if before is None else _suggest(view, before, duration, origin),
+            after=None if after is None else _suggest(view, after, duration, origin),
         )
+        # Neighbouring days are read from the snapshot just refreshed above,
+        # or from the same kept version
+        kept = None if as_of is None else storage.as_of(as_of)
 
-        return interval_has_intersections(interval, day_slots)
+        async def neighbour(offset: int) -> DayView | None:
+            other_date = date_format + timedelta(days=offset)
+            if kept is not None:
+                return kept.day(other_date) if kept.keeps(other_date) else None
+            return await storage.day(other_date, refresh=False)
+
+        for offset in range(1, days + 1):
+            if result.before is None:
+                other = await neighbour(-offset)
+                if other is not None:
+                    found = other.gap_index.before(other.bounds[1], duration)
+                    if found is not None:
+                        result.before = _suggest(other, found, duration, origin)
+            if result.after is None:
+                other = await neighbour(offset)
+                if other is not None:
+                    found = other.gap_index.after(other.bounds[0], duration)
+                    if found is not None:
+                        result.after = _suggest(other, found, duration, origin)
+        return result
 
     except (aiohttp.ClientError, ValidationError) as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
@@ -86,33 +378,29 @@ async def is_this_interval_free_on_date(
 
 @mainRouter.post("/find_free_interval")
 async def find_free_interval(
-    interval_duration: int = Query(60, ge=0),
+    settings: SettingsDep,
+    storage: StorageDep,
+    compute: ComputeDep,
+    interval_duration: int = Query(60, ge=1),
 ) -> FreeIntervalInScheduleSchema:
     try:
-        schedule = await get_schedule()
-        for day in schedule.days.values():
-            day_slots = (
-                [slot for slot in schedule.timeslots if slot.day_id == day.id]
-                if day
-                else []
+        snapshot = await storage.snapshot()
+        with stage("compute"):
+            if compute.offloads(snapshot):
+                found = await compute.first_gap(snapshot, interval_duration)
+            else:
+                found = _first_gap(snapshot, interval_duration, settings)
+        if found is not None:
+            found_date, start = found
+            # Minute offsets become wall clock times only here, an end
+            # past midnight wraps and stays after the start in the day
+            return validate_overnight(
+                FreeIntervalInScheduleSchema,
+                founded=True,
+                date=found_date,
+                start=to_time(start),
+                end=to_time(start + interval_duration),
             )
-            free_intervals = find_free_intervals(day, day_slots)
-            for free_interval in free_intervals:
-                if free_interval.duration() >= interval_duration:
-                    end_time = timedelta(
-                        hours=free_interval.start.hour,
-                        minutes=free_interval.start.minute,
-                    ) + timedelta(minutes=interval_duration)
-                    end_time_obj = time(
-                        hour=(end_time.seconds // 3600) % 24,
-                        minute=(end_time.seconds % 3600) // 60,
-                    )
-                    return FreeIntervalInScheduleSchema(
-                        founded=True,
-                        date=day.date,
-                        start=free_interval.start,
-                        end=end_time_obj,
-                    )
 
         return FreeIntervalInScheduleSchema(
             founded=False, date=date(1900, 1, 1), start=time(0, 0), end=time(23, 59)
@@ -120,3 +408,33 @@ async def find_free_interval(
 
     except (aiohttp.ClientError, ValidationError) as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@mainRouter.get("/utilization")
+async def get_utilization(
+    storage: StorageDep,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    period: Period = "day",
+) -> list[UtilizationSchema]:
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=422, detail="date_from is after date_to")
+    try:
+        snapshot = await storage.snapshot()
+        with stage("compute"):
+            return snapshot.utilization.report(date_from, date_to, period)
+    except (aiohttp.ClientError, ValidationError) as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@mainRouter.get("/versions")
+async def get_schedule_versions(storage: StorageDep) -> list[ScheduleVersionSchema]:
+    kept = storage.history.maps() if storage.history is not None else []
+    return [
+        ScheduleVersionSchema(
+            version=days.version,
+            created_at=days.created_at,
+            changed_days=days.changed,
+        )
+        for days in kept
+    ]
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import date
+from typing import Annotated
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from utils.imports import lazy_import
+from utils.subscriptions import Subscriber, SubscriptionHub
+from .dependencies import SettingsDep, StorageDep, SubscriptionsDep
+
+aiohttp = lazy_import("aiohttp")
+
+subscriptionRouter = APIRouter(
+    prefix="", tags=["subscriptions"], responses={404: {"detail": "Url not found"}}
+)
+
+
+async def stream_events(
+    hub: SubscriptionHub,
+    subscriber: Subscriber,
+    states: list[bytes],
+    keepalive: float,
+):
+    try:
+        for state in states:
+            yield state
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+            except TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+@subscriptionRouter.get(
+    "/subscribe",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def subscribe_to_free_intervals(
+    dates: Annotated[list[date], Query()],
+    settings: SettingsDep,
+    storage: StorageDep,
+    hub: SubscriptionsDep,
+) -> StreamingResponse:
+    """
+    Server-Sent Events with free intervals of the given dates: a ``state``
+    event per date, then ``delta`` events with added and removed intervals
+    whenever a schedule update changes them.
+    """
+    if len(set(dates)) > settings.SUBSCRIPTION_MAX_DATES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.SUBSCRIPTION_MAX_DATES} dates per subscription",
+        )
+    try:
+        subscriber, states = await hub.subscribe(storage, set(dates))
+    except (aiohttp.ClientError, ValidationError) as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    return StreamingResponse(
+        stream_events(hub, subscriber, states, settings.SUBSCRIPTION_KEEPALIVE),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,68 @@
+import random
+from datetime import date, timedelta
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def generate_schedule(
+    days: int = 30,
+    slots_per_day: int = 8,
+    density: float = 0.5,
+    overlap: float = 0.0,
+    seed: int = 0,
+    first_date: date = date(2024, 1, 1),
+    day_start: int = 9 * 60,
+    day_end: int = 18 * 60,
+) -> dict:
+    """
+    Generates an upstream-shaped schedule payload.
+
+    ``density`` is the share of the working day covered by slots and ``overlap``
+    is the probability that a slot starts inside the previous one. The same
+    arguments always produce the same payload.
+    """
+    if not 1 <= days <= 10_000:
+        raise ValueError("days must be in [1, 10000]")
+    if days * slots_per_day > 1_000_000:
+        raise ValueError("at most 1000000 slots can be generated")
+    if not 0 <= density <= 1 or not 0 <= overlap <= 1:
+        raise ValueError("density and overlap must be in [0, 1]")
+
+    rng = random.Random(seed)
+    working = day_end - day_start
+    slots_per_day = min(slots_per_day, working)
+    payload: dict[str, list] = {"days": [], "timeslots": []}
+    slot_id = 1
+    for day_id in range(1, days + 1):
+        payload["days"].append(
+            {
+                "id": day_id,
+                "date": (first_date + timedelta(days=day_id - 1)).isoformat(),
+                "start": _hhmm(day_start),
+                "end": _hhmm(day_end),
+            }
+        )
+        if not slots_per_day:
+            continue
+        segment = working // slots_per_day
+        length = max(1, int(segment * density))
+        prev_start, prev_end = None, None
+        for i in range(slots_per_day):
+            if prev_start is not None and rng.random() < overlap:
+                start = rng.randrange(prev_start, prev_end)
+            else:
+                start = day_start + i * segment + rng.randint(0, segment - length)
+            end = min(start + length, day_end)
+            payload["timeslots"].append(
+                {
+                    "id": slot_id,
+                    "day_id": day_id,
+                    "start": _hhmm(start),
+                    "end": _hhmm(end),
+                }
+            )
+            slot_id += 1
+            prev_start, prev_end = start, end
+    return payload
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+from datetime import datetime
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# pylint: disable=wrong-import-position
+from benchmarks.suite import _git_revision, compare
+from benchmarks.upstream import FakeUpstream
+from utils import get_settings
+from utils.booking import bookings
+from utils.capture import read_capture
+
+
+def _route_summary(route: str, samples: list[float], recorded: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "name": route,
+        "count": len(samples),
+        "median_ms": statistics.median(ordered) * 1000,
+        "p90_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))] * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "recorded_median_ms": statistics.median(recorded),
+    }
+
+
+async def replay(path: str, repeat: int, warmup: int) -> list[dict]:
+    """
+    Sends the captured requests in order to the app in process, with a local
+    upstream serving the schedule each request was recorded against.
+    """
+    # pylint: disable=import-outside-toplevel
+    import httpx
+    from main import get_app
+
+    snapshots, requests = read_capture(path)
+    bodies = {key: json.dumps(schedule).encode() for key, schedule in snapshots.items()}
+    samples: dict[str, list[float]] = {}
+    mismatches: dict[str, int] = {}
+    env = {"API_STORAGE_BACKEND": "http", "API_CAPTURE_ENABLED": "false"}
+    previous = {name: os.environ.get(name) for name in [*env, "API_URL"]}
+    async with FakeUpstream({}) as upstream:
+        os.environ.update(env, API_URL=upstream.url)
+        get_settings.cache_clear()
+        try:
+            transport = httpx.ASGITransport(app=get_app())
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://replay"
+            ) as client:
+                for run in range(warmup + repeat):
+                    # Every pass books the captured intervals again
+                    bookings.clear()
+                    for request in requests:
+                        upstream.body = bodies[request["snapshot"]]
+                        query = request["query"]
+                        started = perf_counter()
+                        response = await client.request(
+                            request["method"],
+                            request["path"] + (f"?{query}" if query else ""),
+                            content=request["body"].encode(),
+                            headers=request["headers"],
+                        )
+                        elapsed = perf_counter() - started
+                        if run < warmup:
+                            continue
+                        route = request["route"]
+                        samples.setdefault(route, []).append(elapsed)
+                        if response.status_code != request["status"]:
+                            mismatches[route] = mismatches.get(route, 0) + 1
+        finally:
+            bookings.clear()
+            for name, value in previous.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            get_settings.cache_clear()
+
+    recorded: dict[str, list[float]] = {}
+    for request in requests:
+        recorded.setdefault(request["route"], []).append(request["duration_ms"])
+    results = []
+    for route, route_samples in sorted(samples.items()):
+        result = _route_summary(route, route_samples, recorded[route])
+        result["status_mismatches"] = mismatches.get(route, 0)
+        results.append(result)
+    return results
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay of captured requests")
+    parser.add_argument("capture", help="capture log written with API_CAPTURE_PATH")
+    parser.add_argument("--repeat", type=int, default=3, help="measured passes")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured passes")
+    parser.add_argument("--output", default="replay_results.json")
+    parser.add_argument("--compare", help="previous results file to compare with")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
+    results = asyncio.run(replay(args.capture, args.repeat, args.warmup))
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "capture": args.capture,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    for result in results:
+        mismatches = result["status_mismatches"]
+        note = f"  {mismatches} status mismatches" if mismatches else ""
+        print(
+            f"{result['name']:<40}{result['count']:>8}"
+            f"{result['median_ms']:>12.3f} ms{result['p90_ms']:>12.3f} ms{note}"
+        )
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            compare(json.load(file), report)
+    return report
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
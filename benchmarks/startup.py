@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+import aiohttp
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from benchmarks.generator import generate_schedule
+from benchmarks.upstream import FakeUpstream
+
+# Importing main also builds the module-level app
+IMPORT_SNIPPET = """
+from time import perf_counter
+start = perf_counter()
+import main
+print(perf_counter() - start)
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output) * 1000
+
+
+async def measure_first_response(env: dict, path: str, timeout: float) -> float:
+    port = _free_port()
+    started = perf_counter()
+    server = subprocess.Popen(  # pylint: disable=consider-using-with
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        async with aiohttp.ClientSession() as session:
+            while perf_counter() - started < timeout:
+                try:
+                    async with session.get(f"http://127.0.0.1:{port}{path}") as resp:
+                        if resp.status == 200:
+                            return (perf_counter() - started) * 1000
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.01)
+        raise TimeoutError("Application did not respond in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    payload = generate_schedule(days=args.days)
+    path = args.path or f"/{payload['days'][0]['date']}/free_intervals"
+    imports, first_responses = [], []
+    async with FakeUpstream(payload) as upstream:
+        env = {**os.environ, "API_URL": upstream.url}
+        for _ in range(args.repeat):
+            imports.append(measure_import(env))
+            first_responses.append(await measure_first_response(env, path, 60))
+
+    def summary(name: str, samples: list[float]) -> dict:
+        return {
+            "name": name,
+            "repeat": len(samples),
+            "min_ms": min(samples),
+            "median_ms": statistics.median(samples),
+            "mean_ms": statistics.fmean(samples),
+        }
+
+    return {
+        "meta": {"path": path, "days": args.days},
+        "results": [
+            summary("import main and build app", imports),
+            summary("time to first response", first_responses),
+        ],
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--path", help="endpoint for the first request")
+    parser.add_argument("--output", default="bench_startup.json")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    for result in report["results"]:
+        print(f"{result['name']:<32}{result['median_ms']:>12.3f} ms")
+    return report
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
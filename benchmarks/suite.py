@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+from datetime import date, datetime, time
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# pylint: disable=wrong-import-position
+from benchmarks.generator import generate_schedule
+from benchmarks.upstream import FakeUpstream
+from schemas import IntervalSchema
+from utils import (
+    find_free_intervals,
+    get_settings,
+    interval_has_intersections,
+    parse_schedule,
+)
+from utils.bitmap import DayBitmap
+from utils.minutes import day_span, to_minutes
+from utils import ScheduleSnapshot, wire
+from utils.storage import ScheduleStorage
+from utils.subscriptions import SubscriptionHub
+
+
+def _summary(name: str, samples: list[float], number: int) -> dict:
+    per_call = [sample / number * 1000 for sample in samples]
+    return {
+        "name": name,
+        "repeat": len(samples),
+        "number": number,
+        "min_ms": min(per_call),
+        "median_ms": statistics.median(per_call),
+        "mean_ms": statistics.fmean(per_call),
+    }
+
+
+def measure(name: str, func, repeat: int, number: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(number):
+            func()
+        samples.append(perf_counter() - start)
+    return _summary(name, samples, number)
+
+
+async def measure_async(name: str, func, repeat: int, number: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(number):
+            await func()
+        samples.append(perf_counter() - start)
+    return _summary(name, samples, number)
+
+
+def bench_functions(payload: dict, args: argparse.Namespace) -> list[dict]:
+    schedule = parse_schedule(payload)
+    slots_by_day: dict[int, list] = {}
+    for slot in schedule.timeslots:
+        slots_by_day.setdefault(slot.day_id, []).append(slot)
+    days = list(schedule.days.values())
+    rng = random.Random(args.seed)
+    targets = [
+        IntervalSchema(start=time(h, 0), end=time(h, 30))
+        for h in (rng.randrange(9, 18) for _ in range(len(days)))
+    ]
+
+    def all_free_intervals():
+        for day in days:
+            find_free_intervals(day, list(slots_by_day.get(day.id, [])))
+
+    def all_intersections():
+        for day, target in zip(days, targets):
+            interval_has_intersections(target, slots_by_day.get(day.id, []))
+
+    bitmaps = [DayBitmap.from_slots(slots_by_day.get(day.id, [])) for day in days]
+
+    target_spans = [(to_minutes(t.start), to_minutes(t.end)) for t in targets]
+    day_spans = [day_span(day) for day in days]
+
+    def all_bitmap_checks():
+        for bitmap, (start, end) in zip(bitmaps, target_spans):
+            bitmap.is_free(start, end)
+
+    def all_bitmap_gaps():
+        for bitmap, bounds in zip(bitmaps, day_spans):
+            bitmap.find_gap(args.duration, *bounds)
+
+    return [
+        measure("parse_schedule", lambda: parse_schedule(payload), args.repeat, 1),
+        measure("find_free_intervals", all_free_intervals, args.repeat, 1),
+        measure("interval_has_intersections", all_intersections, args.repeat, 1),
+        measure("bitmap_is_free", all_bitmap_checks, args.repeat, 1),
+        measure("bitmap_find_gap", all_bitmap_gaps, args.repeat, 1),
+    ]
+
+
+def bench_wire(payload: dict, args: argparse.Namespace) -> list[dict]:
+    """
+    Encode/decode time and body size of the ``GET /`` response per format.
+    """
+    schedule = parse_schedule(payload)
+    formats = {
+        "json": (schedule.model_dump_json, json.loads),
+        "columnar": (
+            lambda: wire.encode(schedule, wire.COLUMNAR),
+            wire.decode_columnar,
+        ),
+    }
+    if wire.msgpack is not None:
+        formats["msgpack"] = (
+            lambda: wire.encode(schedule, wire.MSGPACK),
+            wire.msgpack.unpackb,
+        )
+    results = []
+    for name, (dump, load) in formats.items():
+        body = dump()
+        encoded = measure(f"wire_{name}_encode", dump, args.repeat, 1)
+        encoded["size_bytes"] = len(body)
+        results += [
+            encoded,
+            measure(f"wire_{name}_decode", lambda: load(body), args.repeat, 1),
+        ]
+    return results
+
+
+class _AlternatingStorage(ScheduleStorage):
+    """
+    Serves two schedule versions in turn, so every refresh changes the days.
+    """
+
+    def __init__(self, first: ScheduleSnapshot, second: ScheduleSnapshot) -> None:
+        self.snapshots = [first, second]
+
+    async def day(self, day_date: date, refresh: bool = True):
+        if refresh:
+            self.snapshots.reverse()
+        return self.snapshots[0].day(day_date)
+
+
+def bench_subscriptions(payload: dict, args: argparse.Namespace) -> list[dict]:
+    """
+    One refresh round fanning out deltas of 10 dates to --subscribers clients.
+    """
+    first = parse_schedule(payload)
+    second = parse_schedule(
+        generate_schedule(
+            days=args.days,
+            slots_per_day=args.slots_per_day,
+            density=args.density,
+            seed=args.seed + 1,
+        )
+    )
+    dates = list(first.days)[:10]
+
+    async def run() -> dict:
+        storage = _AlternatingStorage(
+            ScheduleSnapshot(first, 1), ScheduleSnapshot(second, 2)
+        )
+        hub = SubscriptionHub(queue_size=args.repeat * args.number + 1)
+        for i in range(args.subscribers):
+            await hub.subscribe(storage, {dates[i % len(dates)]})
+        result = await measure_async(
+            f"sse_fanout_{args.subscribers}",
+            lambda: hub.refresh(storage),
+            args.repeat,
+            args.number,
+        )
+        await hub.close()
+        return result
+
+    return [asyncio.run(run())]
+
+
+async def bench_endpoints(payload: dict, args: argparse.Namespace) -> list[dict]:
+    # pylint: disable=import-outside-toplevel
+    import httpx
+    from main import get_app
+
+    sample_date = date.fromisoformat(payload["days"][len(payload["days"]) // 2]["date"])
+    requests = {
+        "GET /": ("GET", "/", None),
+        "GET /?date_from&date_to": (
+            "GET",
+            f"/?date_from={sample_date}&date_to={sample_date}",
+            None,
+        ),
+        "GET /{date}/taken_slots": ("GET", f"/{sample_date}/taken_slots", None),
+        "GET /{date}/free_intervals": ("GET", f"/{sample_date}/free_intervals", None),
+        "POST /{date}/is_free": (
+            "POST",
+            f"/{sample_date}/is_free",
+            {"start": "12:00", "end": "12:30"},
+        ),
+        "POST /find_free_interval": (
+            "POST",
+            f"/find_free_interval?interval_duration={args.duration}",
+            None,
+        ),
+    }
+    results = []
+    previous_url = os.environ.get("API_URL")
+    async with FakeUpstream(payload) as upstream:
+        os.environ["API_URL"] = upstream.url
+        get_settings.cache_clear()
+        try:
+            transport = httpx.ASGITransport(app=get_app())
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                for name, (method, url, body) in requests.items():
+
+                    async def call(method=method, url=url, body=body):
+                        response = await client.request(method, url, json=body)
+                        response.raise_for_status()
+
+                    results.append(
+                        await measure_async(name, call, args.repeat, args.number)
+                    )
+        finally:
+            if previous_url is None:
+                os.environ.pop("API_URL", None)
+            else:
+                os.environ["API_URL"] = previous_url
+            get_settings.cache_clear()
+    return results
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous: dict, current: dict) -> None:
+    before = {result["name"]: result for result in previous["results"]}
+    print(f"{'benchmark':<32}{'before, ms':>14}{'after, ms':>14}{'delta':>10}")
+    for result in current["results"]:
+        old = before.get(result["name"])
+        if old is None:
+            continue
+        delta = (result["median_ms"] - old["median_ms"]) / old["median_ms"] * 100
+        print(
+            f"{result['name']:<32}{old['median_ms']:>14.3f}"
+            f"{result['median_ms']:>14.3f}{delta:>+9.1f}%"
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Schedule service benchmarks")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--slots-per-day", type=int, default=16)
+    parser.add_argument("--density", type=float, default=0.5)
+    parser.add_argument("--overlap", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--number", type=int, default=10, help="calls per endpoint sample"
+    )
+    parser.add_argument(
+        "--duration", type=int, default=60, help="find_free_interval minutes"
+    )
+    parser.add_argument(
+        "--subscribers", type=int, default=2000, help="SSE fan-out subscribers"
+    )
+    parser.add_argument("--skip-endpoints", action="store_true")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results file to compare with")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
+    payload = generate_schedule(
+        days=args.days,
+        slots_per_day=args.slots_per_day,
+        density=args.density,
+        overlap=args.overlap,
+        seed=args.seed,
+    )
+    results = bench_functions(payload, args) + bench_wire(payload, args)
+    results += bench_subscriptions(payload, args)
+    if not args.skip_endpoints:
+        results += asyncio.run(bench_endpoints(payload, args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {
+                "days": args.days,
+                "slots_per_day": args.slots_per_day,
+                "density": args.density,
+                "overlap": args.overlap,
+                "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    for result in results:
+        size = f"{result['size_bytes']:>12} B" if "size_bytes" in result else ""
+        print(f"{result['name']:<32}{result['median_ms']:>12.3f} ms{size}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            compare(json.load(file), report)
+    return report
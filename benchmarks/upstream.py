@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+from aiohttp import web
+
+
+class FakeUpstream:
+    """
+    Local HTTP server that serves a fixed schedule payload, like the real upstream.
+
+    Usage::
+
+        async with FakeUpstream(payload, latency=0.05) as upstream:
+            os.environ["API_URL"] = upstream.url
+    """
+
+    def __init__(
+        self,
+        payload: dict,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.body = json.dumps(payload).encode()
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    async def _handle(self, _request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.Response(body=self.body, content_type="application/json")
+
+    async def start(self) -> None:
+        application = web.Application()
+        application.router.add_get("/", self._handle)
+        self._runner = web.AppRunner(application, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        sockets = site._server.sockets  # pylint: disable=protected-access
+        self.port = sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeUpstream":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
@@ -0,0 +1,248 @@
+"""
+Скрипт нагрузочного тестирования приложения на локальном фейковом upstream
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+import aiohttp
+
+from benchmarks.generator import generate_schedule
+from benchmarks.upstream import FakeUpstream
+
+DEFAULT_MIX = "free_intervals=4,taken_slots=3,is_free=2,find_free_interval=1,schedule=1"
+
+
+def build_requests(payload: dict, duration: int) -> dict:
+    dates = [day["date"] for day in payload["days"]]
+
+    def taken_slots(rng):
+        return "GET", f"/{rng.choice(dates)}/taken_slots", None
+
+    def free_intervals(rng):
+        return "GET", f"/{rng.choice(dates)}/free_intervals", None
+
+    def is_free(rng):
+        hour = rng.randrange(9, 17)
+        body = {"start": f"{hour:02d}:00", "end": f"{hour:02d}:30"}
+        return "POST", f"/{rng.choice(dates)}/is_free", body
+
+    def find_free_interval(_rng):
+        return "POST", f"/find_free_interval?interval_duration={duration}", None
+
+    def schedule(_rng):
+        return "GET", "/", None
+
+    return {
+        "schedule": schedule,
+        "taken_slots": taken_slots,
+        "free_intervals": free_intervals,
+        "is_free": is_free,
+        "find_free_interval": find_free_interval,
+    }
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = int(weight or 1)
+    return weights
+
+
+def percentile(samples: list[float], share: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30) -> None:
+    deadline = perf_counter() + timeout
+    async with aiohttp.ClientSession() as session:
+        while perf_counter() < deadline:
+            try:
+                async with session.get(f"{base_url}/openapi") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Application at {base_url} did not start")
+
+
+async def drive(base_url: str, args: argparse.Namespace, requests: dict) -> dict:
+    weights = parse_mix(args.mix)
+    unknown = set(weights) - set(requests)
+    if unknown:
+        raise ValueError(f"Unknown endpoints in mix: {', '.join(sorted(unknown))}")
+    names = list(weights)
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors: dict[str, int] = {name: 0 for name in names}
+    deadline = perf_counter() + args.duration
+
+    async def client(session: aiohttp.ClientSession, seed: int) -> None:
+        rng = random.Random(seed)
+        while perf_counter() < deadline:
+            name = rng.choices(names, weights=[weights[n] for n in names])[0]
+            method, path, body = requests[name](rng)
+            start = perf_counter()
+            try:
+                async with session.request(method, base_url + path, json=body) as resp:
+                    await resp.read()
+                    if resp.status >= 400:
+                        errors[name] += 1
+                        continue
+            except aiohttp.ClientError:
+                errors[name] += 1
+                continue
+            latencies[name].append((perf_counter() - start) * 1000)
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = perf_counter()
+        await asyncio.gather(
+            *(client(session, args.seed + i) for i in range(args.concurrency))
+        )
+        elapsed = perf_counter() - started
+
+    def stats(samples: list[float], failed: int) -> dict:
+        result = {
+            "requests": len(samples),
+            "errors": failed,
+            "rps": len(samples) / elapsed,
+        }
+        if samples:
+            result.update(
+                p50_ms=percentile(samples, 0.5),
+                p90_ms=percentile(samples, 0.9),
+                p99_ms=percentile(samples, 0.99),
+                mean_ms=statistics.fmean(samples),
+            )
+        return result
+
+    every = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "total": stats(every, sum(errors.values())),
+        "endpoints": {name: stats(latencies[name], errors[name]) for name in names},
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    payload = generate_schedule(
+        days=args.days,
+        slots_per_day=args.slots_per_day,
+        density=args.density,
+        overlap=args.overlap,
+        seed=args.seed,
+    )
+    async with FakeUpstream(payload, latency=args.upstream_latency) as upstream:
+        port = args.port or _free_port()
+        env = {**os.environ, "API_URL": upstream.url}
+        server = subprocess.Popen(  # pylint: disable=consider-using-with
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "main:app",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(port),
+                "--workers",
+                str(args.workers),
+                "--log-level",
+                "warning",
+                "--no-access-log",
+            ],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            await wait_until_ready(base_url)
+            report = await drive(
+                base_url, args, build_requests(payload, args.find_duration)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        report["upstream"] = {
+            "requests": upstream.requests,
+            "payload_bytes": len(upstream.body),
+            "latency_s": args.upstream_latency,
+        }
+    report["params"] = {
+        key: getattr(args, key)
+        for key in (
+            "workers",
+            "concurrency",
+            "duration",
+            "days",
+            "slots_per_day",
+            "mix",
+        )
+    }
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{'endpoint':<22}{'req':>8}{'err':>6}{'req/s':>10}{'p50':>9}{'p90':>9}{'p99':>9}"
+    )
+    rows = {**report["endpoints"], "total": report["total"]}
+    for name, row in rows.items():
+        print(
+            f"{name:<22}{row['requests']:>8}{row['errors']:>6}{row['rps']:>10.1f}"
+            f"{row.get('p50_ms', 0):>9.1f}{row.get('p90_ms', 0):>9.1f}"
+            f"{row.get('p99_ms', 0):>9.1f}"
+        )
+    print(f"upstream payload: {report['upstream']['payload_bytes']} bytes")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test against a fake upstream")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--port", type=int, default=0, help="application port")
+    parser.add_argument("--concurrency", type=int, default=32, help="parallel clients")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,...")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--slots-per-day", type=int, default=16)
+    parser.add_argument("--density", type=float, default=0.5)
+    parser.add_argument("--overlap", type=float, default=0.0)
+    parser.add_argument("--upstream-latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--find-duration", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:  # pragma: no cover
+    """
+    Основная функция нагрузочного теста
+    """
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
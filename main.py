@@ -1,7 +1,21 @@
+import asyncio
+import signal
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from uvicorn import run
 
-from utils import SettingsBase, get_settings
+from utils import SettingsBase, get_settings, reload_settings
+from utils.admission import AdmissionControl
+from utils.capture import CaptureMiddleware, create_capture
+from utils.compression import CompressionMiddleware
+from utils.compute import ComputeExecutor
+from utils.loop_monitor import LoopMonitorMiddleware, create_loop_monitor
+from utils.memory import create_memory_monitor
+from utils.profiling import ProfilingMiddleware
+from utils.storage import create_storage
+from utils.subscriptions import SubscriptionHub
+from utils.warmup import create_warmer
 from api import list_of_routes
 
 
@@ -13,6 +27,54 @@ def bind_routes(application: FastAPI, setting: SettingsBase) -> None:
         application.include_router(route, prefix=setting.PATH_PREFIX)
 
 
+async def warm_up(application: FastAPI) -> None:
+    """
+    Loads deferred imports and builds the cached OpenAPI schema.
+    """
+    await asyncio.sleep(0)
+    # Lazily imported modules are not safe to load from another thread
+    import aiohttp  # pylint: disable=import-outside-toplevel
+
+    _ = aiohttp.ClientSession
+    await asyncio.to_thread(application.openapi)
+
+
+def install_reload_signal(application: FastAPI) -> None:
+    """
+    Re-reads settings on SIGHUP where the platform and thread allow it.
+    """
+
+    def reload() -> None:
+        application.state.settings = reload_settings()
+
+    with suppress(AttributeError, NotImplementedError, RuntimeError, ValueError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload)
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    install_reload_signal(application)
+    # The worker starts accepting requests right away, the heavy parts of
+    # the first request are prepared in the background.
+    task = asyncio.create_task(warm_up(application))
+    if application.state.loop_monitor is not None:
+        application.state.loop_monitor.start()
+    application.state.memory.start()
+    await application.state.storage.start()
+    yield
+    await application.state.memory.close()
+    if application.state.capture is not None:
+        await application.state.capture.close()
+    if application.state.loop_monitor is not None:
+        await application.state.loop_monitor.close()
+    if application.state.warmer is not None:
+        await application.state.warmer.close()
+    await application.state.subscriptions.close()
+    await application.state.storage.close()
+    application.state.compute.close()
+    await task
+
+
 def get_app() -> FastAPI:
     """
     Creates application and all dependable objects.
@@ -33,13 +95,50 @@ def get_app() -> FastAPI:
         openapi_url="/openapi",
         version="0.1.0",
         openapi_tags=tags_metadata,
+        lifespan=lifespan,
     )
     settings = get_settings()
     bind_routes(application, settings)
+    if settings.COMPRESSION_ENABLED:
+        application.add_middleware(CompressionMiddleware, settings=settings)
+    application.state.capture = None
+    if settings.CAPTURE_ENABLED:
+        application.state.capture = create_capture(settings)
+        application.add_middleware(
+            CaptureMiddleware,
+            log=application.state.capture,
+            sample_rate=settings.CAPTURE_SAMPLE_RATE,
+            max_body=settings.CAPTURE_MAX_BODY,
+            prefix=settings.PATH_PREFIX,
+        )
+    # Added last so that Server-Timing also covers compression
+    if settings.PROFILING_ENABLED:
+        application.add_middleware(ProfilingMiddleware, settings=settings)
+    application.state.loop_monitor = None
+    if settings.LOOP_MONITOR_ENABLED:
+        application.state.loop_monitor = create_loop_monitor(settings)
+        application.add_middleware(LoopMonitorMiddleware)
     application.state.settings = settings
+    application.state.storage = create_storage(settings)
+    application.state.warmer = None
+    if settings.WARMUP_ENABLED:
+        application.state.warmer = create_warmer(application.state.storage, settings)
+        application.state.storage.on_swap = application.state.warmer.schedule
+    application.state.admission = AdmissionControl(settings)
+    application.state.compute = ComputeExecutor(
+        settings.COMPUTE_EXECUTOR,
+        settings.COMPUTE_WORKERS,
+        settings.COMPUTE_OFFLOAD_COST,
+    )
+    application.state.subscriptions = SubscriptionHub(
+        settings.SUBSCRIPTION_POLL_INTERVAL, settings.SUBSCRIPTION_QUEUE_SIZE
+    )
+    application.state.memory = create_memory_monitor(application, settings)
     return application
 
 
+# Building the app is cheap: pools, connections and deferred imports are
+# created on startup or first use. fastapi-cli finds it by scanning the module.
 app = get_app()
 
 
@@ -1,17 +1,37 @@
+from schemas.booking import BookingSchema
 from schemas.day import DaySchema
+from schemas.ingest import IngestResultSchema
 from schemas.interval import (
     IntervalSchema,
     FreeIntervalInScheduleSchema,
     IsFreeIntervalSchema,
+    NearestIntervalsSchema,
+    SuggestedIntervalSchema,
 )
+from schemas.overnight import OVERNIGHT, validate_overnight
+from schemas.recurrence import RecurrenceSchema
 from schemas.timeslot import TimeSlotSchema
 from schemas.schedule import ScheduleSchema
+from schemas.subscription import AvailabilityDeltaSchema, DayAvailabilitySchema
+from schemas.utilization import UtilizationSchema
+from schemas.version import ScheduleVersionSchema
 
 __all__ = [
+    "AvailabilityDeltaSchema",
+    "BookingSchema",
+    "DayAvailabilitySchema",
     "DaySchema",
+    "IngestResultSchema",
     "IntervalSchema",
+    "RecurrenceSchema",
     "TimeSlotSchema",
     "ScheduleSchema",
+    "ScheduleVersionSchema",
     "FreeIntervalInScheduleSchema",
     "IsFreeIntervalSchema",
+    "NearestIntervalsSchema",
+    "SuggestedIntervalSchema",
+    "UtilizationSchema",
+    "OVERNIGHT",
+    "validate_overnight",
 ]
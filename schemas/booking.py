@@ -0,0 +1,7 @@
+from datetime import date
+from schemas.interval import IntervalSchema
+
+
+class BookingSchema(IntervalSchema):
+    id: int
+    date: date
@@ -1,5 +1,6 @@
 from datetime import datetime, date, time
 from pydantic import BaseModel, field_validator
+from schemas.overnight import check_end
 
 
 class DaySchema(BaseModel):
@@ -31,7 +32,5 @@ class DaySchema(BaseModel):
     @field_validator("end", mode="after")
     @classmethod
     def check_time_order(cls, end_time, values):
-        start_time = values.data.get("start")
-        if start_time and end_time <= start_time:
-            raise ValueError("End time must be after start time")
-        return end_time
+        # An end before the start runs over midnight where OVERNIGHT allows it
+        return check_end(values.data.get("start"), end_time, values)
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class IngestResultSchema(BaseModel):
+    version: int
+    days: int
+    timeslots: int
+    recurrences: int
+    # Dates removed by a patch
+    deleted: int
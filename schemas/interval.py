@@ -1,5 +1,6 @@
-from datetime import datetime, timedelta, date, time
+from datetime import datetime, date, time
 from pydantic import BaseModel, field_validator
+from schemas.overnight import check_end
 from schemas.timeslot import TimeSlotSchema
 
 
@@ -7,35 +8,41 @@ class IntervalSchema(BaseModel):
     start: time
     end: time
 
+    def minutes(self) -> tuple[int, int]:
+        """
+        Minutes from midnight, the end is past 1440 when it crosses midnight.
+        """
+        start = self.start.hour * 60 + self.start.minute
+        end = self.end.hour * 60 + self.end.minute
+        return start, end if end > start else end + 24 * 60
+
     def overlaps(self, other: "IntervalSchema") -> bool:
-        return self.start < other.end and self.end > other.start
+        start, end = self.minutes()
+        other_start, other_end = other.minutes()
+        return start < other_end and end > other_start
 
     def duration(self) -> int:
-        return int(
-            (
-                timedelta(hours=self.end.hour, minutes=self.end.minute)
-                - timedelta(hours=self.start.hour, minutes=self.start.minute)
-            ).total_seconds()
-            // 60
-        )
+        start, end = self.minutes()
+        return end - start
 
     @field_validator("start", "end", mode="before")
     @classmethod
     def parse_time(cls, value):
+        # "HH:MM" is wall clock time of the schedule, "HH:MM+03:00" is aware
         if isinstance(value, str):
-            try:
-                return datetime.strptime(value, "%H:%M").time()
-            except ValueError as exc:
-                raise ValueError("Time must be in HH:MM format") from exc
+            for time_format in ("%H:%M", "%H:%M%z"):
+                try:
+                    return datetime.strptime(value, time_format).timetz()
+                except ValueError:
+                    continue
+            raise ValueError("Time must be in HH:MM format")
         return value
 
     @field_validator("end", mode="after")
     @classmethod
     def check_time_order(cls, end_time, values):
-        start_time = values.data.get("start")
-        if start_time and end_time <= start_time:
-            raise ValueError("End time must be after start time")
-        return end_time
+        # An end before the start runs over midnight where OVERNIGHT allows it
+        return check_end(values.data.get("start"), end_time, values)
 
 
 class IsFreeIntervalSchema(BaseModel):
@@ -46,3 +53,14 @@ class IsFreeIntervalSchema(BaseModel):
 class FreeIntervalInScheduleSchema(IntervalSchema):
     founded: bool
     date: date
+
+
+class SuggestedIntervalSchema(IntervalSchema):
+    date: date
+    # Minutes between the preferred and the suggested start
+    distance: int
+
+
+class NearestIntervalsSchema(BaseModel):
+    before: SuggestedIntervalSchema | None
+    after: SuggestedIntervalSchema | None
@@ -0,0 +1,28 @@
+from datetime import time
+from typing import TypeVar
+
+from pydantic import BaseModel, ValidationInfo
+
+# Validation context under which an end before the start is a range over
+# midnight. Upstream data and ranges computed by the service are validated
+# with it, request bodies are not.
+OVERNIGHT = {"overnight": True}
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def check_end(start_time: time | None, end_time: time, info: ValidationInfo) -> time:
+    if start_time is None:
+        return end_time
+    overnight = bool(info.context and info.context.get("overnight"))
+    start, end = start_time.replace(tzinfo=None), end_time.replace(tzinfo=None)
+    if end == start or (end < start and not overnight):
+        raise ValueError("End time must be after start time")
+    return end_time
+
+
+def validate_overnight(schema: type[Model], **fields) -> Model:
+    """
+    Builds a schema whose range may run over midnight.
+    """
+    return schema.model_validate(fields, context=OVERNIGHT)
@@ -0,0 +1,68 @@
+from datetime import datetime, date, time, timedelta
+from typing import Literal
+from pydantic import BaseModel, Field, field_validator
+from schemas.overnight import check_end
+
+
+class RecurrenceSchema(BaseModel):
+    """
+    Repeating slot or working-hours template.
+
+    ``busy`` rules add a slot on every matching date, ``working_hours`` rules
+    define the day bounds for dates that have no explicit day in the schedule.
+    Weekly rules repeat on ``weekdays`` (0 is Monday) or on the weekday of
+    ``starts_on`` when the list is empty.
+    """
+
+    id: int
+    kind: Literal["busy", "working_hours"] = "busy"
+    freq: Literal["daily", "weekly"]
+    interval: int = Field(1, ge=1)
+    weekdays: list[int] = Field(default_factory=list)
+    start: time
+    end: time
+    starts_on: date
+    until: date | None = None
+
+    @field_validator("starts_on", "until", mode="before")
+    @classmethod
+    def parse_date(cls, value):
+        if isinstance(value, str):
+            try:
+                return datetime.strptime(value, "%Y-%m-%d").date()
+            except ValueError as exc:
+                raise ValueError("Date must be in YYYY-MM-DD format") from exc
+        return value
+
+    @field_validator("start", "end", mode="before")
+    @classmethod
+    def parse_time(cls, value):
+        if isinstance(value, str):
+            try:
+                return datetime.strptime(value, "%H:%M").time()
+            except ValueError as exc:
+                raise ValueError("Time must be in HH:MM format") from exc
+        return value
+
+    @field_validator("end", mode="after")
+    @classmethod
+    def check_time_order(cls, end_time, values):
+        # An end before the start runs over midnight where OVERNIGHT allows it
+        return check_end(values.data.get("start"), end_time, values)
+
+    @field_validator("weekdays", mode="after")
+    @classmethod
+    def check_weekdays(cls, weekdays):
+        if any(not 0 <= weekday <= 6 for weekday in weekdays):
+            raise ValueError("Weekdays must be in range 0-6")
+        return weekdays
+
+    def occurs_on(self, day_date: date) -> bool:
+        if day_date < self.starts_on or (self.until and day_date > self.until):
+            return False
+        if self.freq == "daily":
+            return (day_date - self.starts_on).days % self.interval == 0
+        if day_date.weekday() not in (self.weekdays or [self.starts_on.weekday()]):
+            return False
+        first_monday = self.starts_on - timedelta(days=self.starts_on.weekday())
+        return ((day_date - first_monday).days // 7) % self.interval == 0
@@ -1,9 +1,11 @@
 from datetime import date
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from .day import DaySchema
+from .recurrence import RecurrenceSchema
 from .timeslot import TimeSlotSchema
 
 
 class ScheduleSchema(BaseModel):
     days: dict[date, DaySchema]
     timeslots: list[TimeSlotSchema]
+    recurrences: list[RecurrenceSchema] = Field(default_factory=list)
@@ -0,0 +1,14 @@
+from datetime import date
+from pydantic import BaseModel
+from schemas.interval import IntervalSchema
+
+
+class DayAvailabilitySchema(BaseModel):
+    date: date
+    free: list[IntervalSchema]
+
+
+class AvailabilityDeltaSchema(BaseModel):
+    date: date
+    added: list[IntervalSchema]
+    removed: list[IntervalSchema]
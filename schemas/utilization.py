@@ -0,0 +1,14 @@
+from datetime import date
+from pydantic import BaseModel
+
+
+class UtilizationSchema(BaseModel):
+    start: date
+    end: date
+    days: int
+    total_minutes: int
+    busy_minutes: int
+    free_minutes: int
+    busy_ratio: float
+    # Number of free gaps by length in minutes, e.g. {"15-30": 4, "240+": 1}
+    gaps: dict[str, int]
@@ -0,0 +1,9 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class ScheduleVersionSchema(BaseModel):
+    version: int
+    created_at: datetime
+    # Days added, changed or removed since the previous kept version
+    changed_days: int
@@ -3,12 +3,50 @@
 # pylint: disable=wrong-import-position
 import os
 import sys
+from datetime import date, time
 from unittest.mock import Mock, AsyncMock
 import pytest
 from fastapi.testclient import TestClient
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from main import get_app
+from schemas import DaySchema, TimeSlotSchema
+from utils.snapshot import DayView, ScheduleSnapshot
+from utils.storage import ScheduleStorage
+
+
+def make_view(day_date: date, *hours: int) -> DayView:
+    """
+    A 09:00-18:00 day with a half-hour slot starting at each of ``hours``.
+    """
+    day = DaySchema(id=day_date.toordinal(), date=day_date, start=time(9), end=time(18))
+    slots = [
+        TimeSlotSchema(id=hour, day_id=day.id, start=time(hour), end=time(hour, 30))
+        for hour in hours
+    ]
+    return DayView(day, slots)
+
+
+class MemoryStorage(ScheduleStorage):
+    """
+    Storage serving prepared day views and, for the memory report, a snapshot.
+    """
+
+    def __init__(
+        self,
+        views: dict[date, DayView] | None = None,
+        snapshot: ScheduleSnapshot | None = None,
+    ) -> None:
+        self.views = views or {}
+        self.current = snapshot
+        self.refreshes: list[bool] = []
+
+    async def day(self, day_date: date, refresh: bool = True) -> DayView | None:
+        self.refreshes.append(refresh)
+        return self.views.get(day_date)
+
+    def held(self) -> tuple[ScheduleSnapshot | None, list[DayView]]:
+        return self.current, []
 
 
 @pytest.fixture
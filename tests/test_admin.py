@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import get_app
+from utils.settings import Settings, get_settings
+
+
+class TestSettingsProvider:
+    """Тесты для кэшируемого провайдера настроек"""
+
+    @pytest.fixture
+    def admin_client(self):
+        app = get_app()
+        app.dependency_overrides[get_settings] = lambda: Settings(ADMIN_TOKEN="secret")
+        return TestClient(app)
+
+    def test_reload_settings(self, admin_client, monkeypatch):
+        """Тест перечитывания настроек через админский эндпоинт"""
+        before = get_settings()
+        monkeypatch.setenv("API_URL", "http://reloaded.test")
+
+        response = admin_client.post(
+            "/admin/settings/reload", headers={"X-Admin-Token": "secret"}
+        )
+
+        assert response.status_code == 200
+        assert get_settings() is not before
+        assert get_settings().URL == "http://reloaded.test"
+        assert admin_client.app.state.settings is get_settings()
+
+        monkeypatch.delenv("API_URL")
+        get_settings.cache_clear()
+
+    def test_reload_requires_token(self, admin_client):
+        """Тест отказа без правильного токена"""
+        response = admin_client.post(
+            "/admin/settings/reload", headers={"X-Admin-Token": "wrong"}
+        )
+        assert response.status_code == 401
+
+    def test_admin_disabled_without_token(self, client):
+        """Тест, что админский API выключен без ADMIN_TOKEN"""
+        response = client.post("/admin/settings/reload")
+        assert response.status_code == 404
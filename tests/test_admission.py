@@ -0,0 +1,97 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+import pytest
+from fastapi.testclient import TestClient
+
+from main import get_app
+from utils.admission import AdmissionGate, Overloaded
+from utils.settings import RouteLimit, Settings, get_settings
+
+
+class TestAdmissionGate:
+    """Тесты для ограничения конкурентности с очередью"""
+
+    async def test_priority_order(self):
+        """Тест обслуживания дешевых запросов раньше дорогих"""
+        gate = AdmissionGate(limit=1, queue_size=10)
+        await gate.acquire()
+        served = []
+
+        async def waiter(name: str, priority: int) -> None:
+            async with gate.slot(priority):
+                served.append(name)
+
+        tasks = [
+            asyncio.create_task(waiter("scan", 1)),
+            asyncio.create_task(waiter("read", 0)),
+            asyncio.create_task(waiter("read-2", 0)),
+        ]
+        await asyncio.sleep(0)
+        assert gate.queued == 3
+
+        gate.release()
+        await asyncio.gather(*tasks)
+        assert served == ["read", "read-2", "scan"]
+        assert gate.active == 0
+
+    async def test_queue_full(self):
+        """Тест немедленного отказа при переполненной очереди"""
+        gate = AdmissionGate(limit=1, queue_size=0)
+        await gate.acquire()
+
+        with pytest.raises(Overloaded) as exc_info:
+            await gate.acquire()
+        assert exc_info.value.retry_after >= 1
+
+    async def test_deadline(self):
+        """Тест отказа по истечении времени ожидания"""
+        gate = AdmissionGate(limit=1, queue_size=1)
+        await gate.acquire()
+
+        with pytest.raises(Overloaded):
+            await gate.acquire(timeout=0.01)
+        assert gate.queued == 0
+
+        gate.release()
+        assert gate.active == 0
+
+
+class TestAdmissionEndpoint:
+    """Интеграционные тесты отказа под нагрузкой"""
+
+    @pytest.fixture
+    def overloaded(self, mock_http_session, mock_schedule_data):
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(return_value=mock_schedule_data)
+        settings = Settings(
+            URL="http://test.com",
+            ADMISSION_QUEUE_SIZE=0,
+            ADMISSION_ROUTES={"/find_free_interval": RouteLimit(limit=1, priority=1)},
+        )
+        with patch("main.get_settings", return_value=settings):
+            app = get_app()
+        app.dependency_overrides[get_settings] = lambda: settings
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=settings),
+        ):
+            yield app, TestClient(app)
+
+    def test_rejected_with_retry_after(self, overloaded):
+        """Тест ответа 503 с Retry-After при занятом маршруте"""
+        app, client = overloaded
+        gate, _ = app.state.admission.routes["/find_free_interval"]
+
+        assert client.post("/find_free_interval").status_code == 200
+        gate.active = gate.limit
+        response = client.post("/find_free_interval")
+
+        assert response.status_code == 503
+        assert int(response.headers["retry-after"]) >= 1
+
+    def test_unlisted_route_not_gated(self, overloaded):
+        """Тест маршрутов без ограничений"""
+        app, client = overloaded
+        app.state.admission.shared.active = app.state.admission.shared.limit
+
+        assert client.get("/2024-01-15/free_intervals").status_code == 200
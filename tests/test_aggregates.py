@@ -0,0 +1,83 @@
+import random
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, patch
+
+from benchmarks.generator import generate_schedule
+from utils import ScheduleSnapshot, parse_schedule
+
+
+def make_snapshot() -> ScheduleSnapshot:
+    payload = generate_schedule(days=60, slots_per_day=6, overlap=0.3, seed=5)
+    return ScheduleSnapshot(parse_schedule(payload), version=1)
+
+
+class TestUtilizationIndex:
+    """Тесты для агрегатов занятости на префиксных суммах"""
+
+    def test_range_parity(self):
+        """Тест совпадения сумм по диапазону с прямым подсчетом"""
+        snapshot = make_snapshot()
+        index = snapshot.utilization
+        rng = random.Random(1)
+        for _ in range(50):
+            first = date(2024, 1, 1) + timedelta(days=rng.randrange(70))
+            last = first + timedelta(days=rng.randrange(30))
+            views = [view for view in snapshot.days() if first <= view.day.date <= last]
+            summary = index.summary(first, last)
+
+            assert summary.days == len(views)
+            assert summary.busy_minutes == sum(
+                end - start for view in views for start, end in view.busy_spans
+            )
+            assert summary.free_minutes == sum(
+                end - start for view in views for start, end in view.free_spans
+            )
+            assert sum(summary.gaps.values()) == sum(
+                len(view.free_spans) for view in views
+            )
+
+    def test_periods(self):
+        """Тест группировки по неделям и месяцам"""
+        index = make_snapshot().utilization
+
+        months = index.report(period="month")
+        assert [(m.start, m.end, m.days) for m in months] == [
+            (date(2024, 1, 1), date(2024, 1, 31), 31),
+            (date(2024, 2, 1), date(2024, 2, 29), 29),
+        ]
+        weeks = index.report(date(2024, 1, 3), date(2024, 1, 20), period="week")
+        assert [w.days for w in weeks] == [5, 7, 6]
+        assert weeks[1].start.weekday() == 0
+
+    def test_empty(self):
+        """Тест пустого расписания"""
+        snapshot = ScheduleSnapshot(parse_schedule({}), version=1)
+        assert snapshot.utilization.report(period="week") == []
+
+
+class TestUtilizationEndpoint:
+    """Интеграционные тесты эндпоинта /utilization"""
+
+    def test_week(self, client, mock_http_session, mock_schedule_data, mock_settings):
+        """Тест недельного агрегата с гистограммой промежутков"""
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(return_value=mock_schedule_data)
+
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=mock_settings),
+        ):
+            response = client.get("/utilization", params={"period": "week"})
+            invalid = client.get(
+                "/utilization",
+                params={"date_from": "2024-01-16", "date_to": "2024-01-15"},
+            )
+
+        (week,) = response.json()
+        assert week["days"] == 2
+        assert week["total_minutes"] == 2 * 540
+        assert week["busy_minutes"] == 120
+        assert week["gaps"]["60-120"] == 1
+        assert week["gaps"]["120-240"] == 2
+        assert week["gaps"]["240+"] == 1
+        assert invalid.status_code == 422
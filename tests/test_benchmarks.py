@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from benchmarks.generator import generate_schedule
+from benchmarks.replay import main as replay_main
+from benchmarks.suite import main
+from utils import parse_schedule
+from utils.capture import CaptureLog
+from utils.snapshot import ScheduleSnapshot
+
+
+class TestScheduleGenerator:
+    """Тесты для генератора синтетических расписаний"""
+
+    def test_generator_is_deterministic(self):
+        """Тест воспроизводимости генерации при одинаковом seed"""
+        first = generate_schedule(days=10, slots_per_day=5, overlap=0.5, seed=42)
+        second = generate_schedule(days=10, slots_per_day=5, overlap=0.5, seed=42)
+        assert first == second
+
+    def test_generator_sizes(self):
+        """Тест количества дней и слотов"""
+        payload = generate_schedule(days=20, slots_per_day=7)
+        assert len(payload["days"]) == 20
+        assert len(payload["timeslots"]) == 140
+
+    def test_generator_payload_is_valid(self):
+        """Тест, что сгенерированное расписание проходит валидацию"""
+        payload = generate_schedule(days=5, slots_per_day=50, density=1.0, overlap=0.3)
+        schedule = parse_schedule(payload)
+        assert len(schedule.days) == 5
+        assert len(schedule.timeslots) == 250
+
+    def test_generator_without_overlap(self):
+        """Тест отсутствия пересечений при overlap=0"""
+        payload = generate_schedule(days=3, slots_per_day=10, density=0.9)
+        schedule = parse_schedule(payload)
+        for day in schedule.days.values():
+            slots = sorted(
+                (slot for slot in schedule.timeslots if slot.day_id == day.id),
+                key=lambda slot: slot.start,
+            )
+            for previous, current in zip(slots, slots[1:]):
+                assert previous.end <= current.start
+
+    def test_generator_limits(self):
+        """Тест ограничений на размер расписания"""
+        with pytest.raises(ValueError):
+            generate_schedule(days=10_001)
+        with pytest.raises(ValueError):
+            generate_schedule(days=10_000, slots_per_day=101)
+
+
+class TestBenchmarkSuite:
+    """Тесты для запуска набора бенчмарков"""
+
+    def test_suite_writes_json_report(self, tmp_path):
+        """Тест записи результатов в JSON"""
+        output = tmp_path / "bench.json"
+        report = main(
+            ["--days", "3", "--repeat", "1", "--number", "1", "--output", str(output)]
+        )
+
+        names = [result["name"] for result in report["results"]]
+        assert "find_free_intervals" in names
+        assert "POST /find_free_interval" in names
+        assert "wire_columnar_decode" in names
+        sizes = {
+            r["name"]: r["size_bytes"] for r in report["results"] if "size_bytes" in r
+        }
+        assert sizes["wire_columnar_encode"] < sizes["wire_json_encode"]
+        assert output.exists()
+        assert report["meta"]["params"]["days"] == 3
+
+
+class TestReplay:
+    """Тесты для воспроизведения записанных запросов"""
+
+    def test_replay_reports_routes(self, tmp_path, mock_schedule_data):
+        """Тест воспроизведения по маршрутам и сравнения с прошлым прогоном"""
+        path = tmp_path / "capture.jsonl.gz"
+        log = CaptureLog(str(path))
+        snapshot = ScheduleSnapshot(parse_schedule(mock_schedule_data), 1)
+        requests = [
+            ("GET", "/{date_format}/free_intervals", "/2024-01-15/free_intervals", ""),
+            (
+                "POST",
+                "/{date_format}/is_free",
+                "/2024-01-15/is_free",
+                '{"start":"10:30","end":"12:00"}',
+            ),
+            ("GET", "/{date_format}/free_intervals", "/2024-01-16/free_intervals", ""),
+            (
+                "POST",
+                "/{date_format}/book",
+                "/2024-01-15/book",
+                '{"start":"16:00","end":"17:00"}',
+            ),
+        ]
+
+        async def record() -> None:
+            for method, route, url, body in requests:
+                await log.record(
+                    snapshot,
+                    {
+                        "route": f"{method} {route}",
+                        "method": method,
+                        "path": url,
+                        "query": "",
+                        "headers": {"content-type": "application/json"},
+                        "body": body,
+                        "status": 201 if route.endswith("book") else 200,
+                        "duration_ms": 1.0,
+                    },
+                )
+            await log.close()
+
+        asyncio.run(record())
+        output = tmp_path / "replay.json"
+        args = [str(path), "--repeat", "2", "--warmup", "0", "--output", str(output)]
+        report = replay_main(args)
+
+        results = {result["name"]: result for result in report["results"]}
+        assert results["GET /{date_format}/free_intervals"]["count"] == 4
+        assert results["POST /{date_format}/is_free"]["count"] == 2
+        # Бронь воспроизводится в каждом прогоне без конфликта с прошлым
+        assert results["POST /{date_format}/book"]["count"] == 2
+        assert all(result["status_mismatches"] == 0 for result in results.values())
+        assert output.exists()
+        assert replay_main(args + ["--compare", str(output)])["results"]
@@ -0,0 +1,122 @@
+import random
+from datetime import time
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+
+from benchmarks.generator import generate_schedule
+from main import get_app
+from schemas import IntervalSchema
+from utils import interval_has_intersections, parse_schedule
+from utils.bitmap import DayBitmap
+from utils.minutes import to_minutes
+from utils.settings import Settings, get_settings
+from utils.snapshot import ScheduleSnapshot
+
+
+def random_interval(rng: random.Random) -> IntervalSchema:
+    start = rng.randrange(8 * 60, 19 * 60)
+    end = rng.randrange(start + 1, 20 * 60)
+    return IntervalSchema(
+        start=time(start // 60, start % 60), end=time(end // 60, end % 60)
+    )
+
+
+class TestDayBitmap:
+    """Тесты для минутной битовой карты занятости"""
+
+    def test_is_free(self):
+        """Тест проверки диапазона по слотам дня"""
+        bitmap = DayBitmap.from_slots(
+            parse_schedule(
+                {
+                    "timeslots": [
+                        {"id": 1, "day_id": 1, "start": "10:00", "end": "11:00"}
+                    ]
+                }
+            ).timeslots
+        )
+
+        assert bitmap.is_free(540, 600) is True
+        assert bitmap.is_free(659, 720) is False
+        assert bitmap.bits.bit_count() == 60
+
+    def test_find_gap(self):
+        """Тест поиска первого свободного отрезка нужной длины"""
+        bitmap = DayBitmap((1 << 600) - 1)  # занято 00:00-10:00
+
+        assert bitmap.find_gap(30, 540, 1080) == 600
+        assert bitmap.find_gap(600, 540, 1080) is None
+
+    def test_parity_with_interval_has_intersections(self):
+        """Тест совпадения результатов с interval_has_intersections"""
+        rng = random.Random(7)
+        snapshot = ScheduleSnapshot(
+            parse_schedule(generate_schedule(days=20, slots_per_day=12, overlap=0.3)),
+            version=1,
+        )
+        for view in snapshot.days():
+            for _ in range(20):
+                target = random_interval(rng)
+                expected = interval_has_intersections(target, view.slots).is_free
+                span = view.span(target.start, target.end)
+                assert view.bitmap.is_free(*span) is expected
+
+    def test_gap_parity_with_free_intervals(self):
+        """Тест совпадения поиска отрезка со свободными интервалами"""
+        snapshot = ScheduleSnapshot(
+            parse_schedule(generate_schedule(days=20, slots_per_day=6, overlap=0.5)),
+            version=1,
+        )
+        for view in snapshot.days():
+            for duration in (0, 15, 45, 120):
+                expected = next(
+                    (
+                        to_minutes(free.start)
+                        for free in view.free
+                        if free.duration() >= duration
+                    ),
+                    None,
+                )
+                found = view.bitmap.find_gap(duration, *view.bounds)
+                assert found == expected
+
+
+class TestBitmapEngineEndpoints:
+    """Тесты эндпоинтов с движком на битовых картах"""
+
+    def test_endpoints_with_bitmap_engine(self, mock_http_session, mock_schedule_data):
+        """Тест is_free и find_free_interval при AVAILABILITY_ENGINE=bitmap"""
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(return_value=mock_schedule_data)
+        settings = Settings(URL="http://test.com", AVAILABILITY_ENGINE="bitmap")
+        app = get_app()
+        app.dependency_overrides[get_settings] = lambda: settings
+        client = TestClient(app)
+
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=settings),
+            patch(
+                "api.main_router.interval_has_intersections",
+                wraps=interval_has_intersections,
+            ) as checker,
+        ):
+            free = client.post(
+                "/2024-01-15/is_free", json={"start": "12:00", "end": "13:00"}
+            )
+            taken = client.post(
+                "/2024-01-15/is_free", json={"start": "10:30", "end": "11:30"}
+            )
+            found = client.post("/find_free_interval?interval_duration=120")
+
+        # Свободный интервал проверяется только по битовой карте
+        assert checker.call_count == 1
+        assert free.json() == {"is_free": True, "overlaps": []}
+        assert taken.json()["is_free"] is False
+        assert [slot["id"] for slot in taken.json()["overlaps"]] == [1]
+        assert found.json() == {
+            "start": "11:00:00",
+            "end": "13:00:00",
+            "founded": True,
+            "date": "2024-01-15",
+        }
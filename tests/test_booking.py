@@ -0,0 +1,208 @@
+import asyncio
+from datetime import date, time
+from unittest.mock import AsyncMock, patch
+import pytest
+
+from schemas import DaySchema, IntervalSchema, RecurrenceSchema, TimeSlotSchema
+from utils.booking import BookingConflict, BookingLedger
+from utils.snapshot import DayView
+
+
+def make_view(*slots: TimeSlotSchema) -> DayView:
+    day = DaySchema(id=1, date=date(2024, 1, 15), start=time(9, 0), end=time(18, 0))
+    return DayView(day, list(slots))
+
+
+def interval(start: int, end: int) -> IntervalSchema:
+    return IntervalSchema(start=time(start, 0), end=time(end, 0))
+
+
+class TestBookingLedger:
+    """Тесты для журнала ожидающих бронирований"""
+
+    def test_reserve_free_interval(self):
+        """Тест бронирования свободного интервала"""
+        ledger = BookingLedger(ttl=60)
+        booking = ledger.reserve(make_view(), interval(10, 11))
+
+        assert booking.id == 1
+        assert booking.date == date(2024, 1, 15)
+        assert booking.start == time(10, 0)
+
+    def test_conflict_with_schedule(self):
+        """Тест конфликта со слотом из расписания"""
+        ledger = BookingLedger(ttl=60)
+        view = make_view(TimeSlotSchema(id=5, day_id=1, start="10:00", end="11:00"))
+
+        with pytest.raises(BookingConflict) as exc_info:
+            ledger.reserve(view, interval(10, 12))
+        assert [slot.id for slot in exc_info.value.result.overlaps] == [5]
+
+    def test_conflict_with_pending_booking(self):
+        """Тест конфликта с еще не подтвержденным бронированием"""
+        ledger = BookingLedger(ttl=60)
+        ledger.reserve(make_view(), interval(10, 12))
+
+        with pytest.raises(BookingConflict):
+            ledger.reserve(make_view(), interval(11, 13))
+
+    def test_booking_ids_differ_from_recurrences(self):
+        """Тест разных id у бронирования и слота из повторяющегося правила"""
+        ledger = BookingLedger(ttl=60)
+        rule = RecurrenceSchema(
+            id=1, freq="daily", start="16:00", end="17:00", starts_on="2024-01-01"
+        )
+        view = DayView(make_view().day, [], [rule])
+        ledger.reserve(view, interval(10, 11))
+
+        with pytest.raises(BookingConflict) as exc_info:
+            ledger.reserve(view, interval(10, 17))
+        ids = [slot.id for slot in exc_info.value.result.overlaps]
+        assert len(ids) == len(set(ids)) == 2
+
+    def test_pending_dropped_when_confirmed(self):
+        """Тест удаления бронирования, появившегося в расписании"""
+        ledger = BookingLedger(ttl=60)
+        ledger.reserve(make_view(), interval(10, 12))
+        confirmed = make_view(
+            TimeSlotSchema(id=9, day_id=1, start="10:00", end="12:00")
+        )
+
+        assert ledger.pending(confirmed) == []
+
+    def test_pending_expires(self):
+        """Тест истечения срока ожидающего бронирования"""
+        ledger = BookingLedger(ttl=60)
+        ledger.reserve(make_view(), interval(10, 12))
+        ledger.ttl = 0
+
+        assert ledger.pending(make_view()) == []
+
+    @pytest.mark.asyncio
+    async def test_locks_are_per_day(self):
+        """Тест, что блокировки разных дней не мешают друг другу"""
+        ledger = BookingLedger(ttl=60)
+
+        async def other_day() -> None:
+            async with ledger.lock(date(2024, 1, 16)):
+                pass
+
+        async with ledger.lock(date(2024, 1, 15)):
+            await asyncio.wait_for(other_day(), timeout=1)
+
+    async def test_same_day_is_serialized(self):
+        """Тест очередности бронирований одного дня и удаления свободной блокировки"""
+        ledger = BookingLedger(ttl=60)
+        order = []
+
+        async def book(name: str) -> None:
+            async with ledger.lock(date(2024, 1, 15)):
+                order.append(f"{name} start")
+                await asyncio.sleep(0.01)
+                order.append(f"{name} end")
+
+        await asyncio.gather(book("a"), book("b"))
+
+        assert order == ["a start", "a end", "b start", "b end"]
+        assert ledger._locks == {}  # pylint: disable=protected-access
+
+    def test_expired_bookings_of_other_days_are_swept(self):
+        """Тест удаления просроченных бронирований дат, которые больше не читают"""
+        ledger = BookingLedger(ttl=60)
+        other_day = DaySchema(
+            id=2, date=date(2024, 1, 16), start=time(9, 0), end=time(18, 0)
+        )
+        ledger.reserve(DayView(other_day, []), interval(10, 11))
+        ledger.ttl = 0
+
+        ledger.reserve(make_view(), interval(10, 11))
+
+        assert list(ledger._pending) == [
+            date(2024, 1, 15)
+        ]  # pylint: disable=protected-access
+
+    def test_overlay(self):
+        """Тест наложения ожидающих бронирований на день"""
+        ledger = BookingLedger(ttl=60)
+        view = make_view()
+        assert ledger.overlay(view) is view
+
+        ledger.reserve(view, interval(10, 11))
+        overlay = ledger.overlay(view)
+
+        assert overlay is not view
+        assert [(i.start, i.end) for i in overlay.free][0] == (time(9), time(10))
+        assert view.responses is not overlay.responses
+
+
+class TestBookingEndpoint:
+    """Интеграционные тесты для эндпоинта бронирования"""
+
+    @pytest.fixture
+    def booking_client(
+        self, client, mock_http_session, mock_schedule_data, mock_settings
+    ):
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(return_value=mock_schedule_data)
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=mock_settings),
+            patch("utils.storage.get_current_snapshot", return_value=None),
+            patch("api.main_router.bookings", BookingLedger(ttl=60)),
+        ):
+            yield client
+
+    def test_book_free_interval(self, booking_client):
+        """Тест успешного бронирования"""
+        response = booking_client.post(
+            "/2024-01-15/book", json={"start": "12:00", "end": "13:00"}
+        )
+
+        assert response.status_code == 201
+        assert response.json()["date"] == "2024-01-15"
+
+    def test_book_twice(self, booking_client):
+        """Тест отказа при повторном бронировании того же интервала"""
+        body = {"start": "12:00", "end": "13:00"}
+        booking_client.post("/2024-01-15/book", json=body)
+
+        response = booking_client.post("/2024-01-15/book", json=body)
+
+        assert response.status_code == 409
+        assert response.json()["detail"]["is_free"] is False
+
+    def test_booked_interval_is_not_free(self, booking_client):
+        """Тест, что забронированный интервал сразу перестает быть свободным"""
+        body = {"start": "12:00", "end": "13:00"}
+        booking_client.get("/2024-01-15/free_intervals")
+        booking_client.post("/2024-01-15/book", json=body)
+
+        is_free = booking_client.post("/2024-01-15/is_free", json=body)
+        free = booking_client.get("/2024-01-15/free_intervals")
+
+        assert is_free.json()["is_free"] is False
+        assert {"start": "12:00:00", "end": "13:00:00"} not in free.json()
+        assert {"start": "11:00:00", "end": "12:00:00"} in free.json()
+
+    def test_book_taken_interval(self, booking_client):
+        """Тест отказа при пересечении со слотом расписания"""
+        response = booking_client.post(
+            "/2024-01-15/book", json={"start": "10:30", "end": "11:30"}
+        )
+
+        assert response.status_code == 409
+        assert response.json()["detail"]["overlaps"][0]["id"] == 1
+
+    def test_book_outside_day(self, booking_client):
+        """Тест бронирования вне рабочих часов"""
+        response = booking_client.post(
+            "/2024-01-15/book", json={"start": "07:00", "end": "08:00"}
+        )
+        assert response.status_code == 422
+
+    def test_book_missing_day(self, booking_client):
+        """Тест бронирования на отсутствующий день"""
+        response = booking_client.post(
+            "/2024-01-20/book", json={"start": "12:00", "end": "13:00"}
+        )
+        assert response.status_code == 404
@@ -0,0 +1,163 @@
+import threading
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from conftest import MemoryStorage, make_view
+from fastapi.testclient import TestClient
+
+from main import get_app
+from utils import parse_schedule
+from utils.capture import CaptureLog, CaptureMiddleware, read_capture, schedule_payload
+from utils.snapshot import ScheduleSnapshot
+from utils.settings import Settings, get_settings
+
+
+class TestCapture:
+    """Тесты для записи запросов для воспроизведения"""
+
+    def test_schedule_payload_round_trip(self, mock_schedule_data):
+        """Тест восстановления расписания из записанного снимка"""
+        data = dict(mock_schedule_data)
+        data["recurrences"] = [
+            {
+                "id": 1,
+                "freq": "weekly",
+                "weekdays": [0, 2],
+                "start": "12:00",
+                "end": "13:00",
+                "starts_on": "2024-01-01",
+            }
+        ]
+        schedule = parse_schedule(data)
+
+        assert parse_schedule(schedule_payload(schedule)) == schedule
+
+    def test_middleware_records_requests(
+        self, tmp_path, mock_http_session, mock_schedule_data
+    ):
+        """Тест записи маршрута, тела, статуса и снимка расписания"""
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(return_value=mock_schedule_data)
+        path = tmp_path / "capture.jsonl.gz"
+        settings = Settings(
+            URL="http://test.com",
+            ADMIN_TOKEN="secret",
+            CAPTURE_ENABLED=True,
+            CAPTURE_SAMPLE_RATE=1,
+            CAPTURE_PATH=str(path),
+        )
+        with patch("main.get_settings", return_value=settings):
+            app = get_app()
+        app.dependency_overrides[get_settings] = lambda: settings
+
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=settings),
+            TestClient(app) as client,
+        ):
+            client.get("/2024-01-15/free_intervals")
+            client.post("/2024-01-15/is_free", json={"start": "10:30", "end": "12:00"})
+            client.get("/admin/memory", headers={"X-Admin-Token": "secret"})
+
+        snapshots, requests = read_capture(str(path))
+        assert [r["route"] for r in requests] == [
+            "GET /{date_format}/free_intervals",
+            "POST /{date_format}/is_free",
+        ]
+        assert requests[1]["body"] == '{"start":"10:30","end":"12:00"}'
+        assert requests[1]["status"] == 200
+        # Оба запроса обслужены одной версией, снимок записан один раз
+        assert requests[0]["snapshot"] == requests[1]["snapshot"]
+        assert list(snapshots) == [requests[0]["snapshot"]]
+        assert parse_schedule(snapshots[requests[0]["snapshot"]]) == parse_schedule(
+            mock_schedule_data
+        )
+
+    def test_middleware_skips_unreplayable(self, tmp_path):
+        """Тест пропуска служебных маршрутов с префиксом и запросов без снимка"""
+        path = tmp_path / "capture.jsonl.gz"
+        settings = Settings(
+            URL="http://test.com",
+            PATH_PREFIX="/api",
+            ADMIN_TOKEN="secret",
+            CAPTURE_ENABLED=True,
+            CAPTURE_SAMPLE_RATE=1,
+            CAPTURE_PATH=str(path),
+        )
+        with patch("main.get_settings", return_value=settings):
+            app = get_app()
+        app.dependency_overrides[get_settings] = lambda: settings
+
+        with TestClient(app) as client:
+            client.get("/api/admin/memory", headers={"X-Admin-Token": "secret"})
+            # День отдан, но версия расписания не удержана и не воспроизводима
+            day_date = date(2024, 1, 15)
+            client.app.state.storage = MemoryStorage({day_date: make_view(day_date)})
+            taken = client.get("/api/2024-01-15/taken_slots")
+
+        assert taken.status_code == 200
+        assert not path.exists() or read_capture(str(path)) == ({}, [])
+
+    async def test_oversized_body_is_dropped(self, tmp_path, mock_schedule_data):
+        """Тест пропуска запроса с телом больше лимита, пришедшим частями"""
+        snapshot = ScheduleSnapshot(parse_schedule(mock_schedule_data), 1)
+        log = CaptureLog(str(tmp_path / "capture.jsonl.gz"))
+
+        async def app(scope, receive, send):
+            while (await receive()).get("more_body"):
+                pass
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        async def call(*parts: bytes) -> None:
+            messages = [
+                {"type": "http.request", "body": part, "more_body": i < len(parts) - 1}
+                for i, part in enumerate(parts)
+            ]
+            scope = {
+                "type": "http",
+                "method": "POST",
+                "path": "/2024-01-15/is_free",
+                "query_string": b"",
+                "headers": [],
+                "app": SimpleNamespace(
+                    state=SimpleNamespace(storage=MemoryStorage(snapshot=snapshot))
+                ),
+            }
+
+            async def receive():
+                return messages.pop(0)
+
+            async def send(message):
+                pass
+
+            await CaptureMiddleware(app, log, 1, max_body=10)(scope, receive, send)
+
+        await call(b"x" * 8, b"x" * 8, b"x" * 8)
+        await call(b"y" * 4, b"y" * 4)
+        await log.close()
+
+        _, requests = read_capture(str(tmp_path / "capture.jsonl.gz"))
+        assert [request["body"] for request in requests] == ["y" * 8]
+
+    async def test_snapshot_hashed_once_off_the_loop(
+        self, tmp_path, mock_schedule_data
+    ):
+        """Тест хеширования версии расписания один раз и в отдельном потоке"""
+        snapshot = ScheduleSnapshot(parse_schedule(mock_schedule_data), 1)
+        log = CaptureLog(str(tmp_path / "capture.jsonl.gz"))
+        threads = []
+        digest = CaptureLog._hash  # pylint: disable=protected-access
+
+        def traced(schedule):
+            threads.append(threading.get_ident())
+            return digest(schedule)
+
+        with patch.object(CaptureLog, "_hash", staticmethod(traced)):
+            first = await log.snapshot_key(snapshot)
+            second = await log.snapshot_key(snapshot)
+
+        assert first == second
+        assert len(threads) == 1
+        assert threading.get_ident() not in threads
@@ -0,0 +1,134 @@
+import gzip
+from unittest.mock import AsyncMock, patch
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from benchmarks.generator import generate_schedule
+from main import get_app
+from utils import compression
+from utils.compression import (
+    CachedBody,
+    CompressionMiddleware,
+    compress,
+    negotiate_encoding,
+)
+from utils.settings import Settings, get_settings
+
+
+class TestNegotiateEncoding:
+    """Тесты для выбора кодирования по заголовку Accept-Encoding"""
+
+    def test_gzip(self):
+        """Тест выбора gzip и отказа от сжатия"""
+        assert negotiate_encoding("gzip, deflate") == "gzip"
+        assert negotiate_encoding("*") == "gzip"
+        assert negotiate_encoding("gzip;q=0, identity") is None
+        assert negotiate_encoding("deflate") is None
+        assert negotiate_encoding(None) is None
+
+    def test_optional_codecs_unavailable(self):
+        """Тест отката на gzip без brotli и zstandard"""
+        with (
+            patch.object(compression, "brotli", None),
+            patch.object(compression, "zstandard", None),
+        ):
+            assert negotiate_encoding("zstd, br, gzip;q=0.5") == "gzip"
+            with pytest.raises(ValueError):
+                compress(b"data", "br", 6)
+
+
+class TestCachedBody:
+    """Тесты для кэша сжатых тел ответа"""
+
+    def test_compressed_once(self):
+        """Тест, что одно и то же тело не сжимается дважды"""
+        cached = CachedBody(b"x" * 4096, "application/json")
+        with patch(
+            "utils.compression.compress", wraps=compression.compress
+        ) as compressor:
+            first = cached.compressed("gzip", 6)
+            second = cached.compressed("gzip", 6)
+
+        assert first is second
+        assert compressor.call_count == 1
+        assert gzip.decompress(first) == cached.body
+
+
+class TestCompressionMiddleware:
+    """Тесты для middleware сжатия ответов"""
+
+    @pytest.fixture
+    def large_schedule(self, mock_http_session):
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(
+            return_value=generate_schedule(days=30, slots_per_day=10)
+        )
+        settings = Settings(URL="http://test.com")
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=settings),
+        ):
+            yield
+
+    def test_schedule_compressed_once_per_version(self, client, large_schedule):
+        """Тест сжатия полного расписания один раз на версию"""
+        with patch(
+            "utils.compression.compress", wraps=compression.compress
+        ) as compressor:
+            first = client.get("/")
+            second = client.get("/")
+
+        assert first.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in first.headers["vary"]
+        assert first.content == second.content
+        assert len(first.json()["days"]) == 30
+        assert compressor.call_count == 1
+
+    def test_small_response_not_compressed(self, client, large_schedule):
+        """Тест порога минимального размера"""
+        response = client.post(
+            "/find_free_interval", headers={"Accept-Encoding": "gzip"}
+        )
+        assert "content-encoding" not in response.headers
+
+    def test_uncached_response_compressed_by_middleware(self, client):
+        """Тест сжатия обычных ответов middleware"""
+        response = client.get("/openapi", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["info"]["title"] == "timetable"
+
+    def test_identity(self, client, large_schedule):
+        """Тест ответа без сжатия, если клиент его не принимает"""
+        response = client.get("/", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+    def test_disabled(self, large_schedule):
+        """Тест отключения сжатия в настройках"""
+        settings = Settings(URL="http://test.com", COMPRESSION_ENABLED=False)
+        with patch("main.get_settings", return_value=settings):
+            app = get_app()
+        app.dependency_overrides[get_settings] = lambda: settings
+
+        response = TestClient(app).get("/", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_streaming_passthrough(self):
+        """Тест, что потоковые ответы не буферизуются"""
+        app = FastAPI()
+
+        @app.get("/stream")
+        async def stream():
+            async def chunks():
+                yield b"x" * 2048
+                yield b"y" * 2048
+
+            return StreamingResponse(chunks())
+
+        app.add_middleware(CompressionMiddleware, settings=Settings())
+        response = TestClient(app).get("/stream")
+
+        assert "content-encoding" not in response.headers
+        assert len(response.content) == 4096
@@ -0,0 +1,123 @@
+from datetime import date
+from unittest.mock import AsyncMock, patch
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.generator import generate_schedule
+from main import get_app
+from utils import ScheduleSnapshot, parse_schedule
+from utils.compute import ComputeExecutor, first_gap, pack_days
+from utils.settings import Settings, get_settings
+
+
+def make_snapshot(version: int = 1, **kwargs) -> ScheduleSnapshot:
+    payload = generate_schedule(days=30, slots_per_day=10, overlap=0.4, **kwargs)
+    payload["recurrences"] = [
+        {
+            "id": 1,
+            "kind": "busy",
+            "freq": "weekly",
+            "weekdays": [0, 3],
+            "start": "09:00",
+            "end": "09:45",
+            "starts_on": "2024-01-01",
+        }
+    ]
+    return ScheduleSnapshot(parse_schedule(payload), version=version)
+
+
+def inline_gap(snapshot: ScheduleSnapshot, duration: int) -> tuple[date, int] | None:
+    for view in snapshot.days():
+        for low, high in view.free_spans:
+            if high - low >= duration:
+                return view.day.date, low
+    return None
+
+
+class TestPackedDays:
+    """Тесты для упакованного представления дней"""
+
+    def test_parity_with_day_views(self):
+        """Тест совпадения поиска по упакованным дням с DayView"""
+        snapshot = make_snapshot(density=0.9)
+        table = pack_days(snapshot)
+
+        for duration in (0, 30, 60, 120, 600):
+            found = first_gap(table, duration)
+            expected = inline_gap(snapshot, duration)
+            if expected is None:
+                assert found is None
+            else:
+                assert (date.fromordinal(found[0]), found[1]) == expected
+
+
+class TestComputeExecutor:
+    """Тесты для выноса вычислений из event loop"""
+
+    def test_offloads(self):
+        """Тест порога стоимости"""
+        snapshot = make_snapshot()
+        assert ComputeExecutor("inline").offloads(snapshot) is False
+        assert ComputeExecutor("thread", threshold=snapshot.cost).offloads(snapshot)
+        assert not ComputeExecutor("thread", threshold=snapshot.cost + 1).offloads(
+            snapshot
+        )
+
+    @pytest.mark.parametrize("kind", ["thread", "process"])
+    async def test_first_gap(self, kind):
+        """Тест поиска в пуле потоков и процессов с обновлением версии"""
+        executor = ComputeExecutor(kind, workers=1)
+        try:
+            for version, density in ((1, 0.9), (2, 0.2)):
+                snapshot = make_snapshot(version, density=density)
+                for duration in (30, 120):
+                    found = await executor.first_gap(snapshot, duration)
+                    assert found == inline_gap(snapshot, duration)
+        finally:
+            executor.close()
+
+    async def test_block_released(self):
+        """Тест освобождения разделяемой памяти прошлой версии"""
+        executor = ComputeExecutor("process", workers=1)
+        try:
+            await executor.first_gap(make_snapshot(1), 30)
+            old = executor._block  # pylint: disable=protected-access
+            await executor.first_gap(make_snapshot(2), 30)
+        finally:
+            executor.close()
+
+        assert old is not None and old.retired and old.readers == 0
+        assert executor._block is None  # pylint: disable=protected-access
+
+
+class TestComputeEndpoint:
+    """Интеграционный тест find_free_interval с пулом"""
+
+    def test_find_free_interval_offloaded(self, mock_http_session):
+        """Тест совпадения ответа с вычислением в event loop"""
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(
+            return_value=generate_schedule(days=30, slots_per_day=10, density=0.5)
+        )
+        responses = []
+        for kind in ("inline", "thread"):
+            settings = Settings(
+                URL="http://test.com", COMPUTE_EXECUTOR=kind, COMPUTE_OFFLOAD_COST=0
+            )
+            with patch("main.get_settings", return_value=settings):
+                app = get_app()
+            app.dependency_overrides[get_settings] = lambda: settings
+            with (
+                patch(
+                    "utils.shedules.aiohttp.ClientSession", return_value=mock_session
+                ),
+                patch("utils.shedules.get_settings", return_value=settings),
+                TestClient(app) as client,
+            ):
+                assert app.state.compute.kind == kind
+                responses.append(
+                    client.post("/find_free_interval?interval_duration=45").json()
+                )
+
+        assert responses[0] == responses[1]
+        assert responses[0]["founded"] is True
@@ -0,0 +1,301 @@
+import json
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import get_app
+from utils.ingest import IngestError, IngestStream
+from utils.settings import Settings, get_settings
+from utils.storage import SQLiteStorage
+
+HEADERS = {"X-Ingest-Token": "secret", "Content-Type": "application/x-ndjson"}
+
+
+def ndjson(*records: dict) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+
+def day(day_id: int, day_date: str, start="09:00", end="18:00") -> dict:
+    return {"type": "day", "id": day_id, "date": day_date, "start": start, "end": end}
+
+
+def slot(slot_id: int, day_id: int, start: str, end: str) -> dict:
+    return {
+        "type": "timeslot",
+        "id": slot_id,
+        "day_id": day_id,
+        "start": start,
+        "end": end,
+    }
+
+
+SCHEDULE = ndjson(
+    day(1, "2024-01-15"),
+    slot(1, 1, "10:00", "11:00"),
+    slot(2, 1, "14:00", "15:00"),
+    day(2, "2024-01-16"),
+    {
+        "type": "recurrence",
+        "id": 4,
+        "kind": "working_hours",
+        "freq": "weekly",
+        "weekdays": [5],
+        "start": "10:00",
+        "end": "14:00",
+        "starts_on": "2024-01-01",
+    },
+)
+
+
+async def chunked(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+async def collect(stream: IngestStream) -> list:
+    return [record async for record in stream]
+
+
+@pytest.fixture
+async def storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "schedule.db"), pool_size=2, sync=False)
+    yield storage
+    await storage.close()
+
+
+@pytest.fixture
+def client(storage):
+    settings = Settings(URL="http://test.com", INGEST_TOKEN="secret")
+    app = get_app()
+    app.state.storage = storage
+    app.dependency_overrides[get_settings] = lambda: settings
+    return TestClient(app)
+
+
+class TestIngestStream:
+    """Тесты для потоковой проверки загружаемого расписания"""
+
+    async def test_records_across_chunks(self):
+        """Тест разбора строк, разрезанных между чанками"""
+        stream = IngestStream(chunked(SCHEDULE, 7), full=True)
+        records = await collect(stream)
+
+        assert [kind for _, kind, _ in records] == [
+            "day",
+            "timeslot",
+            "timeslot",
+            "day",
+            "recurrence",
+        ]
+        assert stream.counts["timeslot"] == 2
+        assert stream.dates == {date(2024, 1, 15), date(2024, 1, 16)}
+
+    @pytest.mark.parametrize(
+        "body, full, line, error",
+        [
+            (b'{"type": "day"\n', True, 1, "Invalid JSON"),
+            (ndjson(day(1, "2024-01-15"), {"type": "x"}), True, 2, "Unknown"),
+            (ndjson(day(1, "2024-01-15", start="9 am")), True, 1, "start"),
+            (ndjson(day(1, "2024-01-15"), day(2, "2024-01-15")), True, 2, "twice"),
+            (ndjson(day(1, "2024-01-15"), day(1, "2024-01-16")), True, 2, "twice"),
+            (ndjson(slot(1, 1, "10:00", "11:00")), True, 1, "not listed"),
+            (ndjson({"type": "delete", "date": "2024-01-15"}), True, 1, "patch"),
+            (ndjson({"type": "delete", "date": "15.01"}), False, 1, "YYYY-MM-DD"),
+        ],
+    )
+    async def test_rejected_records(self, body, full, line, error):
+        """Тест ошибок с номером строки"""
+        with pytest.raises(IngestError) as exc:
+            await collect(IngestStream(chunked(body, 5), full=full))
+
+        assert exc.value.line == line
+        assert error in exc.value.message
+
+    async def test_limits(self):
+        """Тест ограничений на длину строки и размер тела"""
+        with pytest.raises(IngestError, match="Line is over"):
+            await collect(IngestStream(chunked(SCHEDULE, 200), True, max_line=20))
+        # Длинная строка целиком внутри одного чанка
+        with pytest.raises(IngestError, match="Line is over") as exc:
+            await collect(IngestStream(chunked(SCHEDULE, 4096), True, max_line=100))
+        assert exc.value.line == 5
+        with pytest.raises(IngestError, match="Body is over"):
+            await collect(IngestStream(chunked(SCHEDULE, 50), True, max_bytes=100))
+
+
+class TestSQLiteIngest:
+    """Тесты для записи загружаемого расписания в SQLite"""
+
+    async def test_patch_keeps_other_days(self, storage):
+        """Тест замены одного дня без сброса остальных кэшированных дней"""
+        await storage.ingest(IngestStream(chunked(SCHEDULE, 64), full=True))
+        first = await storage.day(date(2024, 1, 15))
+        second = await storage.day(date(2024, 1, 16))
+
+        patch_body = ndjson(
+            day(2, "2024-01-16", start="10:00"),
+            slot(3, 2, "12:00", "13:00"),
+        )
+        version = await storage.ingest(IngestStream(chunked(patch_body, 64), False))
+
+        assert version == 2
+        assert await storage.day(date(2024, 1, 15)) is first
+        patched = await storage.day(date(2024, 1, 16))
+        assert patched is not second
+        assert [s.id for s in patched.slots] == [3]
+        assert len((await storage.snapshot()).schedule.timeslots) == 3
+
+    async def test_patched_versions_are_kept(self, storage):
+        """Тест версий, сохраненных после патча, для as_of"""
+        await storage.ingest(IngestStream(chunked(SCHEDULE, 64), full=True))
+        await storage.day(date(2024, 1, 15))
+        await storage.day(date(2024, 1, 16))
+        body = ndjson(day(2, "2024-01-16", start="10:00"))
+        await storage.ingest(IngestStream(chunked(body, 64), full=False))
+        await storage.day(date(2024, 1, 16))
+
+        old, new = storage.as_of(1), storage.as_of(2)
+        assert old.day(date(2024, 1, 16)).day.start.hour == 9
+        assert new.day(date(2024, 1, 16)).day.start.hour == 10
+        assert new.day(date(2024, 1, 15)) is old.day(date(2024, 1, 15))
+
+    async def test_delete_falls_back_to_rules(self, storage):
+        """Тест удаления дня из расписания патчем"""
+        await storage.ingest(IngestStream(chunked(SCHEDULE, 64), full=True))
+        body = ndjson({"type": "delete", "date": "2024-01-15"})
+        await storage.ingest(IngestStream(chunked(body, 64), full=False))
+
+        assert await storage.day(date(2024, 1, 15)) is None
+        # Суббота по-прежнему строится из правила
+        assert (await storage.day(date(2024, 1, 20))).day.start.hour == 10
+
+    async def test_failed_push_is_rolled_back(self, storage):
+        """Тест отката всей загрузки при ошибке в середине"""
+        await storage.ingest(IngestStream(chunked(SCHEDULE, 64), full=True))
+        body = ndjson(day(5, "2024-02-01"), day(6, "2024-02-02"), {"type": "x"})
+
+        with pytest.raises(IngestError):
+            await storage.ingest(IngestStream(chunked(body, 64), True), batch_size=1)
+
+        assert await storage.day(date(2024, 2, 1)) is None
+        assert len((await storage.day(date(2024, 1, 15))).slots) == 2
+
+    async def test_day_id_of_another_date(self, storage):
+        """Тест отказа при повторном id дня на другую дату"""
+        await storage.ingest(IngestStream(chunked(SCHEDULE, 64), full=True))
+        body = ndjson(day(3, "2024-01-18"), day(1, "2024-01-17"))
+
+        with pytest.raises(IngestError, match="already used") as exc:
+            await storage.ingest(IngestStream(chunked(body, 64), full=False))
+
+        assert exc.value.line == 2
+        assert await storage.day(date(2024, 1, 18)) is None
+
+    async def test_stream_does_not_hold_write_lock(self, storage, tmp_path):
+        """Тест записи другим процессом, пока загрузка еще читается"""
+        other = SQLiteStorage(str(tmp_path / "schedule.db"), pool_size=1, sync=False)
+
+        async def body():
+            yield ndjson(day(1, "2024-01-15"))
+            patch_body = ndjson(day(7, "2024-03-01"))
+            await other.ingest(IngestStream(chunked(patch_body, 64), full=False))
+            yield ndjson(slot(1, 1, "10:00", "11:00"))
+
+        try:
+            version = await storage.ingest(IngestStream(body(), full=True))
+        finally:
+            await other.close()
+
+        assert version == 2
+        assert await storage.day(date(2024, 3, 1)) is None
+        assert len((await storage.day(date(2024, 1, 15))).slots) == 1
+
+    async def test_other_worker_sees_patch(self, storage, tmp_path):
+        """Тест видимости патча для другого процесса с той же базой"""
+        await storage.ingest(IngestStream(chunked(SCHEDULE, 64), full=True))
+        other = SQLiteStorage(str(tmp_path / "schedule.db"), pool_size=1, sync=False)
+        try:
+            kept = await other.day(date(2024, 1, 15))
+            body = ndjson(day(2, "2024-01-16", start="11:00"))
+            await storage.ingest(IngestStream(chunked(body, 64), full=False))
+
+            assert await other.day(date(2024, 1, 15)) is kept
+            assert (await other.day(date(2024, 1, 16))).day.start.hour == 11
+        finally:
+            await other.close()
+
+
+class TestIngestEndpoint:
+    """Интеграционные тесты эндпоинтов загрузки"""
+
+    def test_push_and_patch(self, client):
+        """Тест полной загрузки и патча одного дня"""
+        pushed = client.put("/ingest/schedule", content=SCHEDULE, headers=HEADERS)
+        patched = client.patch(
+            "/ingest/schedule",
+            content=ndjson(
+                day(1, "2024-01-15"), {"type": "delete", "date": "2024-01-16"}
+            ),
+            headers=HEADERS,
+        )
+        taken = client.get("/2024-01-15/taken_slots")
+
+        assert pushed.status_code == 200
+        assert pushed.json() == {
+            "version": 1,
+            "days": 2,
+            "timeslots": 2,
+            "recurrences": 1,
+            "deleted": 0,
+        }
+        assert patched.json()["version"] == 2
+        assert patched.json()["deleted"] == 1
+        assert taken.json() == []
+
+    def test_invalid_line(self, client):
+        """Тест ответа 422 с номером строки"""
+        body = ndjson(day(1, "2024-01-15"), slot(1, 9, "10:00", "11:00"))
+        response = client.put("/ingest/schedule", content=body, headers=HEADERS)
+
+        assert response.status_code == 422
+        assert response.json()["detail"]["line"] == 2
+
+    def test_token(self, client):
+        """Тест проверки токена и выключенного API"""
+        response = client.put(
+            "/ingest/schedule", content=SCHEDULE, headers={"X-Ingest-Token": "wrong"}
+        )
+        assert response.status_code == 401
+
+        client.app.dependency_overrides[get_settings] = lambda: Settings(
+            URL="http://test.com"
+        )
+        response = client.put("/ingest/schedule", content=SCHEDULE, headers=HEADERS)
+        assert response.status_code == 404
+
+    def test_read_after_push_touches_one_day(self, client, storage):
+        """Тест чтения после полной загрузки только строк запрошенного дня"""
+        statements: list[str] = []
+        connect = storage.pool._connect  # pylint: disable=protected-access
+
+        def traced():
+            connection = connect()
+            connection.set_trace_callback(statements.append)
+            return connection
+
+        storage.pool._connect = traced  # pylint: disable=protected-access
+        client.put("/ingest/schedule", content=SCHEDULE, headers=HEADERS)
+        statements.clear()
+        taken = client.get("/2024-01-15/taken_slots")
+
+        assert len(taken.json()) == 2
+        reads = [s for s in statements if "FROM days" in s or "FROM timeslots" in s]
+        assert reads and all("WHERE" in s for s in reads)
+
+    def test_http_storage(self, client):
+        """Тест отказа при хранилище без локальной копии"""
+        client.app.state.storage = get_app().state.storage
+        response = client.put("/ingest/schedule", content=SCHEDULE, headers=HEADERS)
+
+        assert response.status_code == 409
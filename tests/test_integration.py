@@ -1,8 +1,11 @@
+from pathlib import Path
 from unittest.mock import Mock, patch, AsyncMock
 import pytest
 from fastapi.testclient import TestClient
+from fastapi_cli.discover import get_import_data
 
 from main import get_app
+from utils import Settings, get_settings
 
 
 class TestMainApp:
@@ -22,6 +25,15 @@ class TestMainApp:
         # Проверяем, что маршруты добавлены
         assert len(app.routes) > 0
 
+    def test_cli_finds_app(self):
+        """Тест поиска приложения так же, как это делает `fastapi dev`"""
+        import main  # pylint: disable=import-outside-toplevel
+
+        import_data = get_import_data(path=Path(main.__file__))
+        assert import_data.app_name == "app"
+        assert import_data.import_string == "main:app"
+        assert main.app.title == "timetable"
+
 
 class TestAPIEndpoints:
     """Интеграционные тесты для API эндпоинтов"""
@@ -71,6 +83,27 @@ class TestAPIEndpoints:
                 assert "timeslots" in data
                 assert len(data["timeslots"]) == 2
 
+    def test_overridden_settings_reach_upstream(self, client, mock_schedule_data):
+        """Тест запроса к адресу из подменённых настроек"""
+        mock_response = Mock()
+        mock_response.status = 200
+        mock_response.json = AsyncMock(return_value=mock_schedule_data)
+
+        mock_session = Mock()
+        mock_session.get = AsyncMock(return_value=mock_response)
+        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_session.__aexit__ = AsyncMock(return_value=None)
+
+        # Кэшированные настройки не должны перекрывать подмену
+        client.app.dependency_overrides[get_settings] = lambda: Settings(
+            URL="http://override.test"
+        )
+        with patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session):
+            response = client.get("/")
+
+        assert response.status_code == 200
+        mock_session.get.assert_awaited_once_with("http://override.test")
+
     def test_get_simple_schedule_external_error(self, client):
         """Тест обработки внешней ошибки при получении расписания"""
         mock_response = Mock()
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from main import get_app
+from utils.loop_monitor import LoopMonitor, LoopMonitorMiddleware
+from utils.profiling import stage
+from utils.settings import Settings, get_settings
+
+
+class TestLoopMonitor:
+    """Тесты для мониторинга задержки event loop"""
+
+    async def test_blocking_handler_attributed(self, caplog):
+        """Тест маршрута, этапа и стека блокирующего обработчика"""
+
+        async def blocking_app(scope, receive, send):
+            with stage("compute"):
+                time.sleep(0.3)
+
+        monitor = LoopMonitor(interval=0.01, threshold=0.1)
+        middleware = LoopMonitorMiddleware(blocking_app)
+        scope = {"type": "http", "method": "GET", "path": "/2024-01-15/free"}
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            with caplog.at_level(logging.WARNING, logger="utils.loop_monitor"):
+                await asyncio.create_task(middleware(scope, None, None))
+                await asyncio.sleep(0.05)
+        finally:
+            await monitor.close()
+
+        block = monitor.blocks[-1]
+        assert block["blocked_ms"] >= 200
+        assert block["route"] == "GET /2024-01-15/free"
+        assert block["stages"] == ["compute"]
+        assert any("time.sleep" in frame for frame in block["stack"])
+        assert "GET /2024-01-15/free" in caplog.text
+        assert monitor.lag_percentiles()["max"] >= 200
+
+    def test_percentiles(self):
+        """Тест перцентилей задержки в миллисекундах"""
+        monitor = LoopMonitor()
+        assert monitor.lag_percentiles()["p99"] == 0.0
+
+        monitor.lags.extend(i / 1000 for i in range(1, 101))
+        lags = monitor.lag_percentiles()
+
+        assert 50 <= lags["p50"] <= 51
+        assert 99 <= lags["p99"] <= 100
+        assert lags["max"] == 100
+
+
+class TestLoopMonitorEndpoint:
+    """Интеграционные тесты эндпоинта задержки event loop"""
+
+    def test_report(self):
+        """Тест отчета через админский API"""
+        settings = Settings(ADMIN_TOKEN="secret", LOOP_MONITOR_ENABLED=True)
+        with patch("main.get_settings", return_value=settings):
+            app = get_app()
+        app.dependency_overrides[get_settings] = lambda: settings
+
+        with TestClient(app) as client:
+            response = client.get("/admin/loop", headers={"X-Admin-Token": "secret"})
+
+        assert response.status_code == 200
+        assert set(response.json()["lag_ms"]) == {"p50", "p90", "p99", "max"}
+
+    def test_disabled(self):
+        """Тест 404 при выключенном мониторинге"""
+        app = get_app()
+        app.dependency_overrides[get_settings] = lambda: Settings(ADMIN_TOKEN="secret")
+        client = TestClient(app)
+
+        response = client.get("/admin/loop", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 404
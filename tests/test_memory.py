@@ -0,0 +1,140 @@
+import sys
+import threading
+import tracemalloc
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from conftest import MemoryStorage
+from main import get_app
+from utils import parse_schedule
+from utils.memory import MemoryMonitor, deep_size, peaks, track_peak
+from utils.settings import Settings, get_settings
+from utils.snapshot import ScheduleSnapshot
+from utils.storage import SQLiteStorage
+
+
+class TestDeepSize:
+    """Тесты для оценки размера объектов"""
+
+    def test_nested_and_shared(self):
+        """Тест учета вложенных объектов и общих объектов один раз"""
+        shared = "x" * 1000
+        value = {"a": [shared, shared], "b": (shared,)}
+
+        size = deep_size(value)
+        assert size >= sys.getsizeof(shared) + sys.getsizeof(value)
+        assert size < 2 * sys.getsizeof(shared)
+
+        seen: set[int] = set()
+        deep_size(shared, seen)
+        assert deep_size(value, seen) == size - sys.getsizeof(shared)
+
+    def test_pydantic_model(self, mock_schedule_data):
+        """Тест обхода полей pydantic-моделей"""
+        schedule = parse_schedule(mock_schedule_data)
+        assert deep_size(schedule) > deep_size(schedule.timeslots)
+
+
+class TestMemoryMonitor:
+    """Тесты для отчета о памяти"""
+
+    def test_footprint_parts(self, mock_schedule_data):
+        """Тест разбиения на расписание, производные данные и ответы"""
+        snapshot = ScheduleSnapshot(parse_schedule(mock_schedule_data), 7)
+        monitor = MemoryMonitor(
+            MemoryStorage(snapshot=snapshot), {"extra": lambda seen: 100}
+        )
+
+        before = monitor.report()
+        view = snapshot.day(date(2024, 1, 15))
+        _ = view.free, view.bitmap
+        view.responses["free"] = b"x" * 5000
+        after = monitor.report()
+
+        assert after["version"] == 7
+        assert after["bytes"]["schedule"] == before["bytes"]["schedule"]
+        assert after["bytes"]["derived"] > before["bytes"]["derived"]
+        assert after["bytes"]["responses"] >= 5000
+        assert after["bytes"]["extra"] == 100
+        assert after["total"] == sum(after["bytes"].values())
+        assert after["tracemalloc"] is None
+
+    async def test_sqlite_cached_days(self, tmp_path, mock_schedule_data):
+        """Тест учета дней, прочитанных из SQLite по одному"""
+        storage = SQLiteStorage(str(tmp_path / "schedule.db"), sync=False)
+        monitor = MemoryMonitor(storage)
+        try:
+            await storage.replace(parse_schedule(mock_schedule_data))
+            await storage.day(date(2024, 1, 16))
+            before = monitor.report()
+            view = await storage.day(date(2024, 1, 15))
+            _ = view.free
+            after = monitor.report()
+        finally:
+            await storage.close()
+
+        assert view in storage.held()[1]
+        assert after["version"] is None
+        assert after["bytes"]["derived"] > before["bytes"]["derived"]
+
+    async def test_collect_off_the_loop(self):
+        """Тест обхода в отдельном потоке с повтором при изменении кэша"""
+        threads, calls = [], []
+
+        def sizer(seen):
+            threads.append(threading.get_ident())
+            calls.append(True)
+            if len(calls) == 1:
+                raise RuntimeError("dictionary changed size during iteration")
+            return 10
+
+        monitor = MemoryMonitor(MemoryStorage(), {"extra": sizer})
+        report = await monitor.collect()
+
+        assert report["bytes"]["extra"] == 10
+        assert len(calls) == 2
+        assert threading.get_ident() not in threads
+
+    async def test_tracing(self, mock_schedule_data):
+        """Тест пика разбора и мест выделения при включенном tracemalloc"""
+        monitor = MemoryMonitor(MemoryStorage(), trace=True)
+        monitor.start()
+        try:
+            with track_peak("parse"):
+                parse_schedule(mock_schedule_data)
+            report = monitor.report(top=3)
+        finally:
+            await monitor.close()
+
+        assert not tracemalloc.is_tracing()
+        assert report["tracemalloc"]["peaks"]["parse"] > 0
+        assert len(report["tracemalloc"]["top"]) == 3
+        peaks.clear()
+
+
+class TestMemoryEndpoint:
+    """Интеграционные тесты эндпоинта памяти"""
+
+    def test_report(self, mock_http_session, mock_schedule_data):
+        """Тест отчета о текущей версии через админский API"""
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(return_value=mock_schedule_data)
+        settings = Settings(URL="http://test.com", ADMIN_TOKEN="secret")
+        app = get_app()
+        app.dependency_overrides[get_settings] = lambda: settings
+        client = TestClient(app)
+
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=settings),
+        ):
+            assert client.get("/2024-01-15/free_intervals").status_code == 200
+            response = client.get("/admin/memory", headers={"X-Admin-Token": "secret"})
+
+        body = response.json()
+        assert response.status_code == 200
+        assert body["bytes"]["schedule"] > 0
+        assert body["bytes"]["responses"] > 0
+        assert body["tracemalloc"] is None
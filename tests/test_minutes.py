@@ -0,0 +1,133 @@
+from datetime import date, time, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+from zoneinfo import ZoneInfo
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from main import get_app
+from schemas import DaySchema, IntervalSchema, TimeSlotSchema, validate_overnight
+from utils import find_free_intervals, interval_has_intersections
+from utils.minutes import day_span, localize, span_in_day, to_time
+from utils.settings import Settings, get_settings
+from utils.snapshot import DayView
+
+NIGHT = validate_overnight(
+    DaySchema, id=1, date=date(2024, 1, 15), start=time(22, 0), end=time(6, 0)
+)
+
+
+def slot(slot_id: int, start: time, end: time) -> TimeSlotSchema:
+    return validate_overnight(
+        TimeSlotSchema, id=slot_id, day_id=NIGHT.id, start=start, end=end
+    )
+
+
+class TestMinuteFrame:
+    """Тесты для перевода времени в минуты дня"""
+
+    def test_day_span(self):
+        """Тест границ обычного и ночного дня"""
+        day = DaySchema(id=2, date=date(2024, 1, 15), start=time(9, 0), end=time(18, 0))
+        assert day_span(day) == (540, 1080)
+        assert day_span(NIGHT) == (1320, 1800)
+
+    def test_span_in_overnight_day(self):
+        """Тест размещения времени после полуночи на следующих сутках"""
+        bounds = day_span(NIGHT)
+        assert span_in_day(bounds, time(23, 0), time(1, 0)) == (1380, 1500)
+        assert span_in_day(bounds, time(2, 0), time(3, 0)) == (1560, 1620)
+        assert to_time(1500) == time(1, 0)
+
+    def test_localize(self):
+        """Тест перевода времени со смещением в часовой пояс расписания"""
+        aware = time(10, 0, tzinfo=timezone(timedelta(hours=3)))
+        assert localize(aware, NIGHT.date, ZoneInfo("UTC")) == time(7, 0)
+        assert localize(time(10, 0), NIGHT.date, ZoneInfo("UTC")) == time(10, 0)
+
+
+class TestOvernightDay:
+    """Тесты для дня, который переходит через полночь"""
+
+    def test_free_intervals(self):
+        """Тест свободных интервалов со слотом через полночь"""
+        slots = [slot(1, time(23, 30), time(0, 30)), slot(2, time(3, 0), time(4, 0))]
+        free = find_free_intervals(NIGHT, slots)
+
+        assert [(i.start, i.end) for i in free] == [
+            (time(22, 0), time(23, 30)),
+            (time(0, 30), time(3, 0)),
+            (time(4, 0), time(6, 0)),
+        ]
+
+    def test_intersections(self):
+        """Тест пересечений после полуночи"""
+        slots = [slot(1, time(0, 0), time(1, 0))]
+        target = validate_overnight(IntervalSchema, start=time(23, 30), end=time(0, 30))
+
+        assert interval_has_intersections(target, slots, NIGHT).is_free is False
+        early = IntervalSchema(start=time(22, 0), end=time(23, 0))
+        assert interval_has_intersections(early, slots, NIGHT).is_free is True
+
+    def test_bitmap(self):
+        """Тест битовой карты ночного дня"""
+        view = DayView(NIGHT, [slot(1, time(23, 30), time(0, 30))])
+
+        assert view.bitmap.find_gap(120, *view.bounds) == 30 + 1440
+        assert view.bitmap.is_free(*view.span(time(0, 0), time(1, 0))) is False
+        assert view.bitmap.is_free(*view.span(time(1, 0), time(2, 0))) is True
+
+
+class TestTimezoneSetting:
+    """Тесты для настройки часового пояса"""
+
+    def test_invalid_zone(self):
+        """Тест ошибки на неизвестный часовой пояс"""
+        with pytest.raises(ValidationError):
+            Settings(URL="http://test.com", TIMEZONE="Mars/Olympus")
+
+    def test_endpoints(self, mock_http_session):
+        """Тест эндпоинтов с ночным днем и временем со смещением"""
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(
+            return_value={
+                "days": [
+                    {"id": 1, "date": "2024-01-15", "start": "22:00", "end": "06:00"}
+                ],
+                "timeslots": [{"id": 1, "day_id": 1, "start": "22:00", "end": "01:00"}],
+            }
+        )
+        settings = Settings(URL="http://test.com", TIMEZONE="Europe/Moscow")
+        app = get_app()
+        app.dependency_overrides[get_settings] = lambda: settings
+        client = TestClient(app)
+
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=settings),
+        ):
+            found = client.post("/find_free_interval?interval_duration=120")
+            # 20:30 UTC - это 23:30 по Москве
+            taken = client.post(
+                "/2024-01-15/is_free", json={"start": "20:30+00:00", "end": "21:00Z"}
+            )
+            free = client.post(
+                "/2024-01-15/is_free", json={"start": "02:00", "end": "03:00"}
+            )
+
+        assert found.json()["start"] == "01:00:00"
+        assert found.json()["end"] == "03:00:00"
+        assert taken.json()["is_free"] is False
+        assert free.json()["is_free"] is True
+
+    def test_reversed_request_interval(self, client):
+        """Тест отказа для интервала запроса с окончанием раньше начала"""
+        response = client.post(
+            "/2024-01-15/is_free", json={"start": "11:00", "end": "10:00"}
+        )
+        assert response.status_code == 422
+
+    def test_zero_duration(self, client):
+        """Тест отказа для поиска интервала нулевой длительности"""
+        response = client.post("/find_free_interval?interval_duration=0")
+        assert response.status_code == 422
@@ -0,0 +1,96 @@
+import random
+from unittest.mock import AsyncMock, patch
+
+from utils.nearest import GapIndex
+
+
+def random_spans(rng: random.Random) -> list[tuple[int, int]]:
+    spans, cursor = [], rng.randrange(0, 120)
+    for _ in range(rng.randrange(0, 12)):
+        low = cursor + rng.randrange(1, 60)
+        cursor = low + rng.randrange(1, 180)
+        spans.append((low, cursor))
+    return spans
+
+
+def linear_after(spans, position: int, duration: int) -> int | None:
+    starts = [max(low, position) for low, high in spans]
+    fitting = [s for s, (_, high) in zip(starts, spans) if s + duration <= high]
+    return min(fitting, default=None)
+
+
+def linear_before(spans, position: int, duration: int) -> int | None:
+    fitting = [
+        min(position, high - duration)
+        for low, high in spans
+        if high - low >= duration and low <= position
+    ]
+    return max(fitting, default=None)
+
+
+class TestGapIndex:
+    """Тесты для поиска ближайшего свободного промежутка"""
+
+    def test_parity_with_linear_walk(self):
+        """Тест совпадения с линейным перебором промежутков"""
+        rng = random.Random(11)
+        for _ in range(300):
+            spans = random_spans(rng)
+            index = GapIndex(spans)
+            for _ in range(10):
+                position = rng.randrange(0, 1500)
+                duration = rng.randrange(1, 200)
+                assert index.after(position, duration) == linear_after(
+                    spans, position, duration
+                )
+                assert index.before(position, duration) == linear_before(
+                    spans, position, duration
+                )
+
+    def test_empty(self):
+        """Тест дня без свободного времени"""
+        index = GapIndex([])
+        assert index.after(600, 30) is None
+        assert index.before(600, 30) is None
+
+
+class TestNearestEndpoint:
+    """Интеграционные тесты эндпоинта /{date}/nearest"""
+
+    def test_nearest(
+        self, client, mock_http_session, mock_schedule_data, mock_settings
+    ):
+        """Тест ближайших интервалов до и после желаемого времени"""
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(return_value=mock_schedule_data)
+
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=mock_settings),
+        ):
+            same_day = client.get(
+                "/2024-01-15/nearest", params={"start": "10:30", "duration": 60}
+            )
+            widened = client.get(
+                "/2024-01-15/nearest",
+                params={"start": "17:30", "duration": 240, "days": 1},
+            )
+
+        assert same_day.json() == {
+            "before": {
+                "date": "2024-01-15",
+                "start": "09:00:00",
+                "end": "10:00:00",
+                "distance": 90,
+            },
+            "after": {
+                "date": "2024-01-15",
+                "start": "11:00:00",
+                "end": "12:00:00",
+                "distance": 30,
+            },
+        }
+        assert widened.json()["before"] is None
+        assert widened.json()["after"]["date"] == "2024-01-16"
+        assert widened.json()["after"]["start"] == "09:00:00"
+        assert widened.json()["after"]["distance"] == 15 * 60 + 30
@@ -0,0 +1,90 @@
+from unittest.mock import AsyncMock, patch
+import pytest
+from fastapi.testclient import TestClient
+
+from main import get_app
+from utils.profiling import StageTimings, stage, _timings
+from utils.settings import Settings
+
+
+class TestStageTimings:
+    """Тесты для сбора длительностей этапов"""
+
+    def test_stage_without_active_profiling(self):
+        """Тест, что stage() ничего не делает без активного профилирования"""
+        with stage("compute"):
+            pass
+        assert _timings.get() is None
+
+    def test_stage_records_duration(self):
+        """Тест записи длительности этапа"""
+        timings = StageTimings()
+        token = _timings.set(timings)
+        try:
+            with stage("compute"):
+                pass
+            with stage("compute"):
+                pass
+        finally:
+            _timings.reset(token)
+        assert list(timings.stages) == ["compute"]
+        assert timings.stages["compute"] >= 0
+
+    def test_server_timing_format(self):
+        """Тест формата заголовка Server-Timing"""
+        timings = StageTimings()
+        timings.add("fetch", 1.5)
+        timings.add("parse", 0.25)
+        assert timings.server_timing() == "fetch;dur=1.500, parse;dur=0.250"
+
+
+class TestProfilingMiddleware:
+    """Тесты для middleware профилирования"""
+
+    @pytest.fixture
+    def profiled_client(self, tmp_path, mock_http_session, mock_schedule_data):
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(return_value=mock_schedule_data)
+        settings = Settings(
+            URL="http://test.com",
+            PROFILING_ENABLED=True,
+            PROFILING_SAMPLE_RATE=1.0,
+            PROFILING_DIR=str(tmp_path),
+        )
+        with patch("main.get_settings", return_value=settings):
+            app = get_app()
+        with patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session):
+            with patch("utils.shedules.get_settings", return_value=settings):
+                yield TestClient(app)
+
+    def test_server_timing_header(self, profiled_client):
+        """Тест наличия этапов в заголовке Server-Timing"""
+        response = profiled_client.get(
+            "/2024-01-15/free_intervals", headers={"X-Profile": "1"}
+        )
+
+        assert response.status_code == 200
+        header = response.headers["Server-Timing"]
+        for name in ("fetch", "parse", "filter", "compute", "serialize", "total"):
+            assert f"{name};dur=" in header
+
+    def test_no_header_without_request_flag(self, profiled_client, tmp_path):
+        """Тест, что без заголовка запроса профилирование не включается"""
+        response = profiled_client.get("/2024-01-15/free_intervals")
+
+        assert response.status_code == 200
+        assert "Server-Timing" not in response.headers
+        assert not list(tmp_path.iterdir())
+
+    def test_cprofile_dump(self, profiled_client, tmp_path):
+        """Тест сохранения профиля cProfile"""
+        profiled_client.get("/2024-01-15/taken_slots", headers={"X-Profile": "1"})
+
+        dumps = list(tmp_path.glob("*.prof"))
+        assert len(dumps) == 1
+        assert "GET-2024-01-15_taken_slots" in dumps[0].name
+
+    def test_disabled_by_default(self, client):
+        """Тест, что middleware не подключается без флага в настройках"""
+        response = client.get("/invalid-date/taken_slots", headers={"X-Profile": "1"})
+        assert "Server-Timing" not in response.headers
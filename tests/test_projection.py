@@ -0,0 +1,153 @@
+from datetime import date
+from unittest.mock import AsyncMock, patch
+import pytest
+
+from benchmarks.generator import generate_schedule
+from utils import ScheduleSnapshot, parse_schedule
+from utils.projection import (
+    decode_cursor,
+    encode_cursor,
+    parse_fields,
+    schedule_page,
+)
+from utils.wire import COLUMNAR, decode_columnar
+
+
+@pytest.fixture
+def snapshot():
+    return ScheduleSnapshot(
+        parse_schedule(generate_schedule(days=10, slots_per_day=5, seed=3)),
+        version=1,
+    )
+
+
+class TestParseFields:
+    """Тесты для разбора параметра fields"""
+
+    def test_sections_and_fields(self):
+        """Тест разделов целиком и отдельных полей"""
+        assert parse_fields("days, timeslots.start,timeslots.end") == {
+            "days": True,
+            "timeslots": {"__all__": {"start", "end"}},
+        }
+        assert parse_fields("days.id,days") == {"days": True}
+
+    def test_unknown_field(self):
+        """Тест ошибки на неизвестное поле"""
+        with pytest.raises(ValueError):
+            parse_fields("timeslots.color")
+        with pytest.raises(ValueError):
+            parse_fields(",")
+
+
+class TestSchedulePage:
+    """Тесты для выборки расписания по окну дат и страницам"""
+
+    def test_date_window(self, snapshot):
+        """Тест фильтра по диапазону дат"""
+        dates = sorted(snapshot.schedule.days)
+        page, next_key = schedule_page(snapshot, dates[2], dates[4])
+
+        assert list(page.days) == dates[2:5]
+        day_ids = {day.id for day in page.days.values()}
+        assert {slot.day_id for slot in page.timeslots} == day_ids
+        assert len(page.timeslots) == 15
+        assert next_key is None
+
+    def test_pages_cover_all_slots_once(self, snapshot):
+        """Тест обхода всех слотов страницами без пропусков и повторов"""
+        seen, days, after = [], [], None
+        while True:
+            page, after = schedule_page(snapshot, after=after, limit=7)
+            assert len(page.timeslots) <= 7
+            seen += [slot.id for slot in page.timeslots]
+            days += list(page.days)
+            if after is None:
+                break
+            after = decode_cursor(encode_cursor(after))
+
+        assert sorted(seen) == sorted(slot.id for slot in snapshot.schedule.timeslots)
+        assert len(seen) == len(set(seen))
+        assert sorted(set(days)) == sorted(snapshot.schedule.days)
+
+    def test_cursor_survives_update(self, snapshot):
+        """Тест продолжения по курсору после обновления расписания"""
+        page, after = schedule_page(snapshot, limit=5)
+        removed = page.timeslots[-1]
+        updated = ScheduleSnapshot(
+            snapshot.schedule.model_copy(
+                update={
+                    "timeslots": [
+                        slot
+                        for slot in snapshot.schedule.timeslots
+                        if slot.id != removed.id
+                    ]
+                }
+            ),
+            version=2,
+        )
+
+        rest, _ = schedule_page(updated, after=after)
+        assert len(rest.timeslots) == len(snapshot.schedule.timeslots) - 5
+
+    def test_invalid_cursor(self):
+        """Тест ошибки на поврежденный курсор"""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+class TestScheduleEndpointParams:
+    """Интеграционные тесты параметров GET /"""
+
+    @pytest.fixture
+    def schedule_client(self, client, mock_http_session, mock_settings):
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(
+            return_value=generate_schedule(days=10, slots_per_day=5, seed=3)
+        )
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=mock_settings),
+        ):
+            yield client
+
+    def test_projection(self, schedule_client):
+        """Тест выбора полей"""
+        response = schedule_client.get("/", params={"fields": "timeslots.start"})
+
+        assert set(response.json()) == {"timeslots"}
+        assert set(response.json()["timeslots"][0]) == {"start"}
+
+    def test_pagination(self, schedule_client):
+        """Тест постраничной выдачи слотов"""
+        first = schedule_client.get("/", params={"limit": 30})
+        second = schedule_client.get(
+            "/", params={"limit": 30, "cursor": first.headers["x-next-cursor"]}
+        )
+
+        assert len(first.json()["timeslots"]) == 30
+        assert len(second.json()["timeslots"]) == 20
+        assert "x-next-cursor" not in second.headers
+
+    def test_columnar_projection(self, schedule_client):
+        """Тест выбора полей в колоночном формате"""
+        response = schedule_client.get(
+            "/",
+            params={"date_from": "2024-01-01", "fields": "days.date,timeslots"},
+            headers={"Accept": COLUMNAR},
+        )
+        tables = decode_columnar(response.content)
+
+        assert list(tables) == ["days", "timeslots"]
+        assert list(tables["days"]) == ["date"]
+        assert date.fromordinal(tables["days"]["date"][0]) >= date(2024, 1, 1)
+
+    def test_invalid_params(self, schedule_client):
+        """Тест ошибок валидации параметров"""
+        assert schedule_client.get("/", params={"fields": "x"}).status_code == 422
+        assert schedule_client.get("/", params={"cursor": "x"}).status_code == 422
+        assert schedule_client.get("/", params={"limit": 0}).status_code == 422
+        response = schedule_client.get(
+            "/", params={"date_from": "2024-02-01", "date_to": "2024-01-01"}
+        )
+        assert response.status_code == 422
@@ -1,15 +1,17 @@
 # type: ignore
-from datetime import date, time
+from datetime import date, time, timedelta
 import pytest
 from pydantic import ValidationError
 
 from schemas.day import DaySchema
+from schemas.overnight import OVERNIGHT, validate_overnight
 from schemas.timeslot import TimeSlotSchema
 from schemas.interval import (
     IntervalSchema,
     IsFreeIntervalSchema,
     FreeIntervalInScheduleSchema,
 )
+from schemas.recurrence import RecurrenceSchema
 from schemas.schedule import ScheduleSchema
 
 
@@ -59,6 +61,15 @@ class TestDaySchema:
             DaySchema(id=1, date="2024-01-15", start="18:00", end="09:00")
         assert "End time must be after start time" in str(exc_info.value)
 
+    def test_day_schema_overnight(self):
+        """Тест дня, который переходит через полночь"""
+        day = DaySchema.model_validate(
+            {"id": 1, "date": "2024-01-15", "start": "22:00", "end": "06:00"},
+            context=OVERNIGHT,
+        )
+        assert day.start == time(22, 0)
+        assert day.end == time(6, 0)
+
     def test_day_schema_equal_times(self):
         """Тест с равными временами начала и окончания"""
         with pytest.raises(ValidationError) as exc_info:
@@ -100,6 +111,19 @@ class TestTimeSlotSchema:
             TimeSlotSchema(id=1, day_id=1, start="11:00", end="10:00")
         assert "End time must be after start time" in str(exc_info.value)
 
+    def test_timeslot_schema_overnight(self):
+        """Тест слота, который переходит через полночь"""
+        slot = validate_overnight(
+            TimeSlotSchema, id=1, day_id=1, start="23:30", end="00:30"
+        )
+        assert slot.end == time(0, 30)
+
+    def test_timeslot_schema_equal_times(self):
+        """Тест с равными временами начала и окончания"""
+        with pytest.raises(ValidationError) as exc_info:
+            TimeSlotSchema(id=1, day_id=1, start="10:00", end="10:00")
+        assert "End time must be after start time" in str(exc_info.value)
+
 
 class TestIntervalSchema:
     """Тесты для IntervalSchema"""
@@ -145,6 +169,16 @@ class TestIntervalSchema:
             IntervalSchema(start=time(11, 0), end=time(10, 0))
         assert "End time must be after start time" in str(exc_info.value)
 
+    def test_interval_schema_overnight(self):
+        """Тест интервала через полночь, построенного сервисом"""
+        interval = validate_overnight(IntervalSchema, start=time(23, 0), end=time(1, 0))
+        assert interval.duration() == 120
+
+    def test_interval_schema_with_offset(self):
+        """Тест разбора времени со смещением часового пояса"""
+        interval = IntervalSchema(start="10:00+03:00", end="11:00+03:00")
+        assert interval.start.utcoffset().total_seconds() == 3 * 3600
+
 
 class TestIsFreeIntervalSchema:
     """Тесты для IsFreeIntervalSchema"""
@@ -204,3 +238,73 @@ class TestScheduleSchema:
         schedule = ScheduleSchema(days={}, timeslots=[])
         assert len(schedule.days) == 0
         assert len(schedule.timeslots) == 0
+
+
+class TestRecurrenceSchema:
+    """Тесты для RecurrenceSchema"""
+
+    def test_daily_rule_with_interval(self):
+        """Тест ежедневного правила с шагом в два дня"""
+        rule = RecurrenceSchema(
+            id=1,
+            freq="daily",
+            interval=2,
+            start="10:00",
+            end="11:00",
+            starts_on="2024-01-15",
+            until="2024-01-20",
+        )
+        assert rule.occurs_on(date(2024, 1, 15)) is True
+        assert rule.occurs_on(date(2024, 1, 16)) is False
+        assert rule.occurs_on(date(2024, 1, 17)) is True
+        assert rule.occurs_on(date(2024, 1, 21)) is False
+        assert rule.occurs_on(date(2024, 1, 13)) is False
+
+    def test_weekly_rule(self):
+        """Тест еженедельного правила по дням недели"""
+        rule = RecurrenceSchema(
+            id=1,
+            freq="weekly",
+            weekdays=[0, 2],
+            start="10:00",
+            end="11:00",
+            starts_on="2024-01-15",
+        )
+        dates = [date(2024, 1, 14) + timedelta(days=n) for n in range(11)]
+        assert [d for d in dates if rule.occurs_on(d)] == [
+            date(2024, 1, 15),
+            date(2024, 1, 17),
+            date(2024, 1, 22),
+            date(2024, 1, 24),
+        ]
+
+    def test_biweekly_rule_defaults_to_start_weekday(self):
+        """Тест правила раз в две недели без явных дней недели"""
+        rule = RecurrenceSchema(
+            id=1,
+            freq="weekly",
+            interval=2,
+            start="10:00",
+            end="11:00",
+            starts_on="2024-01-17",
+        )
+        dates = [date(2024, 1, 1) + timedelta(days=n) for n in range(60)]
+        assert [d for d in dates if rule.occurs_on(d)] == [
+            date(2024, 1, 17),
+            date(2024, 1, 31),
+            date(2024, 2, 14),
+            date(2024, 2, 28),
+        ]
+
+    def test_invalid_weekday(self):
+        """Тест с невалидным днем недели"""
+        with pytest.raises(ValidationError) as exc_info:
+            RecurrenceSchema(
+                id=1,
+                freq="weekly",
+                weekdays=[7],
+                start="10:00",
+                end="11:00",
+                starts_on="2024-01-15",
+            )
+        assert "Weekdays must be in range 0-6" in str(exc_info.value)
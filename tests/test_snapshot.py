@@ -0,0 +1,250 @@
+from datetime import date, time, timedelta
+from unittest.mock import AsyncMock, patch
+
+from schemas import DaySchema, RecurrenceSchema, ScheduleSchema, TimeSlotSchema
+from utils.memory import deep_size
+from utils.snapshot import ScheduleSnapshot, VersionHistory, publish_schedule
+
+
+def make_schedule(slot_end: time = time(11, 0)) -> ScheduleSchema:
+    day = DaySchema(id=1, date=date(2024, 1, 15), start=time(9, 0), end=time(18, 0))
+    return ScheduleSchema(
+        days={day.date: day},
+        timeslots=[
+            TimeSlotSchema(id=1, day_id=1, start=time(10, 0), end=slot_end),
+            TimeSlotSchema(id=2, day_id=1, start=time(10, 30), end=time(12, 0)),
+        ],
+    )
+
+
+class TestScheduleSnapshot:
+    """Тесты для снимка расписания"""
+
+    def test_day_view(self):
+        """Тест представления дня с объединенными занятыми интервалами"""
+        snapshot = ScheduleSnapshot(make_schedule(), version=1)
+
+        view = snapshot.day(date(2024, 1, 15))
+
+        assert [slot.id for slot in view.slots] == [1, 2]
+        assert [(i.start, i.end) for i in view.busy] == [(time(10, 0), time(12, 0))]
+        assert [(i.start, i.end) for i in view.free] == [
+            (time(9, 0), time(10, 0)),
+            (time(12, 0), time(18, 0)),
+        ]
+
+    def test_day_view_is_cached(self):
+        """Тест, что представление дня строится один раз на версию"""
+        snapshot = ScheduleSnapshot(make_schedule(), version=1)
+
+        view = snapshot.day(date(2024, 1, 15))
+
+        assert snapshot.day(date(2024, 1, 15)) is view
+        assert view.free is view.free
+
+    def test_missing_day(self):
+        """Тест запроса отсутствующего дня"""
+        snapshot = ScheduleSnapshot(make_schedule(), version=1)
+        assert snapshot.day(date(2024, 1, 16)) is None
+
+    def test_publish_reuses_unchanged_schedule(self):
+        """Тест повторного использования снимка для неизмененного расписания"""
+        first = publish_schedule(make_schedule())
+        second = publish_schedule(make_schedule())
+
+        assert second is first
+
+    def test_publish_swaps_changed_schedule(self):
+        """Тест смены версии при изменении расписания"""
+        first = publish_schedule(make_schedule())
+        second = publish_schedule(make_schedule(slot_end=time(13, 0)))
+
+        assert second is not first
+        assert second.version > first.version
+
+
+class TestRecurrenceExpansion:
+    """Тесты для ленивого разворачивания повторяющихся слотов"""
+
+    def make_schedule(self) -> ScheduleSchema:
+        schedule = make_schedule()
+        schedule.recurrences = [
+            RecurrenceSchema(
+                id=7,
+                freq="weekly",
+                weekdays=[0, 1, 2, 3, 4],
+                start=time(9, 0),
+                end=time(18, 0),
+                starts_on=date(2024, 1, 1),
+                kind="working_hours",
+            ),
+            RecurrenceSchema(
+                id=3,
+                freq="daily",
+                start=time(13, 0),
+                end=time(14, 0),
+                starts_on=date(2024, 1, 1),
+            ),
+        ]
+        return schedule
+
+    def test_busy_rule_expanded_on_explicit_day(self):
+        """Тест добавления повторяющегося слота к явно заданному дню"""
+        snapshot = ScheduleSnapshot(self.make_schedule(), version=1)
+
+        view = snapshot.day(date(2024, 1, 15))
+
+        assert [slot.id for slot in view.slots] == [1, 2, -3]
+        assert view.slots[-1].day_id == 1
+        assert [(i.start, i.end) for i in view.busy] == [
+            (time(10, 0), time(12, 0)),
+            (time(13, 0), time(14, 0)),
+        ]
+
+    def test_working_hours_template_day(self):
+        """Тест дня, построенного по шаблону рабочих часов"""
+        snapshot = ScheduleSnapshot(self.make_schedule(), version=1)
+
+        view = snapshot.day(date(2025, 3, 3))
+
+        assert view.day.start == time(9, 0)
+        assert view.day.id < 0
+        assert [(i.start, i.end) for i in view.free] == [
+            (time(9, 0), time(13, 0)),
+            (time(14, 0), time(18, 0)),
+        ]
+        assert snapshot.day(date(2025, 3, 2)) is None  # воскресенье
+
+    def test_only_requested_days_are_materialized(self):
+        """Тест, что разворачиваются только запрошенные даты"""
+        snapshot = ScheduleSnapshot(self.make_schedule(), version=1)
+
+        snapshot.day(date(2025, 3, 3))
+
+        assert list(snapshot.days_map.templates) == [date(2025, 3, 3)]
+        # Явно заданный день не разворачивает правила до первого обращения
+        assert "slots" not in vars(snapshot.day(date(2024, 1, 15)))
+
+    def test_template_cache_is_bounded(self):
+        """Тест ограничения кэша шаблонных дней при обходе произвольных дат"""
+        snapshot = ScheduleSnapshot(self.make_schedule(), version=1)
+        snapshot.days_map.templates.size = 10
+
+        first = snapshot.day(date(2025, 3, 3))
+        for offset in range(1, 2000):
+            snapshot.day(date(2025, 3, 3) + timedelta(days=offset))
+
+        assert len(snapshot.days_map.templates) == 10
+        assert date(2025, 3, 3) not in snapshot.days_map.templates
+        # Вытесненный день строится заново с тем же результатом
+        assert snapshot.day(date(2025, 3, 3)).free == first.free
+
+
+def make_year(changed: int | None = None, slot_end: time = time(11, 0)):
+    days, timeslots = {}, []
+    for offset in range(365):
+        day_date = date(2024, 1, 1) + timedelta(days=offset)
+        day = DaySchema(id=offset + 1, date=day_date, start=time(9), end=time(18))
+        days[day_date] = day
+        end = slot_end if offset == changed else time(11, 0)
+        timeslots.append(
+            TimeSlotSchema(id=offset + 1, day_id=day.id, start=time(10), end=end)
+        )
+    return ScheduleSchema(days=days, timeslots=timeslots)
+
+
+class TestVersionHistory:
+    """Тесты для версий расписания с общими неизмененными днями"""
+
+    def test_unchanged_days_are_shared(self):
+        """Тест переиспользования дней и блоков между версиями"""
+        first = ScheduleSnapshot(make_year(), version=1)
+        view = first.day(date(2024, 6, 1))
+        free = view.free
+        second = ScheduleSnapshot(
+            make_year(changed=0, slot_end=time(12)), 2, first.days_map
+        )
+
+        assert second.day(date(2024, 6, 1)) is view
+        assert second.day(date(2024, 6, 1)).free is free
+        assert second.day(date(2024, 1, 1)) is not first.day(date(2024, 1, 1))
+        assert second.days_map.changed == 1
+        shared = [
+            key
+            for key, block in second.days_map.blocks.items()
+            if block is first.days_map.blocks[key]
+        ]
+        assert len(shared) == len(first.days_map.blocks) - 1
+
+    def test_changed_rules_share_nothing(self):
+        """Тест, что при смене правил повторения дни строятся заново"""
+        first = ScheduleSnapshot(make_year(), version=1)
+        schedule = make_year()
+        schedule.recurrences = [
+            RecurrenceSchema(
+                id=1,
+                freq="daily",
+                start=time(16),
+                end=time(17),
+                starts_on=date(2024, 1, 1),
+            )
+        ]
+        second = ScheduleSnapshot(schedule, 2, first.days_map)
+
+        assert second.day(date(2024, 6, 1)) is not first.day(date(2024, 6, 1))
+        assert second.days_map.changed == 365
+
+    def test_memory_grows_with_changed_days(self):
+        """Тест, что история растет с числом измененных дней, а не версий"""
+        history = VersionHistory(keep=20)
+        snapshot = None
+        for version in range(20):
+            previous = snapshot.days_map if snapshot else None
+            schedule = make_year(changed=version, slot_end=time(12))
+            snapshot = ScheduleSnapshot(schedule, version + 1, previous)
+            history.add(snapshot.days_map)
+
+        seen: set[int] = set()
+        current = deep_size(snapshot.days_map, seen)
+        older = deep_size(history.maps(), seen)
+        assert older < current
+
+    def test_keep_last_versions(self):
+        """Тест вытеснения старых версий"""
+        history = VersionHistory(keep=2)
+        for version in (1, 2, 3):
+            history.add(ScheduleSnapshot(make_schedule(), version).days_map)
+
+        assert [days.version for days in history.maps()] == [2, 3]
+        assert history.get(1) is None
+        assert history.latest.version == 3
+
+
+class TestAsOfEndpoint:
+    """Интеграционные тесты чтения прошлой версии расписания"""
+
+    def test_as_of(self, client, mock_http_session, mock_settings, mock_schedule_data):
+        """Тест свободных интервалов по сохраненной версии"""
+        mock_session, mock_response = mock_http_session
+        changed = dict(mock_schedule_data, timeslots=[])
+        mock_response.json = AsyncMock(
+            side_effect=[mock_schedule_data, changed, changed]
+        )
+
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=mock_settings),
+        ):
+            client.get("/2024-01-15/free_intervals")
+            current = client.get("/2024-01-15/free_intervals").json()
+            old_version = client.get("/versions").json()[-2]["version"]
+            old = client.get(f"/2024-01-15/free_intervals?as_of={old_version}")
+            is_free = client.post(
+                f"/2024-01-15/is_free?as_of={old_version}",
+                json={"start": "10:00", "end": "10:30"},
+            )
+
+        assert current == [{"start": "09:00:00", "end": "18:00:00"}]
+        assert len(old.json()) == 3
+        assert is_free.json()["is_free"] is False
+        assert client.get("/2024-01-15/taken_slots?as_of=0").status_code == 404
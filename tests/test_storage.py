@@ -0,0 +1,207 @@
+import asyncio
+from datetime import date, time, timedelta
+from unittest.mock import AsyncMock, patch
+import pytest
+from fastapi.testclient import TestClient
+
+from main import get_app
+from utils import parse_schedule
+from utils.snapshot import ScheduleSnapshot, get_current_snapshot
+from utils.storage import HttpStorage, SQLiteStorage
+
+
+@pytest.fixture
+def schedule(mock_schedule_data):
+    return parse_schedule(
+        {
+            **mock_schedule_data,
+            "recurrences": [
+                {
+                    "id": 4,
+                    "kind": "working_hours",
+                    "freq": "weekly",
+                    "weekdays": [5],
+                    "start": "10:00",
+                    "end": "14:00",
+                    "starts_on": "2024-01-01",
+                }
+            ],
+        }
+    )
+
+
+@pytest.fixture
+async def storage(tmp_path, schedule):
+    storage = SQLiteStorage(str(tmp_path / "schedule.db"), pool_size=2)
+    await storage.replace(schedule)
+    yield storage
+    await storage.close()
+
+
+class TestSQLiteStorage:
+    """Тесты для локального хранилища расписания в SQLite"""
+
+    async def test_day_reads_single_day(self, storage):
+        """Тест чтения одного дня с его слотами"""
+        view = await storage.day(date(2024, 1, 15))
+
+        assert view.day.id == 1
+        assert [slot.id for slot in view.slots] == [1, 2]
+        assert [(i.start, i.end) for i in view.free][0] == (time(9, 0), time(10, 0))
+        assert await storage.day(date(2024, 1, 16)) is not None
+        assert await storage.day(date(2024, 1, 17)) is None
+
+    async def test_day_uses_template(self, storage):
+        """Тест дня из шаблона рабочих часов"""
+        view = await storage.day(date(2024, 1, 20))  # суббота
+        assert (view.day.start, view.day.end) == (time(10, 0), time(14, 0))
+
+    async def test_cached_days_are_bounded(self, storage):
+        """Тест ограничения кэша дней при обходе произвольных дат"""
+        await storage.day(date(2024, 1, 15))
+        storage.history.latest.views.size = 5
+        for offset in range(30):
+            await storage.day(date(2024, 1, 15) + timedelta(days=offset))
+
+        assert len(storage.held()[1]) <= 5
+
+    async def test_served_versions_are_kept(self, storage, schedule):
+        """Тест сохранения каждой обслуженной версии для as_of"""
+        first = await storage.day(date(2024, 1, 15))
+        schedule.timeslots = schedule.timeslots[:1]
+        await storage.replace(schedule)
+        await storage.day(date(2024, 1, 15))
+
+        assert [days.version for days in storage.history.maps()] == [1, 2]
+        assert storage.as_of(1).day(date(2024, 1, 15)) is first
+        assert len(storage.as_of(2).day(date(2024, 1, 15)).slots) == 1
+        # Сохраняются только прочитанные дни версии
+        assert not storage.as_of(2).keeps(date(2024, 1, 16))
+
+    async def test_snapshot_roundtrip(self, storage, schedule):
+        """Тест восстановления полного расписания"""
+        snapshot = await storage.snapshot()
+        assert snapshot.schedule == schedule
+
+    async def test_replace_invalidates_cached_days(self, storage, schedule):
+        """Тест сброса кэша дней после новой синхронизации"""
+        first = await storage.day(date(2024, 1, 15))
+        assert await storage.day(date(2024, 1, 15)) is first
+
+        schedule.timeslots = schedule.timeslots[:1]
+        await storage.replace(schedule)
+
+        view = await storage.day(date(2024, 1, 15))
+        assert view is not first
+        assert [slot.id for slot in view.slots] == [1]
+
+    async def test_wal_and_index(self, storage):
+        """Тест режима WAL и использования индекса для запросов по дню"""
+        async with storage.pool.connection() as connection:
+            mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+            plan = connection.execute(
+                'EXPLAIN QUERY PLAN SELECT id, start, "end" FROM timeslots '
+                'WHERE day_id = ? ORDER BY start, "end"',
+                (1,),
+            ).fetchall()
+
+        assert mode == "wal"
+        assert "timeslots_day_interval" in str(plan)
+
+    async def test_sync_only_on_change(self, storage, schedule):
+        """Тест синхронизации только при изменении расписания upstream"""
+        current = get_current_snapshot()
+        changed = schedule.model_copy(update={"timeslots": schedule.timeslots[:1]})
+        with (
+            patch(
+                "utils.storage.get_schedule",
+                AsyncMock(side_effect=[schedule, schedule, changed]),
+            ),
+            patch.object(storage, "replace", AsyncMock()) as replace,
+        ):
+            await storage.sync()
+            await storage.sync()
+            await storage.sync()
+
+        assert [call.args[0] for call in replace.await_args_list] == [
+            schedule,
+            changed,
+        ]
+        # Снимок расписания не публикуется и не держится рядом с копией
+        assert get_current_snapshot() is current
+
+    async def test_sync_failure_is_logged(self, storage, caplog):
+        """Тест записи ошибки фоновой синхронизации в лог"""
+        storage.sync_interval = 0.01
+        with patch.object(storage, "sync", AsyncMock(side_effect=OSError("down"))):
+            await storage.start()
+            await asyncio.sleep(0.05)
+            await storage.close()
+
+        assert "Schedule sync failed" in caplog.text
+        assert "down" in caplog.text
+
+    async def test_day_reuses_snapshot_view(self, storage):
+        """Тест, что при загруженном снимке день не строится второй раз"""
+        snapshot = await storage.snapshot()
+
+        view = await storage.day(date(2024, 1, 15))
+
+        assert view is snapshot.day(date(2024, 1, 15))
+        assert storage.held()[1] == []
+
+
+class TestSQLiteEndpoints:
+    """Интеграционные тесты эндпоинтов поверх SQLite без обращения к upstream"""
+
+    @pytest.fixture
+    def sqlite_client(self, storage):
+        app = get_app()
+        app.state.storage = storage
+        return TestClient(app)
+
+    def test_per_date_endpoints(self, sqlite_client):
+        """Тест эндпоинтов по дате"""
+        with patch("utils.shedules.aiohttp.ClientSession") as session:
+            taken = sqlite_client.get("/2024-01-15/taken_slots")
+            free = sqlite_client.get("/2024-01-15/free_intervals")
+            is_free = sqlite_client.post(
+                "/2024-01-15/is_free", json={"start": "10:30", "end": "11:30"}
+            )
+            schedule = sqlite_client.get("/")
+
+        session.assert_not_called()
+        assert len(taken.json()) == 2
+        assert len(free.json()) == 3
+        assert is_free.json()["is_free"] is False
+        assert len(schedule.json()["days"]) == 2
+
+    def test_as_of_unread_day(self, sqlite_client):
+        """Тест версии, из которой прочитан только один день"""
+        sqlite_client.get("/2024-01-15/free_intervals")
+
+        kept = sqlite_client.get("/2024-01-15/free_intervals?as_of=1")
+        unread = sqlite_client.get("/2024-01-16/free_intervals?as_of=1")
+
+        assert kept.status_code == 200
+        assert unread.status_code == 404
+        assert "not kept" in unread.json()["detail"]
+
+
+class TestHttpStorage:
+    """Тесты для хранилища, читающего расписание из upstream"""
+
+    async def test_history_is_per_storage(self, schedule):
+        """Тест собственной истории версий у каждого хранилища"""
+        first, second = HttpStorage(history_size=1), HttpStorage()
+        old = ScheduleSnapshot(schedule, version=1)
+        new = ScheduleSnapshot(schedule, version=2, previous=old.days_map)
+        with patch(
+            "utils.storage.get_schedule_snapshot", AsyncMock(side_effect=[old, new])
+        ):
+            await first.snapshot()
+            await first.snapshot()
+
+        assert first.as_of(1) is None
+        assert first.as_of(2) is new.days_map
+        assert second.history.maps() == []
@@ -0,0 +1,180 @@
+import asyncio
+import json
+from datetime import date
+import httpx
+import pytest
+
+from conftest import MemoryStorage, make_view
+from main import get_app
+from schemas import IntervalSchema
+from utils.booking import bookings
+from utils.subscriptions import SubscriptionHub, delta_event
+
+MONDAY = date(2024, 1, 15)
+TUESDAY = date(2024, 1, 16)
+
+
+def parse_events(body: bytes) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.decode().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestDeltaEvent:
+    """Тесты для вычисления изменений свободных интервалов"""
+
+    def test_added_and_removed(self):
+        """Тест появившихся и исчезнувших интервалов"""
+        message = delta_event(MONDAY, make_view(MONDAY, 10), make_view(MONDAY, 12))
+        ((name, data),) = parse_events(message)
+
+        assert name == "delta"
+        assert [i["start"] for i in data["added"]] == ["09:00:00", "12:30:00"]
+        assert [i["start"] for i in data["removed"]] == ["09:00:00", "10:30:00"]
+
+    def test_no_changes(self):
+        """Тест отсутствия события без изменений"""
+        assert delta_event(MONDAY, make_view(MONDAY, 10), make_view(MONDAY, 10)) is None
+
+
+class TestSubscriptionHub:
+    """Тесты для рассылки изменений подписчикам"""
+
+    async def test_state_then_shared_delta(self):
+        """Тест начального состояния и одного сериализованного изменения на день"""
+        storage = MemoryStorage({MONDAY: make_view(MONDAY, 10)})
+        hub = SubscriptionHub(poll_interval=60)
+        first, states = await hub.subscribe(storage, {MONDAY})
+        second, _ = await hub.subscribe(storage, {MONDAY, TUESDAY})
+
+        assert [name for name, _ in parse_events(b"".join(states))] == ["state"]
+        assert hub.subscriber_count == 2
+
+        storage.views[MONDAY] = make_view(MONDAY, 11)
+        await hub.refresh(storage)
+
+        first_message = first.queue.get_nowait()
+        assert first_message is second.queue.get_nowait()
+        assert second.queue.empty()
+        # Полное обновление upstream один раз за цикл
+        assert storage.refreshes[-2:] == [True, False]
+        await hub.close()
+
+    async def test_unchanged_view_skipped(self):
+        """Тест пропуска дней, версия которых не изменилась"""
+        storage = MemoryStorage({MONDAY: make_view(MONDAY, 10)})
+        hub = SubscriptionHub(poll_interval=60)
+        subscriber, _ = await hub.subscribe(storage, {MONDAY})
+
+        await hub.refresh(storage)
+        storage.views[MONDAY] = make_view(MONDAY, 10)
+        await hub.refresh(storage)
+
+        assert subscriber.queue.empty()
+        await hub.close()
+
+    async def test_slow_subscriber_dropped(self):
+        """Тест отключения отстающего подписчика"""
+        storage = MemoryStorage({MONDAY: make_view(MONDAY, 10)})
+        hub = SubscriptionHub(poll_interval=60, queue_size=1)
+        subscriber, _ = await hub.subscribe(storage, {MONDAY})
+
+        for hour in (11, 12):
+            storage.views[MONDAY] = make_view(MONDAY, hour)
+            await hub.refresh(storage)
+
+        assert subscriber.queue.get_nowait() is not None
+        assert subscriber.queue.get_nowait() is None
+        assert hub.subscriber_count == 0
+        await hub.close()
+
+    async def test_failed_load_registers_nothing(self):
+        """Тест подписки, день которой не удалось загрузить"""
+        storage = MemoryStorage({MONDAY: make_view(MONDAY, 10)})
+        hub = SubscriptionHub(poll_interval=60)
+        load = storage.day
+
+        async def day(day_date, refresh=True):
+            if day_date == TUESDAY:
+                raise OSError("upstream is down")
+            return await load(day_date, refresh)
+
+        storage.day = day  # type: ignore
+        with pytest.raises(OSError):
+            await hub.subscribe(storage, {MONDAY, TUESDAY})
+
+        assert hub.subscriber_count == 0
+        await hub.close()
+
+    async def test_pending_bookings_are_taken(self):
+        """Тест учета неподтвержденных бронирований в состоянии и изменениях"""
+        view = make_view(MONDAY, 10)
+        storage = MemoryStorage({MONDAY: view})
+        hub = SubscriptionHub(poll_interval=60)
+        try:
+            subscriber, _ = await hub.subscribe(storage, {MONDAY})
+            async with bookings.lock(MONDAY):
+                bookings.reserve(view, IntervalSchema(start="15:00", end="16:00"))
+            await hub.refresh(storage)
+            _, states = await hub.subscribe(storage, {MONDAY})
+        finally:
+            bookings.clear()
+            await hub.close()
+
+        ((_, delta),) = parse_events(subscriber.queue.get_nowait())
+        assert [i["start"] for i in delta["removed"]] == ["10:30:00"]
+        ((_, state),) = parse_events(b"".join(states))
+        assert [i["end"] for i in state["free"]] == ["10:00:00", "15:00:00", "18:00:00"]
+
+    async def test_background_poll(self):
+        """Тест фоновой проверки изменений"""
+        storage = MemoryStorage({MONDAY: make_view(MONDAY, 10)})
+        hub = SubscriptionHub(poll_interval=0.01)
+        subscriber, _ = await hub.subscribe(storage, {MONDAY})
+
+        storage.views[MONDAY] = None  # type: ignore
+        message = await asyncio.wait_for(subscriber.queue.get(), timeout=1)
+
+        ((_, data),) = parse_events(message)
+        assert data["added"] == []
+        hub.unsubscribe(subscriber)
+        await hub.close()
+
+
+class TestSubscribeEndpoint:
+    """Интеграционные тесты SSE эндпоинта"""
+
+    async def test_stream(self):
+        """Тест потока событий до закрытия подписок"""
+        app = get_app()
+        storage = app.state.storage = MemoryStorage({MONDAY: make_view(MONDAY, 10)})
+        hub = app.state.subscriptions
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            request = asyncio.create_task(
+                c.get("/subscribe", params={"dates": [MONDAY.isoformat()]})
+            )
+            while hub.subscriber_count == 0:
+                await asyncio.sleep(0.01)
+            storage.views[MONDAY] = make_view(MONDAY, 10, 15)
+            await hub.refresh(storage)
+            await hub.close()
+            response = await request
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_events(response.content)
+        assert [name for name, _ in events] == ["state", "delta"]
+        assert events[0][1]["date"] == "2024-01-15"
+        assert [i["start"] for i in events[1][1]["removed"]] == ["10:30:00"]
+
+    def test_too_many_dates(self, client):
+        """Тест ограничения числа дат в подписке"""
+        dates = [
+            date.fromordinal(MONDAY.toordinal() + i).isoformat() for i in range(101)
+        ]
+        response = client.get("/subscribe", params={"dates": dates})
+        assert response.status_code == 422
@@ -3,7 +3,14 @@ from unittest.mock import Mock, patch, AsyncMock
 from fastapi import HTTPException
 import pytest
 
-from utils.time_manager import find_free_intervals, interval_has_intersections
+from utils.time_manager import (
+    find_free_intervals,
+    interval_has_intersections,
+    merge_busy_intervals,
+)
+import utils
+from utils.imports import lazy_import
+from utils.settings import get_settings
 from utils.shedules import get_schedule
 from schemas.day import DaySchema
 from schemas.timeslot import TimeSlotSchema
@@ -70,6 +77,51 @@ class TestTimeManager:
         assert free_intervals[2].start == time(15, 0)
         assert free_intervals[2].end == time(18, 0)
 
+    def test_find_free_intervals_overlapping_slots(self):
+        """Тест поиска свободных интервалов с пересекающимися и вложенными слотами"""
+        day = DaySchema(id=1, date=date(2024, 1, 15), start=time(9, 0), end=time(18, 0))
+        day_slots = [
+            TimeSlotSchema(id=1, day_id=1, start=time(10, 0), end=time(13, 0)),
+            TimeSlotSchema(id=2, day_id=1, start=time(11, 0), end=time(12, 0)),
+            TimeSlotSchema(id=3, day_id=1, start=time(12, 30), end=time(14, 0)),
+        ]
+
+        free_intervals = find_free_intervals(day, day_slots)
+
+        assert [(i.start, i.end) for i in free_intervals] == [
+            (time(9, 0), time(10, 0)),
+            (time(14, 0), time(18, 0)),
+        ]
+
+    def test_find_free_intervals_does_not_mutate_slots(self):
+        """Тест, что список слотов вызывающей стороны не сортируется на месте"""
+        day = DaySchema(id=1, date=date(2024, 1, 15), start=time(9, 0), end=time(18, 0))
+        day_slots = [
+            TimeSlotSchema(id=2, day_id=1, start=time(14, 0), end=time(15, 0)),
+            TimeSlotSchema(id=1, day_id=1, start=time(10, 0), end=time(11, 0)),
+        ]
+
+        find_free_intervals(day, day_slots)
+
+        assert [slot.id for slot in day_slots] == [2, 1]
+
+    def test_merge_busy_intervals_clips_to_day(self):
+        """Тест объединения слотов и обрезки по границам дня"""
+        day = DaySchema(id=1, date=date(2024, 1, 15), start=time(9, 0), end=time(18, 0))
+        day_slots = [
+            TimeSlotSchema(id=1, day_id=1, start=time(17, 0), end=time(19, 0)),
+            TimeSlotSchema(id=2, day_id=1, start=time(8, 0), end=time(9, 30)),
+            TimeSlotSchema(id=3, day_id=1, start=time(9, 30), end=time(10, 0)),
+            TimeSlotSchema(id=4, day_id=1, start=time(6, 0), end=time(7, 0)),
+        ]
+
+        busy = merge_busy_intervals(day, day_slots)
+
+        assert [(i.start, i.end) for i in busy] == [
+            (time(9, 0), time(10, 0)),
+            (time(17, 0), time(18, 0)),
+        ]
+
     def test_interval_has_intersections_no_overlaps(self):
         """Тест проверки пересечений без пересечений"""
         target = IntervalSchema(start=time(12, 0), end=time(13, 0))
@@ -229,3 +281,24 @@ class TestSchedules:
                 assert isinstance(schedule, ScheduleSchema)
                 assert len(schedule.days) == 0
                 assert len(schedule.timeslots) == 0
+
+
+class TestSettings:
+    """Тесты для настроек и ленивых импортов"""
+
+    def test_get_settings_is_cached(self):
+        """Тест, что настройки создаются один раз на процесс"""
+        assert get_settings() is get_settings()
+
+    def test_config_is_lazy_alias(self):
+        """Тест обратной совместимости utils.config"""
+        assert utils.config is get_settings()
+
+    def test_lazy_import_returns_loaded_module(self):
+        """Тест ленивого импорта уже загруженного модуля"""
+        assert lazy_import("json") is __import__("json")
+
+    def test_lazy_import_missing_module(self):
+        """Тест ленивого импорта несуществующего модуля"""
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import("definitely_missing_module")
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+from conftest import MemoryStorage, make_view
+from utils import parse_schedule
+from utils.storage import HttpStorage
+from utils.warmup import CacheWarmer, FrequencySketch, warm_day
+from utils.wire import JSON
+
+TODAY = datetime.now(timezone.utc).date()
+
+
+def views_of(dates: list[date]) -> dict:
+    return {day_date: make_view(day_date, 10) for day_date in dates}
+
+
+class TestFrequencySketch:
+    """Тесты для приближенного счетчика популярных дат"""
+
+    def test_most_common(self):
+        """Тест выбора самых частых ключей"""
+        sketch = FrequencySketch(top=2)
+        for key, hits in (("a", 5), ("b", 1), ("c", 9), ("d", 3)):
+            for _ in range(hits):
+                sketch.add(key)
+
+        assert sketch.most_common() == ["c", "a"]
+        assert sketch.estimate("c") >= 9
+
+    def test_decay(self):
+        """Тест затухания старых счетчиков"""
+        sketch = FrequencySketch(top=4, decay_every=10)
+        for _ in range(9):
+            sketch.add("old")
+        sketch.add("new")
+
+        assert sketch.estimate("old") == 4
+        assert sketch.estimate("new") == 0
+        assert sketch.most_common() == ["old"]
+
+
+class TestCacheWarmer:
+    """Тесты для прогрева дат после обновления расписания"""
+
+    def test_warm_day(self):
+        """Тест подготовки интервалов, битовой карты и тел ответов"""
+        view = make_view(TODAY, 10)
+        warm_day(view, ("gzip",))
+
+        assert {"free_spans", "bitmap", "free"} <= set(vars(view))
+        cached = view.responses[("free_intervals", JSON)]
+        assert cached.compressed("gzip", 6) is cached.compressed("gzip", 6)
+        assert ("taken_slots", JSON) in view.responses
+
+    async def test_window_and_popular_dates(self):
+        """Тест прогрева окна дат и популярной даты"""
+        popular = TODAY + timedelta(days=100)
+        rare = TODAY + timedelta(days=200)
+        storage = MemoryStorage(
+            views_of([TODAY + timedelta(days=i) for i in range(5)] + [popular, rare])
+        )
+        warmer = CacheWarmer(storage, timezone.utc, days=3, top=1, cpu_share=1)
+        for _ in range(3):
+            warmer.record(popular)
+        warmer.record(rare)
+
+        warmer.schedule()
+        await warmer.wait()
+
+        assert warmer.warmed == 4
+        assert storage.views[popular].responses
+        assert not storage.views[rare].responses
+        assert not storage.views[TODAY + timedelta(days=3)].responses
+
+    async def test_newer_swap_restarts(self):
+        """Тест перезапуска прогрева после новой версии"""
+        storage = MemoryStorage(views_of([TODAY]))
+        warmer = CacheWarmer(storage, timezone.utc, days=1, cpu_share=1)
+
+        warmer.schedule()
+        await asyncio.sleep(0)
+        warmer.schedule()
+        await warmer.wait()
+
+        assert warmer.warmed == 2
+        await warmer.close()
+
+
+class TestStorageSwap:
+    """Тесты уведомления о смене версии расписания"""
+
+    async def test_http_storage(self, mock_schedule_data):
+        """Тест вызова on_swap только при новой версии"""
+        storage = HttpStorage()
+        swaps = []
+        storage.on_swap = lambda: swaps.append(True)
+        schedules = [parse_schedule(mock_schedule_data)] * 2
+        schedules.append(parse_schedule({"days": mock_schedule_data["days"]}))
+
+        with patch("utils.shedules.get_schedule", AsyncMock(side_effect=schedules)):
+            for _ in schedules:
+                await storage.snapshot()
+
+        assert len(swaps) == 2
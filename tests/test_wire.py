@@ -0,0 +1,145 @@
+from datetime import date
+from unittest.mock import AsyncMock, patch
+import pytest
+
+from schemas import IntervalSchema, TimeSlotSchema
+from utils import parse_schedule, wire
+from utils.wire import (
+    COLUMNAR,
+    JSON,
+    MSGPACK,
+    decode_columnar,
+    encode,
+    negotiate,
+)
+
+
+@pytest.fixture
+def schedule(mock_schedule_data):
+    return parse_schedule(
+        {
+            **mock_schedule_data,
+            "recurrences": [
+                {
+                    "id": 3,
+                    "freq": "weekly",
+                    "weekdays": [0, 2],
+                    "start": "12:00",
+                    "end": "12:30",
+                    "starts_on": "2024-01-01",
+                }
+            ],
+        }
+    )
+
+
+class TestNegotiate:
+    """Тесты для выбора формата ответа по заголовку Accept"""
+
+    def test_json_by_default(self):
+        """Тест JSON при отсутствии или неизвестном Accept"""
+        assert negotiate(None) == JSON
+        assert negotiate("*/*") == JSON
+        assert negotiate("text/html, application/xml;q=0.9") == JSON
+
+    def test_binary_format(self):
+        """Тест выбора бинарного формата"""
+        assert negotiate(COLUMNAR) == COLUMNAR
+        assert negotiate(f"application/json;q=0.5, {COLUMNAR}") == COLUMNAR
+        assert negotiate(f"{COLUMNAR};q=0.1, application/json") == JSON
+
+    def test_unavailable_msgpack(self):
+        """Тест отката на JSON без установленного msgpack"""
+        with patch.object(wire, "msgpack", None):
+            assert negotiate(MSGPACK) == JSON
+
+
+class TestColumnarFormat:
+    """Тесты для колоночного бинарного формата"""
+
+    def test_schedule_roundtrip(self, schedule):
+        """Тест кодирования и декодирования расписания"""
+        tables = decode_columnar(encode(schedule, COLUMNAR))
+
+        assert list(tables["days"]["id"]) == [1, 2]
+        assert [date.fromordinal(d) for d in tables["days"]["date"]] == [
+            date(2024, 1, 15),
+            date(2024, 1, 16),
+        ]
+        assert list(tables["timeslots"]["start"]) == [600, 840]
+        assert list(tables["timeslots"]["end"]) == [660, 900]
+        assert list(tables["recurrences"]["weekdays"]) == [0b101]
+        assert list(tables["recurrences"]["until"]) == [0]
+
+    def test_empty_lists_keep_table_names(self):
+        """Тест пустых списков слотов и интервалов"""
+        slots = decode_columnar(encode([], COLUMNAR, TimeSlotSchema))
+        intervals = decode_columnar(encode([], COLUMNAR, IntervalSchema))
+
+        assert list(slots["timeslots"]["id"]) == []
+        assert list(intervals["intervals"]) == ["start", "end"]
+
+    def test_invalid_payload(self):
+        """Тест ошибки на чужих данных"""
+        with pytest.raises(ValueError):
+            decode_columnar(b'{"days": []}')
+
+    def test_smaller_than_json(self, schedule):
+        """Тест, что колоночный формат компактнее JSON"""
+        assert len(encode(schedule, COLUMNAR)) < len(schedule.model_dump_json())
+
+
+class TestMsgpackFormat:
+    """Тесты для формата MessagePack"""
+
+    def test_schedule_roundtrip(self, schedule):
+        """Тест кодирования расписания с минутами вместо строк времени"""
+        msgpack = pytest.importorskip("msgpack")
+        data = msgpack.unpackb(encode(schedule, MSGPACK))
+
+        assert data["days"]["2024-01-15"]["start"] == 540
+        assert data["timeslots"][1] == {"id": 2, "day_id": 1, "start": 840, "end": 900}
+
+
+class TestWireEndpoints:
+    """Интеграционные тесты согласования формата в эндпоинтах"""
+
+    @pytest.fixture
+    def wire_client(self, client, mock_http_session, mock_schedule_data, mock_settings):
+        mock_session, mock_response = mock_http_session
+        mock_response.json = AsyncMock(return_value=mock_schedule_data)
+        with (
+            patch("utils.shedules.aiohttp.ClientSession", return_value=mock_session),
+            patch("utils.shedules.get_settings", return_value=mock_settings),
+        ):
+            yield client
+
+    def test_json_stays_default(self, wire_client):
+        """Тест ответа в JSON без заголовка Accept"""
+        response = wire_client.get("/2024-01-15/taken_slots")
+
+        assert response.headers["content-type"] == JSON
+        assert len(response.json()) == 2
+
+    def test_columnar_responses(self, wire_client):
+        """Тест колоночного формата для расписания и эндпоинтов по дате"""
+        headers = {"Accept": COLUMNAR}
+        schedule = wire_client.get("/", headers=headers)
+        free = wire_client.get("/2024-01-15/free_intervals", headers=headers)
+        is_free = wire_client.post(
+            "/2024-01-15/is_free",
+            json={"start": "10:30", "end": "11:30"},
+            headers=headers,
+        )
+
+        assert schedule.headers["content-type"] == COLUMNAR
+        assert schedule.headers["vary"] == "Accept, Accept-Encoding"
+        assert len(decode_columnar(schedule.content)["timeslots"]["id"]) == 2
+        assert list(decode_columnar(free.content)["intervals"]["start"]) == [
+            540,
+            660,
+            900,
+        ]
+        result = decode_columnar(is_free.content)
+        assert list(result["result"]["is_free"]) == [0]
+        assert list(result["overlaps"]["id"]) == [1]
@@ -1,12 +1,32 @@
-from utils.settings import SettingsBase, get_settings, config
-from utils.shedules import get_schedule
-from utils.time_manager import find_free_intervals, interval_has_intersections
+from utils.settings import Settings, SettingsBase, get_settings, reload_settings
+from utils.shedules import get_schedule, get_schedule_snapshot, parse_schedule
+from utils.snapshot import DayView, ScheduleSnapshot
+from utils.time_manager import (
+    find_free_intervals,
+    free_intervals_from_busy,
+    interval_has_intersections,
+    merge_busy_intervals,
+)
 
 __all__ = [
     "config",
+    "Settings",
     "SettingsBase",
     "get_settings",
+    "reload_settings",
     "get_schedule",
+    "get_schedule_snapshot",
+    "parse_schedule",
+    "DayView",
+    "ScheduleSnapshot",
     "find_free_intervals",
+    "free_intervals_from_busy",
     "interval_has_intersections",
+    "merge_busy_intervals",
 ]
+
+
+def __getattr__(name: str):
+    if name == "config":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
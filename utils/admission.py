@@ -0,0 +1,134 @@
+import asyncio
+import math
+from contextlib import asynccontextmanager
+from heapq import heappop, heappush
+from itertools import count
+from time import perf_counter
+
+
+class Overloaded(Exception):
+    """
+    The request was not admitted, ``retry_after`` is a hint in seconds.
+    """
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """
+    At most ``limit`` holders at a time and a bounded queue of waiters.
+
+    Waiters are served by priority (lower first), then in arrival order. A
+    released slot is handed to the next waiter directly, so a newcomer can
+    not overtake the queue.
+    """
+
+    def __init__(self, limit: int, queue_size: int) -> None:
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.queued = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._order = count()
+        # Smoothed time a slot is held, for Retry-After
+        self._hold = 0.0
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._hold * (self.queued + 1) / self.limit))
+
+    async def acquire(self, priority: int = 0, timeout: float | None = None) -> None:
+        if self.active < self.limit and not self.queued:
+            self.active += 1
+            return
+        if self.queued >= self.queue_size:
+            raise Overloaded(self.retry_after())
+        future = asyncio.get_running_loop().create_future()
+        heappush(self._waiters, (priority, next(self._order), future))
+        self.queued += 1
+        try:
+            async with asyncio.timeout(timeout):
+                await future
+        except TimeoutError as exc:
+            self._leave(future)
+            raise Overloaded(self.retry_after()) from exc
+        except BaseException:
+            self._leave(future)
+            raise
+
+    def _leave(self, future: asyncio.Future) -> None:
+        if future.done() and not future.cancelled():
+            # The slot was handed over just as the waiter gave up
+            self.release()
+        else:
+            future.cancel()
+            self.queued -= 1
+
+    def release(self, held: float | None = None) -> None:
+        if held is not None:
+            self._hold += (held - self._hold) * 0.2
+        while self._waiters:
+            _, _, future = heappop(self._waiters)
+            if not future.done():
+                self.queued -= 1
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0, timeout: float | None = None):
+        await self.acquire(priority, timeout)
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.release(perf_counter() - started)
+
+
+class AdmissionControl:
+    """
+    Admission control for the routes listed in ``ADMISSION_ROUTES``.
+
+    A request takes a slot of its route, then one of the
+    ``ADMISSION_CONCURRENCY`` slots shared by all listed routes, where cheap
+    routes (lower priority value) are served before expensive scans. A request
+    that finds a full queue or waits longer than ``ADMISSION_QUEUE_TIMEOUT``
+    is rejected with ``Overloaded`` instead of adding to everybody's latency.
+    """
+
+    def __init__(self, settings) -> None:
+        self.prefix = settings.PATH_PREFIX
+        self.timeout = settings.ADMISSION_QUEUE_TIMEOUT
+        self.shared = AdmissionGate(
+            settings.ADMISSION_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE
+        )
+        routes = settings.ADMISSION_ROUTES if settings.ADMISSION_ENABLED else {}
+        self.routes = {
+            path: (AdmissionGate(limit.limit, settings.ADMISSION_QUEUE_SIZE), limit)
+            for path, limit in routes.items()
+        }
+
+    @asynccontextmanager
+    async def admit(self, route_path: str):
+        policy = self.routes.get(route_path.removeprefix(self.prefix))
+        if policy is None:
+            yield
+            return
+        gate, limit = policy
+        loop = asyncio.get_running_loop()
+        arrived = loop.time()
+        await gate.acquire(timeout=self.timeout)
+        try:
+            remaining = self.timeout - (loop.time() - arrived)
+            await self.shared.acquire(limit.priority, max(remaining, 0))
+        except BaseException:
+            gate.release()
+            raise
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            held = perf_counter() - started
+            self.shared.release(held)
+            gate.release(held)
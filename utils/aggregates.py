@@ -0,0 +1,104 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Iterable, Literal
+
+from schemas import UtilizationSchema
+
+Period = Literal["day", "week", "month"]
+
+# Upper bounds of gap length bins in minutes, the last bin is open
+GAP_BINS = (15, 30, 60, 120, 240)
+GAP_LABELS = ("0-15", "15-30", "30-60", "60-120", "120-240", "240+")
+
+
+def _prefix(values: list[int]) -> list[int]:
+    return list(accumulate(values, initial=0))
+
+
+def _next_period(start: date, period: Period) -> date:
+    if period == "day":
+        return start + timedelta(days=1)
+    if period == "week":
+        return start + timedelta(days=7 - start.weekday())
+    if start.month == 12:
+        return date(start.year + 1, 1, 1)
+    return date(start.year, start.month + 1, 1)
+
+
+class UtilizationIndex:
+    """
+    Busy and free minutes of the explicit days of a schedule version.
+
+    Per-day totals and gap counts by length are stored as prefix sums in
+    date order, so the totals of any date range take two bisections and a
+    subtraction per column.
+    """
+
+    def __init__(self, views: Iterable) -> None:
+        ordered = sorted(views, key=lambda view: view.day.date)
+        self.dates: list[date] = [view.day.date for view in ordered]
+        total, busy = [], []
+        gaps: list[list[int]] = [[] for _ in GAP_LABELS]
+        for view in ordered:
+            low, high = view.bounds
+            total.append(high - low)
+            busy.append(sum(end - start for start, end in view.busy_spans))
+            counts = [0] * len(GAP_LABELS)
+            for start, end in view.free_spans:
+                counts[bisect_right(GAP_BINS, end - start)] += 1
+            for column, value in zip(gaps, counts):
+                column.append(value)
+        self._total = _prefix(total)
+        self._busy = _prefix(busy)
+        self._gaps = [_prefix(column) for column in gaps]
+
+    def summary(self, date_from: date, date_to: date) -> UtilizationSchema:
+        """
+        Totals of the days in [date_from, date_to].
+        """
+        low = bisect_left(self.dates, date_from)
+        high = bisect_right(self.dates, date_to)
+        total = self._total[high] - self._total[low]
+        busy = self._busy[high] - self._busy[low]
+        return UtilizationSchema(
+            start=date_from,
+            end=date_to,
+            days=high - low,
+            total_minutes=total,
+            busy_minutes=busy,
+            free_minutes=total - busy,
+            busy_ratio=busy / total if total else 0.0,
+            gaps={
+                label: column[high] - column[low]
+                for label, column in zip(GAP_LABELS, self._gaps)
+            },
+        )
+
+    def report(
+        self,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        period: Period = "day",
+    ) -> list[UtilizationSchema]:
+        """
+        Totals per calendar day, week (from Monday) or month of the range,
+        periods without schedule days are left out.
+        """
+        if not self.dates:
+            return []
+        date_from = date_from or self.dates[0]
+        date_to = date_to or self.dates[-1]
+        if period == "day":
+            low = bisect_left(self.dates, date_from)
+            high = bisect_right(self.dates, date_to)
+            return [self.summary(d, d) for d in self.dates[low:high]]
+        buckets = []
+        start = date_from
+        while start <= date_to:
+            following = _next_period(start, period)
+            bucket = self.summary(start, min(following - timedelta(days=1), date_to))
+            if bucket.days:
+                buckets.append(bucket)
+            start = following
+        return buckets
@@ -0,0 +1,60 @@
+from schemas import TimeSlotSchema
+from utils.minutes import MINUTES_PER_DAY, Span, span_in_day
+
+
+def _mask(start: int, end: int) -> int:
+    return ((1 << (end - start)) - 1) << start if end > start else 0
+
+
+class DayBitmap:
+    """
+    Minute-resolution occupancy of one day: bit ``i`` is set when minute ``i``
+    after midnight is taken by at least one slot.
+
+    The bits are kept in a single Python int, so range checks are a mask and a
+    popcount instead of a walk over the slots. Overnight days simply use bits
+    past 1440, all arguments are minute offsets from ``utils.minutes``.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: int = 0) -> None:
+        self.bits = bits
+
+    @classmethod
+    def from_spans(cls, spans: list[Span]) -> "DayBitmap":
+        bits = 0
+        for start, end in spans:
+            bits |= _mask(start, end)
+        return cls(bits)
+
+    @classmethod
+    def from_slots(
+        cls, slots: list[TimeSlotSchema], bounds: Span = (0, MINUTES_PER_DAY)
+    ) -> "DayBitmap":
+        """
+        Bitmap of slots on a day with the given bounds, by default one that
+        starts at midnight.
+        """
+        return cls.from_spans(
+            [span_in_day(bounds, slot.start, slot.end) for slot in slots]
+        )
+
+    def is_free(self, start: int, end: int) -> bool:
+        return not self.bits & _mask(start, end)
+
+    def find_gap(self, duration: int, start: int, end: int) -> int | None:
+        """
+        Returns the first minute of the first free run of at least ``duration``
+        minutes inside [start, end), or None.
+        """
+        duration = max(duration, 1)
+        free = ~self.bits & _mask(start, end)
+        while free:
+            low = (free & -free).bit_length() - 1
+            shifted = free >> low
+            run = (shifted ^ (shifted + 1)).bit_length() - 1
+            if run >= duration:
+                return low
+            free &= ~_mask(low, low + run)
+        return None
@@ -0,0 +1,140 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+from itertools import count
+from time import monotonic
+
+from schemas import (
+    BookingSchema,
+    IntervalSchema,
+    IsFreeIntervalSchema,
+    TimeSlotSchema,
+    validate_overnight,
+)
+from utils.settings import get_settings
+from utils.snapshot import DayView
+from utils.time_manager import interval_has_intersections
+
+# Slot ids of pending bookings count down from here, away from upstream slots
+# (positive) and recurrence occurrences (the negated rule id)
+BOOKING_SLOT_IDS = -(10**15)
+
+
+class BookingConflict(Exception):
+    def __init__(self, result: IsFreeIntervalSchema) -> None:
+        super().__init__("Interval is already taken")
+        self.result = result
+
+
+class BookingLedger:
+    """
+    In-memory overlay of bookings that the upstream schedule does not show yet.
+
+    Every date has its own lock, so the check and the reservation are atomic
+    per day while different days are booked concurrently. A lock is dropped
+    as soon as no request holds or waits for it. A pending booking is dropped
+    once the upstream schedule has a slot with the same bounds or after
+    ``ttl`` seconds (``BOOKING_TTL`` setting by default).
+
+    The ledger lives in one process: with several workers each one accepts
+    bookings on its own, so the same interval can be booked once per worker
+    until the upstream schedule shows it.
+    """
+
+    def __init__(self, ttl: float | None = None) -> None:
+        self.ttl = ttl
+        # Lock of a date and the number of requests holding or awaiting it
+        self._locks: dict[date, tuple[asyncio.Lock, int]] = {}
+        self._pending: dict[date, list[tuple[float, TimeSlotSchema]]] = {}
+        self._ids = count(1)
+
+    @asynccontextmanager
+    async def lock(self, day_date: date):
+        lock, users = self._locks.get(day_date, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[day_date] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            users = self._locks[day_date][1] - 1
+            if users:
+                self._locks[day_date] = (lock, users)
+            else:
+                del self._locks[day_date]
+
+    def clear(self) -> None:
+        """
+        Forgets pending bookings, e.g. between passes of a replay.
+        """
+        self._pending.clear()
+        self._ids = count(1)
+
+    def _deadline(self) -> float:
+        ttl = get_settings().BOOKING_TTL if self.ttl is None else self.ttl
+        return monotonic() - ttl
+
+    def _sweep(self, deadline: float) -> None:
+        # Dates that are never read again would otherwise keep their bookings
+        for day_date in list(self._pending):
+            alive = [item for item in self._pending[day_date] if item[0] > deadline]
+            if alive:
+                self._pending[day_date] = alive
+            else:
+                del self._pending[day_date]
+
+    def pending(self, view: DayView) -> list[TimeSlotSchema]:
+        confirmed = {(slot.start, slot.end) for slot in view.slots}
+        deadline = self._deadline()
+        alive = [
+            (created, slot)
+            for created, slot in self._pending.get(view.day.date, [])
+            if created > deadline and (slot.start, slot.end) not in confirmed
+        ]
+        if alive:
+            self._pending[view.day.date] = alive
+        else:
+            self._pending.pop(view.day.date, None)
+        return [slot for _, slot in alive]
+
+    def overlay(self, view: DayView) -> DayView:
+        """
+        The view with pending bookings added as taken slots. Without pending
+        bookings it is the cached view itself.
+        """
+        pending = self.pending(view)
+        if not pending:
+            return view
+        return DayView(view.day, view.slots + pending)
+
+    def reserve(self, view: DayView, interval: IntervalSchema) -> BookingSchema:
+        """
+        Checks the interval against the day and pending bookings and reserves
+        it. Must be called while holding ``lock(view.day.date)``.
+        """
+        result = interval_has_intersections(
+            interval, view.slots + self.pending(view), view.day
+        )
+        if not result.is_free:
+            raise BookingConflict(result)
+        self._sweep(self._deadline())
+        booking_id = next(self._ids)
+        # A localized interval may end past midnight on the schedule's clock
+        slot = validate_overnight(
+            TimeSlotSchema,
+            id=BOOKING_SLOT_IDS - booking_id,
+            day_id=view.day.id,
+            start=interval.start,
+            end=interval.end,
+        )
+        self._pending.setdefault(view.day.date, []).append((monotonic(), slot))
+        return validate_overnight(
+            BookingSchema,
+            id=booking_id,
+            date=view.day.date,
+            start=interval.start,
+            end=interval.end,
+        )
+
+
+bookings = BookingLedger()
@@ -0,0 +1,202 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import random
+from datetime import date, time
+from pathlib import Path
+from time import perf_counter
+
+from pydantic import BaseModel
+from starlette.datastructures import Headers
+
+from schemas import ScheduleSchema
+
+# Request headers that change the response and are kept in the capture
+REPLAYED_HEADERS = ("accept", "accept-encoding", "content-type")
+
+
+def _upstream_fields(model: BaseModel) -> dict:
+    fields = model.model_dump()
+    for name, value in fields.items():
+        if isinstance(value, time):
+            fields[name] = value.strftime("%H:%M")
+        elif isinstance(value, date):
+            fields[name] = value.isoformat()
+    return fields
+
+
+def schedule_payload(schedule: ScheduleSchema) -> dict:
+    """
+    The schedule in the upstream format, as read by ``parse_schedule``.
+    """
+    return {
+        "days": [_upstream_fields(day) for day in schedule.days.values()],
+        "timeslots": [_upstream_fields(slot) for slot in schedule.timeslots],
+        "recurrences": [_upstream_fields(rule) for rule in schedule.recurrences],
+    }
+
+
+def read_capture(path: str) -> tuple[dict[str, dict], list[dict]]:
+    """
+    Snapshots by key and requests in recorded order from a capture log.
+    """
+    snapshots, requests = {}, []
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            record = json.loads(line)
+            if record["type"] == "snapshot":
+                snapshots[record["key"]] = record["schedule"]
+            else:
+                requests.append(record)
+    return snapshots, requests
+
+
+class CaptureLog:
+    """
+    Append-only gzipped JSON lines of sampled requests.
+
+    Each schedule version is written once, as a ``snapshot`` record keyed by
+    the hash of its payload, and ``request`` records refer to it by that key.
+    The payload is built and hashed in a worker thread once per version.
+    Records are buffered and appended as one gzip member per ``batch``.
+    """
+
+    def __init__(self, path: str, batch: int = 64) -> None:
+        self.path = Path(path)
+        self.batch = batch
+        self._buffer: list[str] = []
+        self._written: set[str] = set()
+        self._schedule: ScheduleSchema | None = None
+        self._key = ""
+        self._lock = asyncio.Lock()
+        self._key_lock = asyncio.Lock()
+
+    @staticmethod
+    def _hash(schedule: ScheduleSchema) -> tuple[str, dict]:
+        payload = schedule_payload(schedule)
+        text = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+        return hashlib.sha1(text.encode()).hexdigest()[:16], payload
+
+    async def snapshot_key(self, snapshot) -> str:
+        async with self._key_lock:
+            if self._schedule is not snapshot.schedule:
+                key, payload = await asyncio.to_thread(self._hash, snapshot.schedule)
+                if key not in self._written:
+                    self._written.add(key)
+                    self._append({"type": "snapshot", "key": key, "schedule": payload})
+                self._schedule, self._key = snapshot.schedule, key
+            return self._key
+
+    def _append(self, record: dict) -> None:
+        self._buffer.append(json.dumps(record, separators=(",", ":")))
+
+    async def record(self, snapshot, request: dict) -> None:
+        request["snapshot"] = await self.snapshot_key(snapshot)
+        self._append({"type": "request", **request})
+        if len(self._buffer) >= self.batch:
+            await self.flush()
+
+    def _write(self, lines: list[str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self.path, "at", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    async def flush(self) -> None:
+        lines, self._buffer = self._buffer, []
+        if lines:
+            async with self._lock:
+                await asyncio.to_thread(self._write, lines)
+
+    async def close(self) -> None:
+        await self.flush()
+
+
+class CaptureMiddleware:
+    """
+    Records a ``sample_rate`` share of requests with their body, status and
+    duration into a ``CaptureLog``, together with the schedule version they
+    were served from: the one held when the response starts. Requests served
+    before any version is held, streaming responses and request bodies over
+    ``max_body`` bytes are not recorded, nor are the admin and ingest routes.
+    A body stops being buffered as soon as it is over the limit.
+    """
+
+    def __init__(
+        self,
+        app,
+        log: CaptureLog,
+        sample_rate: float,
+        max_body: int,
+        prefix: str = "",
+    ):
+        self.app = app
+        self.log = log
+        self.sample_rate = sample_rate
+        self.max_body = max_body
+        self.skipped = (f"{prefix}/admin", f"{prefix}/ingest")
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"].startswith(self.skipped)
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        chunks: list[bytes] = []
+        size = 0
+        response = {"status": None, "streaming": False, "snapshot": None}
+        storage = scope["app"].state.storage
+
+        async def receive_recorded():
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request" and size <= self.max_body:
+                body = message.get("body", b"")
+                size += len(body)
+                if size > self.max_body:
+                    chunks.clear()
+                else:
+                    chunks.append(body)
+            return message
+
+        async def send_recorded(message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["snapshot"] = storage.held()[0]
+                media_type = Headers(raw=message["headers"]).get("content-type", "")
+                response["streaming"] = media_type.startswith("text/event-stream")
+            await send(message)
+
+        started = perf_counter()
+        await self.app(scope, receive_recorded, send_recorded)
+        duration = perf_counter() - started
+
+        snapshot = response["snapshot"]
+        # Without the schedule the request could not be replayed
+        if snapshot is None or response["streaming"] or size > self.max_body:
+            return
+        body = b"".join(chunks)
+        route = getattr(scope.get("route"), "path", scope["path"])
+        headers = Headers(scope=scope)
+        await self.log.record(
+            snapshot,
+            {
+                "route": f"{scope['method']} {route}",
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "headers": {
+                    name: headers[name] for name in REPLAYED_HEADERS if name in headers
+                },
+                "body": body.decode("utf-8", errors="replace"),
+                "status": response["status"],
+                "duration_ms": round(duration * 1000, 3),
+            },
+        )
+
+
+def create_capture(settings) -> CaptureLog:
+    return CaptureLog(settings.CAPTURE_PATH)
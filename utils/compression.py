@@ -0,0 +1,165 @@
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from utils.imports import lazy_import
+from utils.profiling import stage
+from utils.wire import encode
+
+try:
+    brotli = lazy_import("brotli")
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    brotli = None
+try:
+    zstandard = lazy_import("zstandard")
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+def available_encodings() -> tuple[str, ...]:
+    """
+    Supported content codings, most preferred first.
+    """
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return tuple(encodings)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Picks the content coding from the Accept-Encoding header, ``None`` means
+    the body is sent as is.
+    """
+    if not accept_encoding:
+        return None
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=level)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    raise ValueError(f"Unsupported content encoding {encoding!r}")
+
+
+class CachedBody:
+    """
+    Encoded response body and its compressed variants, each produced once.
+    """
+
+    __slots__ = ("body", "media_type", "_compressed")
+
+    def __init__(self, body: bytes, media_type: str) -> None:
+        self.body = body
+        self.media_type = media_type
+        self._compressed: dict[tuple[str, int], bytes] = {}
+
+    def compressed(self, encoding: str, level: int) -> bytes:
+        key = (encoding, level)
+        body = self._compressed.get(key)
+        if body is None:
+            body = self._compressed[key] = compress(self.body, encoding, level)
+        return body
+
+
+def cached_body(
+    cache: dict,
+    key: str,
+    payload,
+    media_type: str,
+    item_type: type | None = None,
+) -> CachedBody:
+    """
+    Encoded body of ``payload`` kept in ``cache`` under ``key`` and the format.
+    """
+    cached = cache.get((key, media_type))
+    if cached is None:
+        with stage("serialize"):
+            body = encode(payload, media_type, item_type)
+        cached = cache[(key, media_type)] = CachedBody(body, media_type)
+    return cached
+
+
+def add_vary(headers: MutableHeaders, value: str) -> None:
+    vary = [item.strip() for item in headers.get("vary", "").split(",") if item]
+    if value.lower() not in (item.lower() for item in vary):
+        headers["vary"] = ", ".join(vary + [value])
+
+
+class CompressionMiddleware:
+    """
+    Compresses buffered responses of at least ``COMPRESSION_MIN_SIZE`` bytes.
+
+    Streaming responses and bodies that already carry a Content-Encoding,
+    such as the pre-compressed cached ones, are passed through untouched.
+    """
+
+    def __init__(self, app, settings) -> None:
+        self.app = app
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+        self.level = settings.COMPRESSION_LEVEL
+
+    async def __call__(self, scope, receive, send) -> None:
+        encoding = None
+        if scope["type"] == "http":
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or start is None:
+                await send(message)
+                return
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.min_size
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            body = compress(body, encoding, self.level)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            add_vary(headers, "Accept-Encoding")
+            passthrough = True
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
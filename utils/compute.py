@@ -0,0 +1,191 @@
+import asyncio
+import multiprocessing
+import sys
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from multiprocessing.shared_memory import SharedMemory
+
+from utils.minutes import day_span, free_spans, merge_spans
+from utils.snapshot import ScheduleSnapshot
+from utils.time_manager import slot_spans
+
+# Packed days: [day count, then per day: ordinal, start, end, slot count and
+# the start/end minutes of its slots]
+DayTable = array
+
+
+def pack_days(snapshot: ScheduleSnapshot) -> DayTable:
+    """
+    Flattens the days of a snapshot and their slot spans into one array of
+    integers, in the order of ``ScheduleSnapshot.days()``.
+    """
+    table = array("q", [len(snapshot.schedule.days)])
+    for day in snapshot.schedule.days.values():
+        bounds = day_span(day)
+        spans = slot_spans(bounds, snapshot.slots(day))
+        table.extend((day.date.toordinal(), *bounds, len(spans)))
+        for span in spans:
+            table.extend(span)
+    return table
+
+
+def first_gap(table: DayTable, duration: int) -> tuple[int, int] | None:
+    """
+    Date ordinal and start minute of the first free range of ``duration``
+    minutes in packed days.
+    """
+    position = 1
+    for _ in range(table[0]):
+        ordinal, start, end, count = table[position : position + 4]
+        position += 4
+        spans = [
+            (table[i], table[i + 1]) for i in range(position, position + 2 * count, 2)
+        ]
+        position += 2 * count
+        bounds = (start, end)
+        for low, high in free_spans(bounds, merge_spans(bounds, spans)):
+            if high - low >= duration:
+                return ordinal, low
+    return None
+
+
+# Packed days attached by a worker process, only the latest version is kept
+_attached: dict[str, DayTable] = {}
+
+
+def _first_gap_in_block(name: str, duration: int) -> tuple[int, int] | None:
+    table = _attached.get(name)
+    if table is None:
+        block = SharedMemory(name)
+        try:
+            table = array("q", bytes(block.buf))
+        finally:
+            block.close()
+        _attached.clear()
+        _attached[name] = table
+    return first_gap(table, duration)
+
+
+class _Block:
+    """
+    Shared memory copy of one packed version, unlinked once it is replaced
+    and no task reads it.
+    """
+
+    def __init__(self, table: DayTable) -> None:
+        data = table.tobytes()
+        self.memory = SharedMemory(create=True, size=max(len(data), 1))
+        self.memory.buf[: len(data)] = data
+        self.readers = 0
+        self.retired = False
+
+    def release(self) -> None:
+        if self.retired and self.readers == 0:
+            self.memory.close()
+            self.memory.unlink()
+
+
+class ComputeExecutor:
+    """
+    Runs scans over the whole schedule off the event loop.
+
+    Snapshots whose ``cost`` reaches ``threshold`` are packed into integer
+    arrays once per version. Thread workers read the array directly, process
+    workers get the name of a shared memory block and copy it once per
+    version, so a call only sends the block name and the duration.
+    """
+
+    def __init__(
+        self, kind: str = "inline", workers: int = 2, threshold: int = 0
+    ) -> None:
+        self.kind = kind
+        self.workers = workers
+        self.threshold = threshold
+        self._executor: Executor | None = None
+        self._lock = asyncio.Lock()
+        self._version: int | None = None
+        self._table: DayTable | None = None
+        self._block: _Block | None = None
+
+    def held_bytes(self) -> int:
+        """
+        Size of the packed day table of the current version.
+        """
+        if self._block is not None:
+            return self._block.memory.size
+        if self._table is not None:
+            return sys.getsizeof(self._table)
+        return 0
+
+    def offloads(self, snapshot: ScheduleSnapshot) -> bool:
+        return self.kind != "inline" and snapshot.cost >= self.threshold
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Forking a process with running threads may deadlock
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="compute"
+                )
+        return self._executor
+
+    async def _publish(self, snapshot: ScheduleSnapshot) -> None:
+        async with self._lock:
+            if self._version == snapshot.version:
+                return
+            table = await asyncio.to_thread(pack_days, snapshot)
+            if self.kind == "process":
+                if self._block is not None:
+                    self._block.retired = True
+                    self._block.release()
+                self._block = _Block(table)
+            else:
+                self._table = table
+            self._version = snapshot.version
+
+    async def first_gap(
+        self, snapshot: ScheduleSnapshot, duration: int
+    ) -> tuple[date, int] | None:
+        """
+        Date and start minute of the first free range of ``duration`` minutes.
+        """
+        await self._publish(snapshot)
+        loop = asyncio.get_running_loop()
+        if self.kind == "process":
+            block = self._block
+            assert block is not None
+            block.readers += 1
+            try:
+                found = await loop.run_in_executor(
+                    self._get_executor(),
+                    _first_gap_in_block,
+                    block.memory.name,
+                    duration,
+                )
+            finally:
+                block.readers -= 1
+                block.release()
+        else:
+            found = await loop.run_in_executor(
+                self._get_executor(), first_gap, self._table, duration
+            )
+        if found is None:
+            return None
+        ordinal, start = found
+        return date.fromordinal(ordinal), start
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        if self._block is not None:
+            self._block.retired = True
+            self._block.release()
+            self._block = None
+        self._version = None
+        self._table = None
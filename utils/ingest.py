@@ -0,0 +1,140 @@
+import json
+from datetime import date
+from typing import Any, AsyncIterator
+
+from pydantic import BaseModel, ValidationError
+
+from schemas import OVERNIGHT, DaySchema, RecurrenceSchema, TimeSlotSchema
+
+# Schemas of the NDJSON record types, selected by the "type" field
+RECORD_TYPES: dict[str, type[BaseModel]] = {
+    "day": DaySchema,
+    "timeslot": TimeSlotSchema,
+    "recurrence": RecurrenceSchema,
+}
+
+
+class IngestError(Exception):
+    """
+    A pushed schedule is rejected, ``line`` is the 1-based NDJSON line.
+    """
+
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+class IngestBusy(Exception):
+    """
+    Another ingestion holds the write lock of the storage.
+    """
+
+
+def _describe(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc'])) or 'record'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def parse_record(number: int, line: bytes) -> tuple[str, Any]:
+    """
+    Validates one NDJSON line: a day, timeslot or recurrence, or
+    ``{"type": "delete", "date": ...}`` that removes a day in a patch.
+    """
+    try:
+        data = json.loads(line)
+    except ValueError as exc:
+        raise IngestError(number, f"Invalid JSON: {exc}") from exc
+    if not isinstance(data, dict):
+        raise IngestError(number, "A record must be a JSON object")
+    kind = data.pop("type", None)
+    if kind == "delete":
+        try:
+            return kind, date.fromisoformat(data["date"])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise IngestError(number, "Date must be in YYYY-MM-DD format") from exc
+    schema = RECORD_TYPES.get(kind)  # type: ignore
+    if schema is None:
+        raise IngestError(number, f"Unknown record type {kind!r}")
+    try:
+        return kind, schema.model_validate(data, context=OVERNIGHT)
+    except ValidationError as exc:
+        raise IngestError(number, _describe(exc)) from exc
+
+
+class IngestStream:
+    """
+    Validated records of a pushed NDJSON body, read chunk by chunk.
+
+    Only the current line is buffered, so the body is never held in memory.
+    Besides the schemas, records are checked against the ones before them:
+    dates and day ids are unique, a timeslot follows the day it belongs to,
+    and a patch (``full=False``) changes days only, rules need a full push.
+    ``dates`` collects the dates written or deleted.
+    """
+
+    def __init__(
+        self,
+        chunks: AsyncIterator[bytes],
+        full: bool,
+        max_line: int = 65536,
+        max_bytes: int = 1 << 30,
+    ) -> None:
+        self.chunks = chunks
+        self.full = full
+        self.max_line = max_line
+        self.max_bytes = max_bytes
+        self.dates: set[date] = set()
+        self.day_ids: set[int] = set()
+        self.counts = {"day": 0, "timeslot": 0, "recurrence": 0, "delete": 0}
+
+    async def _lines(self) -> AsyncIterator[tuple[int, bytes]]:
+        number, size, pending = 0, 0, b""
+        async for chunk in self.chunks:
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise IngestError(number + 1, f"Body is over {self.max_bytes} bytes")
+            *lines, rest = (pending + chunk).split(b"\n")
+            for line in lines:
+                number += 1
+                if len(line) > self.max_line:
+                    raise IngestError(number, f"Line is over {self.max_line} bytes")
+                if line.strip():
+                    yield number, line
+            if len(rest) > self.max_line:
+                raise IngestError(number + 1, f"Line is over {self.max_line} bytes")
+            pending = rest
+        if pending.strip():
+            yield number + 1, pending
+
+    def _check(self, number: int, kind: str, value: Any) -> None:
+        if kind == "day":
+            if value.date in self.dates:
+                raise IngestError(number, f"Day {value.date} is listed twice")
+            if value.id in self.day_ids:
+                raise IngestError(number, f"Day id {value.id} is listed twice")
+            self.dates.add(value.date)
+            self.day_ids.add(value.id)
+        elif kind == "timeslot":
+            if value.day_id not in self.day_ids:
+                raise IngestError(
+                    number, f"Timeslot refers to day id {value.day_id} not listed above"
+                )
+        elif self.full:
+            if kind == "delete":
+                raise IngestError(number, "Deletes are only allowed in a patch")
+        elif kind == "recurrence":
+            raise IngestError(number, "Recurrences are only replaced by a full push")
+        elif value in self.dates:
+            raise IngestError(number, f"Day {value} is listed twice")
+        else:
+            self.dates.add(value)
+        self.counts[kind] += 1
+
+    async def __aiter__(self) -> AsyncIterator[tuple[int, str, Any]]:
+        async for number, line in self._lines():
+            kind, value = parse_record(number, line)
+            self._check(number, kind, value)
+            yield number, kind, value
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from collections import deque
+from contextvars import ContextVar
+from statistics import quantiles
+from time import perf_counter
+
+from utils.profiling import active_stages
+
+logger = logging.getLogger(__name__)
+
+_request: ContextVar[dict | None] = ContextVar("loop_monitor_request", default=None)
+
+
+class LoopMonitorMiddleware:
+    """
+    Marks the request and its stages so that blocked loop time can be
+    attributed to a route.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_token = _request.set(scope)
+        stages_token = active_stages.set([])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            active_stages.reset(stages_token)
+            _request.reset(request_token)
+
+
+def _route(scope: dict | None) -> str | None:
+    if scope is None:
+        return None
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag and reports the code that blocks the loop.
+
+    A probe task sleeps for ``interval`` and records how late it wakes up. A
+    watchdog thread notices when the probe is overdue by ``threshold`` and
+    captures the stack of the loop thread together with the route and stages
+    of the task that is running, so that the slow handler is logged while it
+    still blocks.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.05,
+        threshold: float = 0.1,
+        window: int = 2048,
+        keep: int = 50,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: deque[float] = deque(maxlen=window)
+        self.blocks: deque[dict] = deque(maxlen=keep)
+        self._beat = perf_counter()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._captured: dict | None = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._probe())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._thread.start()
+
+    async def _probe(self) -> None:
+        while True:
+            expected = perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(perf_counter() - expected, 0.0)
+            self.lags.append(lag)
+            if lag >= self.threshold:
+                self._report(lag)
+            self._captured = None
+            self._beat = perf_counter()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.threshold / 2):
+            overdue = perf_counter() - self._beat - self.interval
+            if overdue >= self.threshold and self._captured is None:
+                self._captured = self._capture()
+
+    def _capture(self) -> dict:
+        frame = sys._current_frames().get(self._loop_thread)  # pylint: disable=W0212
+        stack = traceback.format_list(traceback.extract_stack(frame)[-8:])
+        scope, stages = None, None
+        # The running task is read without locking, the loop thread may be
+        # switching tasks right now, in which case nothing is attributed
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        if task is not None:
+            context = task.get_context()
+            scope = context.get(_request)
+            stages = list(context.get(active_stages) or ())
+        return {"route": _route(scope), "stages": stages, "stack": stack}
+
+    def _report(self, lag: float) -> None:
+        block = {"blocked_ms": round(lag * 1000, 3)}
+        block.update(self._captured or {"route": None, "stages": None, "stack": []})
+        self.blocks.append(block)
+        logger.warning(
+            "Event loop blocked for %.1f ms in %s (stages: %s)\n%s",
+            block["blocked_ms"],
+            block["route"] or "unknown",
+            ", ".join(block["stages"] or ()) or "none",
+            "".join(block["stack"]),
+        )
+
+    def lag_percentiles(self) -> dict[str, float]:
+        """
+        p50, p90, p99 and max of the recorded lags in milliseconds.
+        """
+        lags = sorted(self.lags)
+        if not lags:
+            return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+        if len(lags) == 1:
+            cuts = lags * 99
+        else:
+            cuts = quantiles(lags, n=100, method="inclusive")
+        return {
+            "p50": round(cuts[49] * 1000, 3),
+            "p90": round(cuts[89] * 1000, 3),
+            "p99": round(cuts[98] * 1000, 3),
+            "max": round(lags[-1] * 1000, 3),
+        }
+
+    def report(self) -> dict:
+        return {"lag_ms": self.lag_percentiles(), "blocks": list(self.blocks)}
+
+    async def close(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+
+def create_loop_monitor(settings) -> LoopMonitor:
+    return LoopMonitor(
+        settings.LOOP_MONITOR_INTERVAL,
+        settings.LOOP_MONITOR_THRESHOLD,
+        settings.LOOP_MONITOR_WINDOW,
+    )
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import sys
+import tracemalloc
+from collections.abc import Callable
+from contextlib import contextmanager
+from types import BuiltinFunctionType, CodeType, FrameType, FunctionType, ModuleType
+
+logger = logging.getLogger(__name__)
+
+# Traced bytes at the peak of the last run of each tracked block, e.g. "parse"
+peaks: dict[str, int] = {}
+
+# Shared by every instance, never part of a footprint
+_SKIP = (type, ModuleType, FunctionType, BuiltinFunctionType, CodeType, FrameType)
+
+Sizer = Callable[[set[int]], int]
+
+
+def _members(item) -> list:
+    members = []
+    if isinstance(item, dict):
+        members.extend(item.keys())
+        members.extend(item.values())
+    elif isinstance(item, (list, tuple, set, frozenset)):
+        members.extend(item)
+    instance_dict = getattr(item, "__dict__", None)
+    if isinstance(instance_dict, dict):
+        members.append(instance_dict)
+    for cls in type(item).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__"):
+                members.append(getattr(item, name, None))
+    return members
+
+
+def deep_size(obj, seen: set[int] | None = None) -> int:
+    """
+    Approximate bytes reachable from ``obj``, the sum of ``sys.getsizeof`` over
+    containers, instance dicts and slots. Objects already in ``seen`` are not
+    counted again, so sizes taken with one ``seen`` add up without overlap.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIP):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        stack.extend(_members(item))
+    return total
+
+
+def snapshot_footprint(snapshot, views: list, seen: set[int]) -> dict[str, int]:
+    """
+    Bytes of the parsed schedule, of the structures derived from it and of the
+    encoded responses cached on the snapshot and its day views.
+    """
+    schedule = deep_size(snapshot.schedule, seen) if snapshot else 0
+    views = (snapshot.built() if snapshot else []) + views
+    responses = deep_size(snapshot.responses, seen) if snapshot else 0
+    responses += sum(deep_size(view.responses, seen) for view in views)
+    derived = deep_size(snapshot, seen) + deep_size(views, seen)
+    return {"schedule": schedule, "derived": derived, "responses": responses}
+
+
+@contextmanager
+def track_peak(name: str):
+    """
+    Records the peak of traced memory during the block when tracemalloc runs,
+    otherwise costs one check.
+    """
+    if not tracemalloc.is_tracing():
+        yield
+        return
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        peaks[name] = tracemalloc.get_traced_memory()[1] - before
+
+
+class MemoryMonitor:
+    """
+    Approximate memory held by one worker.
+
+    ``report()`` walks the current schedule version, the day views of the
+    storage and the named ``caches``, counting every object once. With
+    ``trace`` on, tracemalloc runs with ``frames`` frames per allocation and the
+    report adds traced totals, the peak of the last parse and, on request, the
+    top allocation sites. Every ``interval`` seconds (0 turns it off) the
+    report is logged. ``collect()`` runs the walk in a worker thread so that
+    a large schedule does not stall the event loop.
+    """
+
+    def __init__(
+        self,
+        storage,
+        caches: dict[str, Sizer] | None = None,
+        interval: float = 0,
+        trace: bool = False,
+        frames: int = 1,
+    ) -> None:
+        self.storage = storage
+        self.caches = caches or {}
+        self.interval = interval
+        self.trace = trace
+        self.frames = frames
+        self.last: dict | None = None
+        self._tracing = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._tracing = True
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    def report(self, top: int = 0, held: tuple | None = None) -> dict:
+        seen: set[int] = set()
+        snapshot, views = self.storage.held() if held is None else held
+        sizes = snapshot_footprint(snapshot, views, seen)
+        for name, sizer in self.caches.items():
+            sizes[name] = sizer(seen)
+        report = {
+            "version": snapshot.version if snapshot else None,
+            "bytes": sizes,
+            "total": sum(sizes.values()),
+            "tracemalloc": None,
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            traced = {"current": current, "peak": peak, "peaks": dict(peaks)}
+            if top:
+                statistics = tracemalloc.take_snapshot().statistics("lineno")
+                traced["top"] = [
+                    {"where": str(stat.traceback), "bytes": stat.size}
+                    for stat in statistics[:top]
+                ]
+            report["tracemalloc"] = traced
+        return report
+
+    async def collect(self, top: int = 0, attempts: int = 3) -> dict:
+        # The version and views are taken on the loop, so the walk sees one
+        # consistent version even if a new one is swapped in meanwhile
+        held = self.storage.held()
+        for _ in range(attempts - 1):
+            try:
+                return await asyncio.to_thread(self.report, top, held)
+            except RuntimeError:
+                # A cache changed size under the walk, it is taken again
+                continue
+        return await asyncio.to_thread(self.report, top, held)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.last = await self.collect()
+            logger.info(
+                "Memory footprint: total=%d %s tracemalloc=%s",
+                self.last["total"],
+                self.last["bytes"],
+                self.last["tracemalloc"],
+            )
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+
+def create_memory_monitor(application, settings) -> MemoryMonitor:
+    state = application.state
+    caches: dict[str, Sizer] = {"compute": lambda seen: state.compute.held_bytes()}
+    if state.warmer is not None:
+        caches["warmup"] = lambda seen: deep_size(state.warmer.sketch, seen)
+    if state.storage.history is not None:
+        # Only what earlier versions do not share with the current one
+        caches["history"] = lambda seen: deep_size(state.storage.history.maps(), seen)
+    return MemoryMonitor(
+        state.storage,
+        caches,
+        interval=settings.MEMORY_REPORT_INTERVAL,
+        trace=settings.MEMORY_TRACING,
+        frames=settings.MEMORY_TRACE_FRAMES,
+    )
@@ -0,0 +1,96 @@
+from datetime import date, datetime, time, tzinfo
+
+from schemas import DaySchema
+
+MINUTES_PER_DAY = 24 * 60
+
+# Half-open [start, end) range in minutes from midnight of the day's date
+Span = tuple[int, int]
+
+
+def to_minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes: int) -> time:
+    """
+    Wall clock time of a minute offset, offsets past midnight wrap around.
+    """
+    minutes %= MINUTES_PER_DAY
+    return time(minutes // 60, minutes % 60)
+
+
+def day_span(day: DaySchema) -> Span:
+    """
+    Bounds of a day. A day that ends at or before its start time, such as
+    22:00-06:00, runs over midnight and ends on the next date.
+    """
+    start, end = to_minutes(day.start), to_minutes(day.end)
+    return start, end if end > start else end + MINUTES_PER_DAY
+
+
+def span_in_day(day_bounds: Span, start: time, end: time) -> Span:
+    """
+    Places a start/end pair into the minute frame of a day.
+
+    On an overnight day a time before the day's end time belongs to the next
+    date. An end at or before its start crosses midnight.
+    """
+    overnight_end = day_bounds[1] - MINUTES_PER_DAY
+    low = to_minutes(start)
+    if low < overnight_end:
+        low += MINUTES_PER_DAY
+    high = to_minutes(end)
+    if high < overnight_end:
+        high += MINUTES_PER_DAY
+    if high <= low:
+        high += MINUTES_PER_DAY
+    return low, high
+
+
+def localize(value: time, day_date: date, zone: tzinfo) -> time:
+    """
+    Wall clock time in the schedule's zone of a possibly zone-aware time,
+    resolved on the given date so that daylight saving shifts apply.
+    """
+    if value.tzinfo is None:
+        return value
+    moment = datetime.combine(day_date, value).astimezone(zone)
+    return moment.time().replace(second=0, microsecond=0)
+
+
+def merge_spans(day_bounds: Span, spans: list[Span]) -> list[Span]:
+    """
+    Sorts spans, merges overlapping or touching ones and clips them to the day.
+    """
+    day_start, day_end = day_bounds
+    merged: list[list[int]] = []
+    for low, high in sorted(spans):
+        low, high = max(low, day_start), min(high, day_end)
+        if low >= high:
+            continue
+        if merged and low <= merged[-1][1]:
+            if high > merged[-1][1]:
+                merged[-1][1] = high
+        else:
+            merged.append([low, high])
+    return [(low, high) for low, high in merged]
+
+
+def free_spans(day_bounds: Span, busy: list[Span]) -> list[Span]:
+    """
+    Gaps of the day between merged busy spans, see ``merge_spans``.
+    """
+    free = []
+    cursor, day_end = day_bounds
+    for low, high in busy:
+        if low > cursor:
+            free.append((cursor, low))
+        cursor = high
+    if cursor < day_end:
+        free.append((cursor, day_end))
+    return free
+
+
+def overlaps(first: Span, second: Span) -> bool:
+    return first[0] < second[1] and first[1] > second[0]
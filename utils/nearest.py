@@ -0,0 +1,83 @@
+from bisect import bisect_right
+
+from utils.minutes import Span
+
+
+class GapIndex:
+    """
+    Free spans of a day, sorted by start, with a max tree over their lengths.
+
+    The nearest span of at least a given length before or after a position is
+    found by bisecting the starts and descending the tree, in O(log n).
+    """
+
+    def __init__(self, spans: list[Span]) -> None:
+        self.spans = spans
+        self.starts = [low for low, _ in spans]
+        size = 1
+        while size < len(spans):
+            size *= 2
+        self._size = size
+        # Padding leaves are -1 so that they never satisfy a length
+        tree = [-1] * (2 * size)
+        for position, (low, high) in enumerate(spans):
+            tree[size + position] = high - low
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._tree = tree
+
+    def _first(self, node: int, low: int, high: int, index: int, length: int):
+        if high <= index or self._tree[node] < length:
+            return None
+        if high - low == 1:
+            return low
+        middle = (low + high) // 2
+        found = self._first(2 * node, low, middle, index, length)
+        if found is None:
+            found = self._first(2 * node + 1, middle, high, index, length)
+        return found
+
+    def _last(self, node: int, low: int, high: int, index: int, length: int):
+        if low > index or self._tree[node] < length:
+            return None
+        if high - low == 1:
+            return low
+        middle = (low + high) // 2
+        found = self._last(2 * node + 1, middle, high, index, length)
+        if found is None:
+            found = self._last(2 * node, low, middle, index, length)
+        return found
+
+    def first_at_least(self, index: int, length: int) -> int | None:
+        """
+        First span at or after ``index`` that is ``length`` minutes or longer.
+        """
+        return self._first(1, 0, self._size, index, length)
+
+    def last_at_least(self, index: int, length: int) -> int | None:
+        """
+        Last span at or before ``index`` that is ``length`` minutes or longer.
+        """
+        if index < 0:
+            return None
+        return self._last(1, 0, self._size, index, length)
+
+    def after(self, position: int, duration: int) -> int | None:
+        """
+        Earliest start at or after ``position`` of a free range of ``duration``.
+        """
+        index = bisect_right(self.starts, position) - 1
+        if index >= 0 and position + duration <= self.spans[index][1]:
+            return position
+        found = self.first_at_least(index + 1, duration)
+        return None if found is None else self.spans[found][0]
+
+    def before(self, position: int, duration: int) -> int | None:
+        """
+        Latest start at or before ``position`` of a free range of ``duration``.
+        """
+        index = bisect_right(self.starts, position) - 1
+        found = self.last_at_least(index, duration)
+        if found is None:
+            return None
+        return min(position, self.spans[found][1] - duration)
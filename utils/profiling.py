@@ -0,0 +1,129 @@
+import asyncio
+import cProfile
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+from starlette.datastructures import Headers, MutableHeaders
+
+
+class StageTimings:
+    """
+    Per-request collection of stage durations in milliseconds.
+    """
+
+    def __init__(self) -> None:
+        self.started = perf_counter()
+        self.mark = self.started
+        self.stages: dict[str, float] = {}
+
+    def add(self, name: str, duration_ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + duration_ms
+
+    def since_mark(self, name: str) -> None:
+        now = perf_counter()
+        self.add(name, (now - self.mark) * 1000)
+        self.mark = now
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f"{name};dur={duration:.3f}" for name, duration in self.stages.items()
+        )
+
+
+_timings: ContextVar[StageTimings | None] = ContextVar("stage_timings", default=None)
+# Stages a request is in right now, tracked for requests watched by the loop monitor
+active_stages: ContextVar[list[str] | None] = ContextVar("active_stages", default=None)
+_profiler_busy = False
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Records duration of the wrapped block when profiling is active for the request.
+    """
+    timings = _timings.get()
+    stages = active_stages.get()
+    if timings is None and stages is None:
+        yield
+        return
+    if stages is not None:
+        stages.append(name)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        if stages is not None:
+            stages.pop()
+        if timings is not None:
+            end = perf_counter()
+            timings.add(name, (end - start) * 1000)
+            timings.mark = end
+
+
+def _dump_profile(profiler: cProfile.Profile, directory: str, scope: dict) -> None:
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    route = scope["path"].strip("/").replace("/", "_") or "root"
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    profiler.dump_stats(path / f"{stamp}-{scope['method']}-{route}.prof")
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in per-request profiling.
+
+    Requests carrying the configured header get a ``Server-Timing`` response
+    header with the stages recorded by ``stage()`` plus ``serialize`` (time from
+    the last recorded stage to the response start) and ``total``, and with the
+    loop monitor on, the recent event loop lag as ``loop-p50`` and ``loop-p99``.
+    A sampled part of them is additionally run under cProfile and dumped to ``PROFILING_DIR``.
+    """
+
+    def __init__(self, app, settings) -> None:
+        self.app = app
+        self.header = settings.PROFILING_HEADER.lower()
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.directory = settings.PROFILING_DIR
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or self.header not in Headers(scope=scope):
+            await self.app(scope, receive, send)
+            return
+
+        global _profiler_busy  # pylint: disable=global-statement
+        timings = StageTimings()
+        token = _timings.set(timings)
+
+        async def send_with_timings(message) -> None:
+            if message["type"] == "http.response.start":
+                timings.since_mark("serialize")
+                timings.add("total", (perf_counter() - timings.started) * 1000)
+                monitor = getattr(scope["app"].state, "loop_monitor", None)
+                if monitor is not None:
+                    lags = monitor.lag_percentiles()
+                    timings.add("loop-p50", lags["p50"])
+                    timings.add("loop-p99", lags["p99"])
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", timings.server_timing()
+                )
+            await send(message)
+
+        # cProfile is process-wide, so at most one request is profiled at a time
+        # and the profile may include work of concurrent requests.
+        profiler = None
+        if not _profiler_busy and random.random() < self.sample_rate:
+            _profiler_busy = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _timings.reset(token)
+            if profiler is not None:
+                profiler.disable()
+                _profiler_busy = False
+                await asyncio.to_thread(_dump_profile, profiler, self.directory, scope)
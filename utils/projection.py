@@ -0,0 +1,113 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bisect import bisect_right
+from datetime import date
+
+from schemas import DaySchema, RecurrenceSchema, ScheduleSchema, TimeSlotSchema
+from utils.minutes import Span, day_span, span_in_day
+from utils.snapshot import ScheduleSnapshot
+
+SECTIONS = {
+    "days": DaySchema,
+    "timeslots": TimeSlotSchema,
+    "recurrences": RecurrenceSchema,
+}
+
+# Position after the last returned slot: its date, start minute in the day and id
+CursorKey = tuple[date, int, int]
+
+
+def parse_fields(fields: str) -> dict:
+    """
+    Turns ``fields=days,timeslots.start,timeslots.end`` into a pydantic
+    ``include`` spec. A bare section name keeps all of its fields.
+    """
+    include: dict = {}
+    for item in filter(None, (part.strip() for part in fields.split(","))):
+        section, _, field = item.partition(".")
+        schema = SECTIONS.get(section)
+        if schema is None or (field and field not in schema.model_fields):
+            raise ValueError(f"Unknown field {item!r}")
+        if not field:
+            include[section] = True
+        elif include.get(section) is not True:
+            include.setdefault(section, {"__all__": set()})["__all__"].add(field)
+    if not include:
+        raise ValueError("No fields requested")
+    return include
+
+
+def encode_cursor(key: CursorKey) -> str:
+    day_date, start, slot_id = key
+    raw = f"{day_date.isoformat()}:{start}:{slot_id}".encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> CursorKey:
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        day_date, start, slot_id = raw.split(":")
+        return date.fromisoformat(day_date), int(start), int(slot_id)
+    except ValueError as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _slot_key(bounds: Span, slot: TimeSlotSchema) -> tuple[int, int]:
+    return span_in_day(bounds, slot.start, slot.end)[0], slot.id
+
+
+def schedule_page(
+    snapshot: ScheduleSnapshot,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    after: CursorKey | None = None,
+    limit: int | None = None,
+) -> tuple[ScheduleSchema, CursorKey | None]:
+    """
+    Builds the part of the schedule within the date window, reading only the
+    days of the window through the snapshot indexes.
+
+    With ``limit`` at most that many timeslots are returned, ordered by
+    (date, start, id), together with the key to continue after. The key does
+    not depend on positions, so paging survives schedule updates in between.
+    Days are returned together with their first slot on the page.
+    """
+    if after is not None:
+        date_from = max(date_from, after[0]) if date_from else after[0]
+    days: dict[date, DaySchema] = {}
+    slots: list[TimeSlotSchema] = []
+    last_date = None
+    more = False
+    for day_date in snapshot.dates_between(date_from, date_to):
+        day = snapshot.schedule.days[day_date]
+        day_slots = snapshot.sorted_slots(day)
+        if after is not None and day_date == after[0]:
+            bounds = day_span(day)
+            keys = [_slot_key(bounds, slot) for slot in day_slots]
+            day_slots = day_slots[bisect_right(keys, after[1:]) :]
+            if not day_slots:
+                continue
+        room = None if limit is None else limit - len(slots)
+        if room is not None and room <= 0:
+            more = True
+            break
+        days[day_date] = day
+        if room is not None and len(day_slots) > room:
+            day_slots = day_slots[:room]
+            more = True
+        if day_slots:
+            slots += day_slots
+            last_date = day_date
+        if more:
+            break
+
+    rules = [
+        rule
+        for rule in snapshot.schedule.recurrences
+        if (date_to is None or rule.starts_on <= date_to)
+        and (date_from is None or rule.until is None or rule.until >= date_from)
+    ]
+    page = ScheduleSchema(days=days, timeslots=slots, recurrences=rules)
+    if not more:
+        return page, None
+    last_day = days[last_date]  # type: ignore
+    return page, (last_date, *_slot_key(day_span(last_day), slots[-1]))  # type: ignore
@@ -0,0 +1,39 @@
+from datetime import date
+from typing import Iterable, Iterator
+
+from schemas import DaySchema, RecurrenceSchema, TimeSlotSchema, validate_overnight
+
+
+def template_day(rules: Iterable[RecurrenceSchema], day_date: date) -> DaySchema | None:
+    """
+    Builds a day from the first working-hours template that matches the date.
+    Template days get negative ids so they never clash with upstream ones.
+    """
+    for rule in rules:
+        if rule.kind == "working_hours" and rule.occurs_on(day_date):
+            return validate_overnight(
+                DaySchema,
+                id=-day_date.toordinal(),
+                date=day_date,
+                start=rule.start,
+                end=rule.end,
+            )
+    return None
+
+
+def expand_slots(
+    rules: Iterable[RecurrenceSchema], day: DaySchema
+) -> Iterator[TimeSlotSchema]:
+    """
+    Yields occurrences of busy rules on the given day. An occurrence has the
+    negated id of its rule.
+    """
+    for rule in rules:
+        if rule.kind == "busy" and rule.occurs_on(day.date):
+            yield validate_overnight(
+                TimeSlotSchema,
+                id=-rule.id,
+                day_id=day.id,
+                start=rule.start,
+                end=rule.end,
+            )
@@ -1,6 +1,15 @@
+from datetime import tzinfo
+from functools import lru_cache
 from os import environ
+from typing import Literal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field
+from pydantic import BaseModel, Field, field_validator
+
+
+class RouteLimit(BaseModel):
+    limit: int = Field(ge=1, description="Requests of the route handled at once")
+    priority: int = Field(0, description="Lower values are admitted first")
 
 
 class SettingsBase(BaseSettings):
@@ -22,12 +31,181 @@ class Settings(SettingsBase):
     model_config = SettingsConfigDict(env_prefix="API_")
 
     URL: str = Field("localhost")
+    TIMEZONE: str = Field(
+        "UTC", description="IANA time zone of the wall clock times in the schedule"
+    )
+
+    AVAILABILITY_ENGINE: Literal["intervals", "bitmap"] = Field(
+        "intervals", description="Free time engine: merged intervals or minute bitmap"
+    )
+
+    COMPUTE_EXECUTOR: Literal["inline", "thread", "process"] = Field(
+        "inline", description="Where scans over the whole schedule run"
+    )
+    COMPUTE_WORKERS: int = Field(2, ge=1, description="Compute pool size")
+    COMPUTE_OFFLOAD_COST: int = Field(
+        100_000,
+        ge=0,
+        description="Schedule cost (days and slots scanned) sent to the pool",
+    )
+
+    ADMISSION_ENABLED: bool = Field(True, description="Shed load of listed routes")
+    ADMISSION_CONCURRENCY: int = Field(
+        32, ge=1, description="Requests of listed routes handled at once in total"
+    )
+    ADMISSION_QUEUE_SIZE: int = Field(
+        64, ge=0, description="Waiting requests per route before 503"
+    )
+    ADMISSION_QUEUE_TIMEOUT: float = Field(
+        2, ge=0, description="Seconds a request may wait for admission"
+    )
+    ADMISSION_ROUTES: dict[str, RouteLimit] = Field(
+        {
+            "/": RouteLimit(limit=16),
+            "/{date_format}/taken_slots": RouteLimit(limit=32),
+            "/{date_format}/free_intervals": RouteLimit(limit=32),
+            "/{date_format}/is_free": RouteLimit(limit=32),
+            "/{date_format}/book": RouteLimit(limit=32),
+            "/{date_format}/nearest": RouteLimit(limit=32),
+            "/find_free_interval": RouteLimit(limit=4, priority=1),
+            "/utilization": RouteLimit(limit=8, priority=1),
+        },
+        description="Admission limits by route path, unlisted routes are not gated",
+    )
+
+    WARMUP_ENABLED: bool = Field(
+        True, description="Prepare popular dates after every schedule swap"
+    )
+    WARMUP_DAYS: int = Field(15, ge=0, description="Dates from today to prepare")
+    WARMUP_TOP_DATES: int = Field(
+        32, ge=0, description="Most requested dates to prepare as well"
+    )
+    WARMUP_CPU_SHARE: float = Field(
+        0.25, gt=0, le=1, description="Largest share of event loop time for warming"
+    )
+
+    SNAPSHOT_HISTORY: int = Field(
+        8, ge=1, description="Schedule versions kept for as_of queries"
+    )
+
+    STORAGE_BACKEND: Literal["http", "sqlite"] = Field(
+        "http", description="Fetch upstream per request or read a synced SQLite copy"
+    )
+    SQLITE_PATH: str = Field("schedule.db", description="SQLite database file")
+    SQLITE_POOL_SIZE: int = Field(4, ge=1, description="SQLite connections")
+    SYNC_INTERVAL: float = Field(
+        30, gt=0, description="Seconds between upstream syncs of the local copy"
+    )
+    SYNC_ENABLED: bool = Field(
+        True, description="Sync the SQLite copy from upstream, off for pushed data"
+    )
+
+    COMPRESSION_ENABLED: bool = Field(True, description="Compress response bodies")
+    COMPRESSION_MIN_SIZE: int = Field(
+        1024, ge=0, description="Smallest body in bytes that gets compressed"
+    )
+    COMPRESSION_LEVEL: int = Field(
+        6, ge=1, le=9, description="Compression level for gzip, brotli and zstd"
+    )
+
+    SUBSCRIPTION_POLL_INTERVAL: float = Field(
+        5, gt=0, description="Seconds between schedule checks for SSE subscribers"
+    )
+    SUBSCRIPTION_KEEPALIVE: float = Field(
+        15, gt=0, description="Seconds between SSE keep-alive comments"
+    )
+    SUBSCRIPTION_QUEUE_SIZE: int = Field(
+        64, ge=1, description="Pending events before a slow subscriber is dropped"
+    )
+    SUBSCRIPTION_MAX_DATES: int = Field(
+        100, ge=1, description="Dates allowed in one subscription"
+    )
+
+    BOOKING_TTL: float = Field(
+        900, gt=0, description="Seconds a booking stays pending without upstream"
+    )
+
+    ADMIN_TOKEN: str = Field(
+        "", description="Token for the /admin endpoints, empty disables them"
+    )
+
+    INGEST_TOKEN: str = Field(
+        "", description="Token for the /ingest endpoints, empty disables them"
+    )
+    INGEST_MAX_BYTES: int = Field(
+        1 << 30, ge=1, description="Largest pushed body in bytes"
+    )
+    INGEST_MAX_LINE: int = Field(
+        65536, ge=1, description="Longest NDJSON line of a push in bytes"
+    )
+    INGEST_BATCH: int = Field(
+        5000, ge=1, description="Records written to SQLite per batch of a push"
+    )
+
+    PROFILING_ENABLED: bool = Field(False, description="Enable per-request profiling")
+    PROFILING_HEADER: str = Field(
+        "X-Profile", description="Request header that turns profiling on"
+    )
+    PROFILING_SAMPLE_RATE: float = Field(
+        0.0, ge=0, le=1, description="Share of profiled requests dumped with cProfile"
+    )
+    PROFILING_DIR: str = Field("profiles", description="Directory for cProfile dumps")
+
+    CAPTURE_ENABLED: bool = Field(
+        False, description="Record sampled requests for replay"
+    )
+    CAPTURE_SAMPLE_RATE: float = Field(
+        0.01, ge=0, le=1, description="Share of requests recorded"
+    )
+    CAPTURE_PATH: str = Field(
+        "capture/requests.jsonl.gz", description="Capture log of recorded requests"
+    )
+    CAPTURE_MAX_BODY: int = Field(
+        65536, ge=0, description="Requests with larger bodies are not recorded"
+    )
+
+    MEMORY_TRACING: bool = Field(
+        False, description="Trace allocations with tracemalloc for memory reports"
+    )
+    MEMORY_TRACE_FRAMES: int = Field(
+        1, ge=1, description="Stack frames stored per traced allocation"
+    )
+    MEMORY_REPORT_INTERVAL: float = Field(
+        0, ge=0, description="Seconds between logged memory reports, 0 disables"
+    )
+
+    LOOP_MONITOR_ENABLED: bool = Field(
+        False, description="Measure event loop lag and log blocking handlers"
+    )
+    LOOP_MONITOR_INTERVAL: float = Field(
+        0.05, gt=0, description="Seconds between event loop lag probes"
+    )
+    LOOP_MONITOR_THRESHOLD: float = Field(
+        0.1, gt=0, description="Blocked seconds after which the stack is logged"
+    )
+    LOOP_MONITOR_WINDOW: int = Field(
+        2048, ge=1, description="Recent lag samples used for percentiles"
+    )
+
+    @field_validator("TIMEZONE")
+    @classmethod
+    def check_timezone(cls, value: str) -> str:
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError) as exc:
+            raise ValueError(f"Unknown time zone {value!r}") from exc
+        return value
+
+    @property
+    def zone(self) -> tzinfo:
+        return ZoneInfo(self.TIMEZONE)
 
     @classmethod
     def load(cls) -> "Settings":
         return cls()  # type: ignore
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     env = environ.get("ENV", "local")
     if env == "local":
@@ -38,8 +216,23 @@ def get_settings() -> Settings:
     return Settings.load()  # type: ignore
 
 
-config = get_settings()
+def reload_settings() -> Settings:
+    """
+    Drops the cached settings and reads environment and .env again.
+
+    Routes and middleware keep the settings they were created with, only code
+    that calls ``get_settings()`` or depends on it sees the new values.
+    """
+    get_settings.cache_clear()
+    return get_settings()
+
+
+def __getattr__(name: str):
+    # `config` used to be built at import time, it is now created on first use
+    if name == "config":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    print(config)
+    print(get_settings())
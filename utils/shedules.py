@@ -1,21 +1,57 @@
-import aiohttp
 from fastapi import HTTPException
 
-from schemas import DaySchema, TimeSlotSchema, ScheduleSchema
-from utils import get_settings
+from schemas import (
+    OVERNIGHT,
+    DaySchema,
+    RecurrenceSchema,
+    TimeSlotSchema,
+    ScheduleSchema,
+)
+from utils import Settings, get_settings
+from utils.imports import lazy_import
+from utils.memory import track_peak
+from utils.profiling import stage
+from utils.snapshot import ScheduleSnapshot, publish_schedule
 
+aiohttp = lazy_import("aiohttp")
 
-async def get_schedule() -> ScheduleSchema:
+
+def parse_schedule(data: dict) -> ScheduleSchema:
+    # Upstream days, slots and rules may run over midnight
+    days = {}
+    for day in data.get("days", []):
+        day = DaySchema.model_validate(day, context=OVERNIGHT)
+        days[day.date] = day
+    timeslots = [
+        TimeSlotSchema.model_validate(slot, context=OVERNIGHT)
+        for slot in data.get("timeslots", [])
+    ]
+    recurrences = [
+        RecurrenceSchema.model_validate(rule, context=OVERNIGHT)
+        for rule in data.get("recurrences", [])
+    ]
+
+    return ScheduleSchema(days=days, timeslots=timeslots, recurrences=recurrences)
+
+
+async def get_schedule(settings: Settings | None = None) -> ScheduleSchema:
+    """
+    Fetches and parses the upstream schedule. Callers pass the settings they
+    were given, the cached ``get_settings()`` is only a fallback.
+    """
+    url = (settings or get_settings()).URL
     async with aiohttp.ClientSession() as session:
-        req = await session.get(get_settings().URL)
-        if req.status != 200:
-            raise HTTPException(status_code=req.status, detail="Failed to fetch data")
-
-        data = await req.json()
-        days = {}
-        for day in data.get("days", []):
-            day = DaySchema(**day)
-            days[day.date] = day
-        timeslots = [TimeSlotSchema(**slot) for slot in data.get("timeslots", [])]
-
-        return ScheduleSchema(days=days, timeslots=timeslots)
+        with stage("fetch"):
+            req = await session.get(url)
+            if req.status != 200:
+                raise HTTPException(
+                    status_code=req.status, detail="Failed to fetch data"
+                )
+
+            data = await req.json()
+        with stage("parse"), track_peak("parse"):
+            return parse_schedule(data)
+
+
+async def get_schedule_snapshot(settings: Settings | None = None) -> ScheduleSnapshot:
+    return publish_schedule(await get_schedule(settings))
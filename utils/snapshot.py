@@ -0,0 +1,416 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, time, timezone
+from functools import cached_property
+from itertools import count
+from typing import Iterator
+
+from schemas import (
+    DaySchema,
+    IntervalSchema,
+    RecurrenceSchema,
+    ScheduleSchema,
+    TimeSlotSchema,
+)
+from utils.aggregates import UtilizationIndex
+from utils.bitmap import DayBitmap
+from utils.minutes import Span, day_span, free_spans, merge_spans, span_in_day
+from utils.nearest import GapIndex
+from utils.recurrence import expand_slots, template_day
+from utils.time_manager import slot_spans, to_intervals
+
+
+class DayView:
+    """
+    Slots of one day and the data derived from them, computed on first access.
+
+    Computations run on minute spans in the day's frame (see ``utils.minutes``),
+    ``busy`` and ``free`` convert them to schemas for the API. ``slots`` are the
+    explicit slots of the day followed by the ones expanded from ``rules``.
+
+    A view never changes once built, so schedule versions in which the day is
+    the same share it, together with everything it has computed.
+    """
+
+    def __init__(
+        self,
+        day: DaySchema,
+        slots: list[TimeSlotSchema],
+        rules: list[RecurrenceSchema] | None = None,
+    ) -> None:
+        self.day = day
+        self.explicit_slots = slots
+        self.rules = rules or []
+        # Encoded responses built from this view, see api.main_router
+        self.responses: dict = {}
+
+    @cached_property
+    def slots(self) -> list[TimeSlotSchema]:
+        if not self.rules:
+            return self.explicit_slots
+        return self.explicit_slots + list(expand_slots(self.rules, self.day))
+
+    @cached_property
+    def bounds(self) -> Span:
+        return day_span(self.day)
+
+    def span(self, start: time, end: time) -> Span:
+        return span_in_day(self.bounds, start, end)
+
+    def minute(self, value: time) -> int:
+        return span_in_day(self.bounds, value, value)[0]
+
+    @cached_property
+    def busy_spans(self) -> list[Span]:
+        return merge_spans(self.bounds, slot_spans(self.bounds, self.slots))
+
+    @cached_property
+    def free_spans(self) -> list[Span]:
+        return free_spans(self.bounds, self.busy_spans)
+
+    @cached_property
+    def gap_index(self) -> GapIndex:
+        return GapIndex(self.free_spans)
+
+    @cached_property
+    def busy(self) -> list[IntervalSchema]:
+        return to_intervals(self.busy_spans)
+
+    @cached_property
+    def free(self) -> list[IntervalSchema]:
+        return to_intervals(self.free_spans)
+
+    @cached_property
+    def bitmap(self) -> DayBitmap:
+        return DayBitmap.from_slots(self.slots, self.bounds)
+
+
+# Consecutive dates per block of a DayMap
+BLOCK_DAYS = 32
+# Day views kept for dates read by requests rather than listed in the schedule
+CACHED_VIEWS = 1024
+
+
+class ViewCache:
+    """
+    Day views by date, the least recently read dropped above ``size``.
+
+    Holds views that are cheap to rebuild, so that clients stepping through
+    arbitrary dates do not grow memory without bound.
+    """
+
+    def __init__(self, size: int = CACHED_VIEWS) -> None:
+        self.size = size
+        self._views: OrderedDict[date, DayView | None] = OrderedDict()
+
+    def __contains__(self, day_date: date) -> bool:
+        return day_date in self._views
+
+    def __iter__(self) -> Iterator[date]:
+        return iter(self._views)
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+    def get(self, day_date: date) -> DayView | None:
+        view = self._views.get(day_date)
+        if day_date in self._views:
+            self._views.move_to_end(day_date)
+        return view
+
+    def put(self, day_date: date, view: DayView | None) -> None:
+        self._views[day_date] = view
+        self._views.move_to_end(day_date)
+        while len(self._views) > self.size:
+            self._views.popitem(last=False)
+
+    def pop(self, day_date: date) -> None:
+        self._views.pop(day_date, None)
+
+    def copy(self) -> "ViewCache":
+        cache = ViewCache(self.size)
+        cache._views = self._views.copy()  # pylint: disable=protected-access
+        return cache
+
+    def values(self) -> list[DayView | None]:
+        return list(self._views.values())
+
+
+class DayMap:
+    """
+    Day views of one schedule version, in blocks of ``BLOCK_DAYS`` consecutive
+    dates.
+
+    A version is built from the previous one: views of days that did not
+    change are reused, and so are whole blocks without changes, so that a new
+    version costs a pointer per block plus the changed days. Template-only
+    dates are cached in a ``ViewCache`` shared by versions with the same rules.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        blocks: dict[int, dict[date, DayView]],
+        rules: list[RecurrenceSchema],
+        templates: ViewCache,
+        changed: int,
+    ) -> None:
+        self.version = version
+        self.blocks = blocks
+        self.rules = rules
+        self.templates = templates
+        self.changed = changed
+        self.created_at = datetime.now(timezone.utc)
+
+    @classmethod
+    def build(
+        cls,
+        version: int,
+        days: dict[date, DaySchema],
+        slots_by_day: dict[int, list[TimeSlotSchema]],
+        rules: list[RecurrenceSchema],
+        previous: "DayMap | None" = None,
+    ) -> "DayMap":
+        if previous is not None and previous.rules != rules:
+            previous = None
+        grouped: dict[int, list[date]] = {}
+        for day_date in days:
+            grouped.setdefault(day_date.toordinal() // BLOCK_DAYS, []).append(day_date)
+        blocks, reused, existed = {}, 0, 0
+        for key, dates in grouped.items():
+            old = previous.blocks.get(key, {}) if previous is not None else {}
+            block = {}
+            for day_date in dates:
+                day = days[day_date]
+                slots = slots_by_day.get(day.id, [])
+                view = old.get(day_date)
+                existed += view is not None
+                if view is None or view.day != day or view.explicit_slots != slots:
+                    view = DayView(day, slots, rules)
+                else:
+                    reused += 1
+                block[day_date] = view
+            same = len(block) == len(old) and all(
+                view is old.get(day_date) for day_date, view in block.items()
+            )
+            blocks[key] = old if same else block
+        # Days added, changed or removed since the previous version
+        changed = len(days) - reused
+        if previous is not None:
+            changed += sum(map(len, previous.blocks.values())) - existed
+        templates = previous.templates if previous is not None else ViewCache()
+        return cls(version, blocks, rules, templates, changed)
+
+    def keeps(self, day_date: date) -> bool:  # pylint: disable=unused-argument
+        return True
+
+    def day(self, day_date: date) -> DayView | None:
+        """
+        The view of a date, falling back to working-hours templates for dates
+        without an explicit day.
+        """
+        block = self.blocks.get(day_date.toordinal() // BLOCK_DAYS)
+        view = block.get(day_date) if block is not None else None
+        if view is not None:
+            return view
+        if day_date in self.templates:
+            return self.templates.get(day_date)
+        day = template_day(self.rules, day_date)
+        view = None if day is None else DayView(day, [], self.rules)
+        self.templates.put(day_date, view)
+        return view
+
+    def views(self) -> list[DayView]:
+        views = [view for block in self.blocks.values() for view in block.values()]
+        return views + [view for view in self.templates.values() if view is not None]
+
+
+class LoadedDays:
+    """
+    Day views of one version read date by date, for storages that do not load
+    the whole schedule. Only the dates read while the version was current are
+    known, see ``keeps()``, and at most ``CACHED_VIEWS`` of them.
+
+    After a patch the next version starts from a copy without the patched
+    dates, so the views of other days are shared.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        rules: list[RecurrenceSchema],
+        views: ViewCache | None = None,
+        changed: int = 0,
+    ) -> None:
+        self.version = version
+        self.rules = rules
+        self.views = views if views is not None else ViewCache()
+        self.changed = changed
+        self.created_at = datetime.now(timezone.utc)
+
+    def keeps(self, day_date: date) -> bool:
+        return day_date in self.views
+
+    def day(self, day_date: date) -> DayView | None:
+        return self.views.get(day_date)
+
+    def put(self, day_date: date, view: DayView | None) -> None:
+        self.views.put(day_date, view)
+
+    def patched(self, version: int, dates: set[date]) -> "LoadedDays":
+        views = self.views.copy()
+        for day_date in dates:
+            views.pop(day_date)
+        return LoadedDays(version, self.rules, views, len(dates))
+
+
+class VersionHistory:
+    """
+    Day maps of the last ``keep`` schedule versions, oldest dropped first.
+    """
+
+    def __init__(self, keep: int = 8) -> None:
+        self.keep = keep
+        self._maps: OrderedDict[int, DayMap | LoadedDays] = OrderedDict()
+
+    def add(self, days: DayMap | LoadedDays) -> None:
+        self._maps[days.version] = days
+        while len(self._maps) > self.keep:
+            self._maps.popitem(last=False)
+
+    def get(self, version: int) -> DayMap | LoadedDays | None:
+        return self._maps.get(version)
+
+    @property
+    def latest(self) -> DayMap | LoadedDays | None:
+        return next(reversed(self._maps.values()), None)
+
+    def maps(self) -> list[DayMap | LoadedDays]:
+        return list(self._maps.values())
+
+
+class ScheduleSnapshot:
+    """
+    One version of the schedule. Slots are grouped by day once and the views
+    of the days are shared with ``previous`` where the days did not change,
+    so every derived structure is computed at most once per changed day no
+    matter how many requests and versions read it.
+    """
+
+    def __init__(
+        self, schedule: ScheduleSchema, version: int, previous: DayMap | None = None
+    ) -> None:
+        self.schedule = schedule
+        self.version = version
+        self.responses: dict = {}
+        self._sorted_slots: dict[int, list[TimeSlotSchema]] = {}
+        self.days_map = DayMap.build(
+            version,
+            schedule.days,
+            self._slots_by_day,
+            schedule.recurrences,
+            previous,
+        )
+
+    @cached_property
+    def _slots_by_day(self) -> dict[int, list[TimeSlotSchema]]:
+        slots_by_day: dict[int, list[TimeSlotSchema]] = {}
+        for slot in self.schedule.timeslots:
+            slots_by_day.setdefault(slot.day_id, []).append(slot)
+        return slots_by_day
+
+    @cached_property
+    def _dates(self) -> list[date]:
+        return sorted(self.schedule.days)
+
+    @cached_property
+    def cost(self) -> int:
+        """
+        Rough work of a scan over all days: days, their slots and the
+        recurrence rules expanded for every day.
+        """
+        days = len(self.schedule.days)
+        return (
+            days + len(self.schedule.timeslots) + days * len(self.schedule.recurrences)
+        )
+
+    @cached_property
+    def utilization(self) -> UtilizationIndex:
+        return UtilizationIndex(self.days())
+
+    def dates_between(
+        self, date_from: date | None = None, date_to: date | None = None
+    ) -> list[date]:
+        """
+        Sorted dates of explicit days in [date_from, date_to], found by bisection.
+        """
+        low = bisect_left(self._dates, date_from) if date_from else 0
+        high = bisect_right(self._dates, date_to) if date_to else len(self._dates)
+        return self._dates[low:high]
+
+    def sorted_slots(self, day: DaySchema) -> list[TimeSlotSchema]:
+        """
+        Upstream slots of a day ordered by (start minute in the day, id), the
+        pagination key.
+        """
+        slots = self._sorted_slots.get(day.id)
+        if slots is None:
+            bounds = day_span(day)
+            slots = self._sorted_slots[day.id] = sorted(
+                self._slots_by_day.get(day.id, []),
+                key=lambda slot: (
+                    span_in_day(bounds, slot.start, slot.end)[0],
+                    slot.id,
+                ),
+            )
+        return slots
+
+    def slots(self, day: DaySchema) -> list[TimeSlotSchema]:
+        """
+        Upstream slots of a day followed by the ones expanded from recurrences.
+        """
+        slots = self._slots_by_day.get(day.id, [])
+        if self.schedule.recurrences:
+            slots = slots + list(expand_slots(self.schedule.recurrences, day))
+        return slots
+
+    def day(self, day_date: date) -> DayView | None:
+        """
+        Returns the view of a date. Dates without an explicit day fall back to
+        working-hours templates.
+        """
+        return self.days_map.day(day_date)
+
+    def built(self) -> list[DayView]:
+        """
+        Views of this version, explicit days and the templates built so far.
+        """
+        return self.days_map.views()
+
+    def days(self) -> Iterator[DayView]:
+        """
+        Iterates over days listed in the schedule. Template-only dates have no
+        upper bound and are only reachable through ``day()``.
+        """
+        for day_date in self.schedule.days:
+            yield self.day(day_date)  # type: ignore
+
+
+_versions = count(1)
+_current: ScheduleSnapshot | None = None
+
+
+def publish_schedule(schedule: ScheduleSchema) -> ScheduleSnapshot:
+    """
+    Returns the current snapshot if the schedule did not change, otherwise
+    swaps in a new version that shares unchanged days with the current one.
+    """
+    global _current  # pylint: disable=global-statement
+    if _current is None or _current.schedule != schedule:
+        previous = _current.days_map if _current is not None else None
+        _current = ScheduleSnapshot(schedule, next(_versions), previous)
+    return _current
+
+
+def get_current_snapshot() -> ScheduleSnapshot | None:
+    return _current
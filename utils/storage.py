@@ -0,0 +1,664 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from datetime import date
+
+from schemas import (
+    DaySchema,
+    RecurrenceSchema,
+    ScheduleSchema,
+    TimeSlotSchema,
+    validate_overnight,
+)
+from utils.ingest import IngestBusy, IngestError, IngestStream
+from utils.minutes import to_minutes, to_time
+from utils.profiling import stage
+from utils.settings import Settings
+from utils.recurrence import template_day
+from utils.snapshot import (
+    DayMap,
+    DayView,
+    LoadedDays,
+    ScheduleSnapshot,
+    VersionHistory,
+    ViewCache,
+    get_current_snapshot,
+)
+from utils.shedules import get_schedule, get_schedule_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleStorage:
+    """
+    Source of schedule data for the endpoints.
+
+    ``snapshot()`` serves whole-schedule queries, ``day()`` serves per-date
+    queries and may avoid loading anything but the requested day.
+
+    ``on_swap`` is called after a new schedule version becomes visible, and
+    ``history`` keeps the day maps of recent versions for ``as_of()``.
+    Only storages with ``supports_ingest`` accept pushes through ``ingest()``.
+    ``settings`` are the ones upstream fetches use, they are replaced on
+    every request so dependency overrides and reloads apply.
+    """
+
+    on_swap: Callable[[], None] | None = None
+    settings: Settings | None = None
+    history: VersionHistory | None = None
+    supports_ingest = False
+
+    def _swapped(self) -> None:
+        if self.on_swap is not None:
+            self.on_swap()
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def snapshot(self) -> ScheduleSnapshot:
+        raise NotImplementedError
+
+    def held(self) -> tuple[ScheduleSnapshot | None, list[DayView]]:
+        """
+        Schedule version and separately cached day views kept in memory.
+        """
+        return None, []
+
+    def as_of(self, version: int) -> DayMap | None:
+        """
+        Days of a kept schedule version, None once it is dropped.
+        """
+        return None if self.history is None else self.history.get(version)
+
+    async def day(self, day_date: date, refresh: bool = True) -> DayView | None:
+        raise NotImplementedError
+
+    async def ingest(self, stream: IngestStream, batch_size: int = 5000) -> int:
+        """
+        Stores a pushed schedule or patch atomically, returns the new version.
+        """
+        raise NotImplementedError
+
+
+class HttpStorage(ScheduleStorage):
+    """
+    Fetches the schedule from the upstream on every call. Versions it served
+    are kept in its own ``history``.
+    """
+
+    _version: int | None = None
+
+    def __init__(self, history_size: int = 8) -> None:
+        self.history = VersionHistory(history_size)
+
+    def _served(self, snapshot: ScheduleSnapshot) -> ScheduleSnapshot:
+        if snapshot.version != self._version:
+            self._version = snapshot.version
+            self.history.add(snapshot.days_map)
+            self._swapped()
+        return snapshot
+
+    async def snapshot(self) -> ScheduleSnapshot:
+        return self._served(await get_schedule_snapshot(self.settings))
+
+    def held(self) -> tuple[ScheduleSnapshot | None, list[DayView]]:
+        return get_current_snapshot(), []
+
+    async def day(self, day_date: date, refresh: bool = True) -> DayView | None:
+        snapshot = None if refresh else get_current_snapshot()
+        if snapshot is None:
+            snapshot = await self.snapshot()
+        else:
+            self._served(snapshot)
+        with stage("filter"):
+            return snapshot.day(day_date)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL UNIQUE,
+    start INTEGER NOT NULL,
+    "end" INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS timeslots (
+    id INTEGER NOT NULL,
+    day_id INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    "end" INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS timeslots_day_interval ON timeslots (day_id, start, "end");
+CREATE TABLE IF NOT EXISTS recurrences (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    freq TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    weekdays TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    "end" INTEGER NOT NULL,
+    starts_on TEXT NOT NULL,
+    until TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS changes (version INTEGER NOT NULL, date TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS changes_version ON changes (version);
+"""
+
+# Dates of the last versions are kept in `changes`, a replaced schedule is "*"
+KEPT_CHANGES = 256
+# Pushed records are staged per connection before the write transaction
+STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS staged_days (
+    line INTEGER, id INTEGER, date TEXT, start INTEGER, "end" INTEGER
+);
+CREATE TEMP TABLE IF NOT EXISTS staged_timeslots (
+    line INTEGER, id INTEGER, day_id INTEGER, start INTEGER, "end" INTEGER
+);
+CREATE TEMP TABLE IF NOT EXISTS staged_recurrences (
+    line INTEGER, id INTEGER, kind TEXT, freq TEXT, interval INTEGER,
+    weekdays TEXT, start INTEGER, "end" INTEGER, starts_on TEXT, until TEXT
+);
+CREATE TEMP TABLE IF NOT EXISTS staged_deletes (line INTEGER, date TEXT);
+"""
+UNSTAGE = """
+DELETE FROM staged_days;
+DELETE FROM staged_timeslots;
+DELETE FROM staged_recurrences;
+DELETE FROM staged_deletes;
+"""
+STAGED_DATES = "SELECT date FROM staged_days UNION SELECT date FROM staged_deletes"
+BUMP_VERSION = (
+    "INSERT INTO meta VALUES ('version', '1') "
+    "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+)
+
+
+def _day_row(day: DaySchema) -> tuple:
+    return day.id, day.date.isoformat(), to_minutes(day.start), to_minutes(day.end)
+
+
+def _slot_row(slot: TimeSlotSchema) -> tuple:
+    return slot.id, slot.day_id, to_minutes(slot.start), to_minutes(slot.end)
+
+
+def _rule_row(rule: RecurrenceSchema) -> tuple:
+    return (
+        rule.id,
+        rule.kind,
+        rule.freq,
+        rule.interval,
+        json.dumps(rule.weekdays),
+        to_minutes(rule.start),
+        to_minutes(rule.end),
+        rule.starts_on.isoformat(),
+        rule.until.isoformat() if rule.until else None,
+    )
+
+
+def _delete_row(day_date: date) -> tuple:
+    return (day_date.isoformat(),)
+
+
+STAGED_ROWS = {
+    "day": ("INSERT INTO staged_days VALUES (?, ?, ?, ?, ?)", _day_row),
+    "timeslot": ("INSERT INTO staged_timeslots VALUES (?, ?, ?, ?, ?)", _slot_row),
+    "recurrence": (
+        "INSERT INTO staged_recurrences VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        _rule_row,
+    ),
+    "delete": ("INSERT INTO staged_deletes VALUES (?, ?)", _delete_row),
+}
+
+
+def _record_changes(connection: sqlite3.Connection, dates: list[str]) -> int:
+    connection.execute(BUMP_VERSION)
+    version = int(
+        connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+    )
+    connection.executemany(
+        "INSERT INTO changes VALUES (?, ?)", ((version, d) for d in dates)
+    )
+    if dates == ["*"]:
+        # Counted while writing, so that readers never scan the days
+        connection.execute(
+            "INSERT INTO meta VALUES ('days', (SELECT COUNT(*) FROM days)) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+        )
+    connection.execute(
+        "DELETE FROM changes WHERE version <= ?", (version - KEPT_CHANGES,)
+    )
+    return version
+
+
+class SQLitePool:
+    """
+    Small pool of SQLite connections used from worker threads.
+    """
+
+    def __init__(self, path: str, size: int) -> None:
+        self.path = path
+        self.size = size
+        self._connections: asyncio.Queue[sqlite3.Connection] | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    async def open(self) -> None:
+        if self._connections is not None:
+            return
+        connections = [await asyncio.to_thread(self._connect) for _ in range(self.size)]
+        self._connections = asyncio.Queue()
+        for connection in connections:
+            self._connections.put_nowait(connection)
+
+    async def close(self) -> None:
+        if self._connections is None:
+            return
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+        self._connections = None
+
+    @asynccontextmanager
+    async def connection(self):
+        await self.open()
+        pool = self._connections
+        connection = await pool.get()  # type: ignore
+        try:
+            yield connection
+        finally:
+            pool.put_nowait(connection)  # type: ignore
+
+    async def run(self, func, *args):
+        async with self.connection() as connection:
+            return await asyncio.to_thread(func, connection, *args)
+
+
+class SQLiteStorage(ScheduleStorage):
+    """
+    Local copy of the schedule in SQLite, kept in sync with the upstream by
+    a background job, or filled by pushes through ``ingest()`` when ``sync``
+    is off. Per-date queries read one day through the (day_id, start, end)
+    index instead of the whole schedule. ``as_of()`` answers for the days
+    read while a version was current, and for every day of versions whose
+    whole schedule was loaded.
+    """
+
+    supports_ingest = True
+
+    def __init__(
+        self,
+        path: str,
+        pool_size: int = 4,
+        sync_interval: float = 30,
+        history_size: int = 8,
+        sync: bool = True,
+    ) -> None:
+        self.pool = SQLitePool(path, pool_size)
+        self.sync_interval = sync_interval
+        self.sync_enabled = sync
+        self.history = VersionHistory(history_size)
+        self.synced_digest: str | None = None
+        self._days: LoadedDays | None = None
+        self._snapshot: ScheduleSnapshot | None = None
+        self._initialized = False
+        self._sync_task: asyncio.Task | None = None
+        self._ingest_lock = asyncio.Lock()
+
+    async def _ensure_schema(self) -> None:
+        if not self._initialized:
+            await self.pool.run(lambda connection: connection.executescript(SCHEMA))
+            self._initialized = True
+
+    async def start(self) -> None:
+        await self._ensure_schema()
+        if self.sync_enabled:
+            self._sync_task = asyncio.create_task(self._sync_forever())
+
+    async def close(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+        await self.pool.close()
+
+    async def _sync_forever(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception:  # pylint: disable=broad-exception-caught
+                # The previous copy keeps being served until the upstream recovers
+                logger.exception("Schedule sync failed")
+            await asyncio.sleep(self.sync_interval)
+
+    @staticmethod
+    def _digest(schedule: ScheduleSchema) -> str:
+        return hashlib.sha256(schedule.model_dump_json().encode()).hexdigest()
+
+    async def sync(self) -> None:
+        """
+        Fetches the upstream schedule and stores it when it changed. Only a
+        digest of the last stored schedule is kept, the rows live in SQLite.
+        """
+        schedule = await get_schedule(self.settings)
+        digest = await asyncio.to_thread(self._digest, schedule)
+        if digest != self.synced_digest:
+            await self.replace(schedule)
+            self.synced_digest = digest
+            self._swapped()
+
+    @staticmethod
+    def _replace(connection: sqlite3.Connection, schedule: ScheduleSchema) -> None:
+        with connection:
+            connection.execute("DELETE FROM days")
+            connection.execute("DELETE FROM timeslots")
+            connection.execute("DELETE FROM recurrences")
+            connection.executemany(
+                "INSERT INTO days VALUES (?, ?, ?, ?)",
+                map(_day_row, schedule.days.values()),
+            )
+            connection.executemany(
+                "INSERT INTO timeslots VALUES (?, ?, ?, ?)",
+                map(_slot_row, schedule.timeslots),
+            )
+            connection.executemany(
+                "INSERT INTO recurrences VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                map(_rule_row, schedule.recurrences),
+            )
+            _record_changes(connection, ["*"])
+
+    async def replace(self, schedule: ScheduleSchema) -> None:
+        await self._ensure_schema()
+        await self.pool.run(self._replace, schedule)
+
+    @staticmethod
+    def _stage(connection: sqlite3.Connection, batch: list) -> None:
+        for number, kind, value in batch:
+            sql, row = STAGED_ROWS[kind]
+            connection.execute(sql, (number, *row(value)))
+
+    @staticmethod
+    def _unstage(connection: sqlite3.Connection) -> None:
+        connection.rollback()
+        connection.executescript(UNSTAGE)
+
+    @staticmethod
+    def _apply(connection: sqlite3.Connection, full: bool, dates: list[str]) -> int:
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as exc:
+            raise IngestBusy("The schedule is being written by another worker") from exc
+        try:
+            if full:
+                connection.execute("DELETE FROM days")
+                connection.execute("DELETE FROM timeslots")
+                connection.execute("DELETE FROM recurrences")
+            else:
+                connection.execute(
+                    "DELETE FROM timeslots WHERE day_id IN "
+                    f"(SELECT id FROM days WHERE date IN ({STAGED_DATES}))"
+                )
+                connection.execute(f"DELETE FROM days WHERE date IN ({STAGED_DATES})")
+            try:
+                connection.execute(
+                    'INSERT INTO days SELECT id, date, start, "end" '
+                    "FROM staged_days ORDER BY line"
+                )
+            except sqlite3.IntegrityError as exc:
+                number, day_id = connection.execute(
+                    "SELECT staged.line, staged.id FROM staged_days AS staged "
+                    "JOIN days ON days.id = staged.id ORDER BY staged.line LIMIT 1"
+                ).fetchone()
+                raise IngestError(
+                    number, f"Day id {day_id} is already used by another date"
+                ) from exc
+            connection.execute(
+                'INSERT INTO timeslots SELECT id, day_id, start, "end" '
+                "FROM staged_timeslots ORDER BY line"
+            )
+            connection.execute(
+                "INSERT INTO recurrences SELECT id, kind, freq, interval, weekdays, "
+                'start, "end", starts_on, until FROM staged_recurrences ORDER BY line'
+            )
+            version = _record_changes(connection, dates)
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        return version
+
+    async def ingest(self, stream: IngestStream, batch_size: int = 5000) -> int:
+        """
+        Stages the records in temporary tables of a pool connection, then
+        applies them in one short write transaction, so readers in every
+        worker see either the previous schedule or the whole push and the
+        write lock is not held while the body is read. A patch replaces only
+        the days it lists, with their timeslots.
+        """
+        await self._ensure_schema()
+        if self._ingest_lock.locked():
+            raise IngestBusy("Another push is in progress")
+        async with self._ingest_lock, self.pool.connection() as connection:
+            await asyncio.to_thread(connection.executescript, STAGING)
+            try:
+                batch: list = []
+                async for record in stream:
+                    batch.append(record)
+                    if len(batch) >= batch_size:
+                        await asyncio.to_thread(self._stage, connection, batch)
+                        batch = []
+                await asyncio.to_thread(self._stage, connection, batch)
+                await asyncio.to_thread(connection.commit)
+                dates = (
+                    ["*"]
+                    if stream.full
+                    else sorted(day.isoformat() for day in stream.dates)
+                )
+                version = await asyncio.to_thread(
+                    self._apply, connection, stream.full, dates
+                )
+            finally:
+                await asyncio.to_thread(self._unstage, connection)
+        self._swapped()
+        return version
+
+    @staticmethod
+    def _read_version(connection: sqlite3.Connection) -> int:
+        row = connection.execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    @classmethod
+    def _read_changes(
+        cls, connection: sqlite3.Connection, since: int
+    ) -> tuple[int, list[tuple[int, str]], int]:
+        # All reads in one transaction see the same version
+        connection.execute("BEGIN")
+        try:
+            version = cls._read_version(connection)
+            rows = connection.execute(
+                "SELECT version, date FROM changes WHERE version > ?", (since,)
+            ).fetchall()
+            days = connection.execute(
+                "SELECT value FROM meta WHERE key = 'days'"
+            ).fetchone()
+        finally:
+            connection.commit()
+        return version, rows, int(days[0]) if days else 0
+
+    @staticmethod
+    def _read_rules(connection: sqlite3.Connection) -> list[RecurrenceSchema]:
+        rows = connection.execute(
+            'SELECT id, kind, freq, interval, weekdays, start, "end", starts_on, until '
+            "FROM recurrences ORDER BY id"
+        ).fetchall()
+        return [
+            validate_overnight(
+                RecurrenceSchema,
+                id=rule_id,
+                kind=kind,
+                freq=freq,
+                interval=interval,
+                weekdays=json.loads(weekdays),
+                start=to_time(start),
+                end=to_time(end),
+                starts_on=date.fromisoformat(starts_on),
+                until=date.fromisoformat(until) if until else None,
+            )
+            for rule_id, kind, freq, interval, weekdays, start, end, starts_on, until in rows
+        ]
+
+    async def _check_version(self) -> LoadedDays:
+        """
+        Starts the days of a new version when one was stored and records them
+        in ``history``. When every version since the current one only patched
+        some dates, views of other days are kept.
+        """
+        await self._ensure_schema()
+        current = self._days
+        since = current.version if current is not None else 0
+        version, changes, count = await self.pool.run(self._read_changes, since)
+        if current is not None and version == current.version:
+            return current
+        dates = {day for _, day in changes}
+        patched = (
+            current is not None
+            and "*" not in dates
+            and {number for number, _ in changes} == set(range(since + 1, version + 1))
+        )
+        if patched:
+            days = current.patched(version, set(map(date.fromisoformat, dates)))
+        else:
+            rules = await self.pool.run(self._read_rules)
+            days = LoadedDays(version, rules, changed=count)
+        if self._days is current:
+            self._days = days
+            self._snapshot = None
+            self.history.add(days)
+        return self._days
+
+    def held(self) -> tuple[ScheduleSnapshot | None, list[DayView]]:
+        views = self._days.views.values() if self._days is not None else []
+        return self._snapshot, [view for view in views if view is not None]
+
+    @staticmethod
+    def _read_day(connection: sqlite3.Connection, day_date: date):
+        day = connection.execute(
+            'SELECT id, start, "end" FROM days WHERE date = ?', (day_date.isoformat(),)
+        ).fetchone()
+        if day is None:
+            return None, []
+        slots = connection.execute(
+            'SELECT id, start, "end" FROM timeslots WHERE day_id = ? ORDER BY start, "end"',
+            (day[0],),
+        ).fetchall()
+        return day, slots
+
+    async def day(self, day_date: date, refresh: bool = True) -> DayView | None:
+        days = await self._check_version()
+        if self._snapshot is not None:
+            # The loaded version already holds a view of every day
+            return self._snapshot.day(day_date)
+        if days.keeps(day_date):
+            return days.day(day_date)
+        with stage("fetch"):
+            row, rows = await self.pool.run(self._read_day, day_date)
+        if row is None:
+            day = template_day(days.rules, day_date)
+            slots = []
+        else:
+            day = validate_overnight(
+                DaySchema,
+                id=row[0],
+                date=day_date,
+                start=to_time(row[1]),
+                end=to_time(row[2]),
+            )
+            slots = [
+                validate_overnight(
+                    TimeSlotSchema,
+                    id=i,
+                    day_id=day.id,
+                    start=to_time(s),
+                    end=to_time(e),
+                )
+                for i, s, e in rows
+            ]
+        view = None if day is None else DayView(day, slots, days.rules)
+        days.put(day_date, view)
+        return view
+
+    @staticmethod
+    def _read_all(connection: sqlite3.Connection):
+        days = connection.execute('SELECT id, date, start, "end" FROM days').fetchall()
+        slots = connection.execute(
+            'SELECT id, day_id, start, "end" FROM timeslots'
+        ).fetchall()
+        return days, slots
+
+    async def snapshot(self) -> ScheduleSnapshot:
+        days = await self._check_version()
+        if self._snapshot is None:
+            rows, slots = await self.pool.run(self._read_all)
+            schedule = ScheduleSchema(
+                days={
+                    date.fromisoformat(d): validate_overnight(
+                        DaySchema,
+                        id=i,
+                        date=date.fromisoformat(d),
+                        start=to_time(s),
+                        end=to_time(e),
+                    )
+                    for i, d, s, e in rows
+                },
+                timeslots=[
+                    validate_overnight(
+                        TimeSlotSchema,
+                        id=i,
+                        day_id=day_id,
+                        start=to_time(s),
+                        end=to_time(e),
+                    )
+                    for i, day_id, s, e in slots
+                ],
+                recurrences=days.rules,
+            )
+            # Views are shared with the last version loaded whole
+            previous = next(
+                (
+                    kept
+                    for kept in reversed(self.history.maps())
+                    if isinstance(kept, DayMap)
+                ),
+                None,
+            )
+            self._snapshot = ScheduleSnapshot(schedule, days.version, previous)
+            # The whole version replaces the days read one by one
+            self.history.add(self._snapshot.days_map)
+            days.views = ViewCache()
+        return self._snapshot
+
+
+def create_storage(settings: Settings) -> ScheduleStorage:
+    if settings.STORAGE_BACKEND == "sqlite":
+        storage = SQLiteStorage(
+            settings.SQLITE_PATH,
+            pool_size=settings.SQLITE_POOL_SIZE,
+            sync_interval=settings.SYNC_INTERVAL,
+            history_size=settings.SNAPSHOT_HISTORY,
+            sync=settings.SYNC_ENABLED,
+        )
+    else:
+        storage = HttpStorage(settings.SNAPSHOT_HISTORY)
+    storage.settings = settings
+    return storage
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from datetime import date
+
+from schemas import AvailabilityDeltaSchema, DayAvailabilitySchema, IntervalSchema
+from utils.booking import bookings
+from utils.snapshot import DayView
+from utils.storage import ScheduleStorage
+
+logger = logging.getLogger(__name__)
+
+
+def _free(view: DayView | None) -> list[IntervalSchema]:
+    return [] if view is None else view.free
+
+
+def _event(name: str, data: bytes) -> bytes:
+    return b"event: " + name.encode() + b"\ndata: " + data + b"\n\n"
+
+
+def state_event(day_date: date, view: DayView | None) -> bytes:
+    """
+    Full free intervals of a day, sent once right after subscribing.
+    """
+    if view is None:
+        data = DayAvailabilitySchema(date=day_date, free=[]).model_dump_json()
+        return _event("state", data.encode())
+    message = view.responses.get("sse_state")
+    if message is None:
+        data = DayAvailabilitySchema(date=day_date, free=view.free).model_dump_json()
+        message = view.responses["sse_state"] = _event("state", data.encode())
+    return message
+
+
+def delta_event(
+    day_date: date, old: DayView | None, new: DayView | None
+) -> bytes | None:
+    """
+    Free intervals that appeared and disappeared between two views of a day.
+    """
+    old_free, new_free = _free(old), _free(new)
+    old_keys = {(i.start, i.end) for i in old_free}
+    new_keys = {(i.start, i.end) for i in new_free}
+    if old_keys == new_keys:
+        return None
+    delta = AvailabilityDeltaSchema(
+        date=day_date,
+        added=[i for i in new_free if (i.start, i.end) not in old_keys],
+        removed=[i for i in old_free if (i.start, i.end) not in new_keys],
+    )
+    return _event("delta", delta.model_dump_json().encode())
+
+
+class Subscriber:
+    """
+    One SSE connection. ``None`` in the queue ends the stream.
+    """
+
+    __slots__ = ("dates", "queue")
+
+    def __init__(self, dates: set[date], queue_size: int) -> None:
+        self.dates = dates
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue(queue_size + 1)
+
+    def send(self, message: bytes) -> bool:
+        if self.queue.qsize() >= self.queue.maxsize - 1:
+            return False
+        self.queue.put_nowait(message)
+        return True
+
+    def close(self) -> None:
+        # The spare slot keeps room for the end marker even when lagging
+        self.queue.put_nowait(None)
+
+
+class SubscriptionHub:
+    """
+    Tracks subscribed dates of this worker and pushes changes of their free
+    intervals.
+
+    While anybody is subscribed, the schedule is refreshed every
+    ``poll_interval`` seconds. Day views are built once per schedule version,
+    so unchanged days are skipped by identity and each delta is serialized
+    once and shared by all subscribers of the day. Subscribers that fall
+    behind by ``queue_size`` events are disconnected and resync on reconnect.
+
+    Pending bookings of this worker are shown as taken, as in ``/is_free``;
+    a booking reaches subscribers with the next refresh.
+    """
+
+    def __init__(self, poll_interval: float = 5, queue_size: int = 64) -> None:
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._subscribers: dict[date, set[Subscriber]] = {}
+        self._views: dict[date, DayView | None] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len({sub for subs in self._subscribers.values() for sub in subs})
+
+    async def subscribe(
+        self, storage: ScheduleStorage, dates: set[date]
+    ) -> tuple[Subscriber, list[bytes]]:
+        """
+        Registers a subscriber and returns the current state of its dates,
+        consistent with the deltas it will receive.
+        """
+        subscriber = Subscriber(dates, self.queue_size)
+        async with self._lock:
+            # Registered only once every day is loaded, a failed load leaves
+            # nothing behind
+            views = {}
+            for day_date in sorted(dates):
+                views[day_date] = self._views.get(day_date)
+                if day_date not in self._views:
+                    views[day_date] = await self._day(storage, day_date, False)
+            for day_date, view in views.items():
+                self._views.setdefault(day_date, view)
+                self._subscribers.setdefault(day_date, set()).add(subscriber)
+            states = [state_event(d, self._views[d]) for d in sorted(dates)]
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll(storage))
+        return subscriber, states
+
+    @staticmethod
+    async def _day(
+        storage: ScheduleStorage, day_date: date, refresh: bool
+    ) -> DayView | None:
+        view = await storage.day(day_date, refresh=refresh)
+        return None if view is None else bookings.overlay(view)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        for day_date in subscriber.dates:
+            subscribers = self._subscribers.get(day_date)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[day_date]
+                self._views.pop(day_date, None)
+
+    async def refresh(self, storage: ScheduleStorage) -> None:
+        """
+        Reloads the subscribed days and fans out deltas of the changed ones.
+        """
+        async with self._lock:
+            refresh = True
+            for day_date in list(self._subscribers):
+                if day_date not in self._subscribers:
+                    continue  # its last subscriber was dropped in this round
+                # One upstream fetch per round, the other days reuse it
+                view = await self._day(storage, day_date, refresh)
+                refresh = False
+                old = self._views.get(day_date)
+                if view is old:
+                    continue
+                self._views[day_date] = view
+                message = delta_event(day_date, old, view)
+                if message is None:
+                    continue
+                for subscriber in list(self._subscribers.get(day_date, ())):
+                    if not subscriber.send(message):
+                        self.unsubscribe(subscriber)
+                        subscriber.close()
+
+    async def _poll(self, storage: ScheduleStorage) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh(storage)
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Subscribers keep the last state until the upstream recovers
+                logger.exception("Subscription refresh failed")
+
+    async def close(self) -> None:
+        subscribers = {sub for subs in self._subscribers.values() for sub in subs}
+        self._subscribers.clear()
+        self._views.clear()
+        for subscriber in subscribers:
+            subscriber.close()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -1,32 +1,94 @@
-from schemas import DaySchema, TimeSlotSchema, IntervalSchema
+from datetime import date, tzinfo
+
+from schemas import DaySchema, TimeSlotSchema, IntervalSchema, validate_overnight
 from schemas.interval import IsFreeIntervalSchema
+from utils.minutes import (
+    MINUTES_PER_DAY,
+    Span,
+    day_span,
+    free_spans,
+    localize,
+    merge_spans,
+    overlaps,
+    span_in_day,
+    to_time,
+)
+
+# Frame of intervals checked without a day: a day starting at midnight
+_MIDNIGHT: Span = (0, MINUTES_PER_DAY)
+
+
+def slot_spans(day_bounds: Span, slots: list) -> list[Span]:
+    return [span_in_day(day_bounds, slot.start, slot.end) for slot in slots]
+
+
+def to_intervals(spans: list[Span]) -> list[IntervalSchema]:
+    return [
+        validate_overnight(IntervalSchema, start=to_time(low), end=to_time(high))
+        for low, high in spans
+    ]
+
+
+def localize_interval(
+    interval: IntervalSchema, day_date: date, zone: tzinfo
+) -> IntervalSchema:
+    """
+    Converts zone-aware bounds of a requested interval to the schedule's wall
+    clock on that date, naive bounds are returned as they are.
+    """
+    if interval.start.tzinfo is None and interval.end.tzinfo is None:
+        return interval
+    return interval.model_copy(
+        update={
+            "start": localize(interval.start, day_date, zone),
+            "end": localize(interval.end, day_date, zone),
+        }
+    )
+
+
+def merge_busy_intervals(
+    day: DaySchema, day_slots: list[TimeSlotSchema]
+) -> list[IntervalSchema]:
+    """
+    Sorts slots, merges overlapping or touching ones and clips them to the day bounds.
+    """
+    bounds = day_span(day)
+    return to_intervals(merge_spans(bounds, slot_spans(bounds, day_slots)))
+
+
+def free_intervals_from_busy(
+    day: DaySchema, busy: list[IntervalSchema]
+) -> list[IntervalSchema]:
+    """
+    Returns gaps between merged busy intervals, see ``merge_busy_intervals``.
+    """
+    bounds = day_span(day)
+    return to_intervals(free_spans(bounds, slot_spans(bounds, busy)))
 
 
 def find_free_intervals(
     day: DaySchema, day_slots: list[TimeSlotSchema]
 ) -> list[IntervalSchema]:
-    free_intervals = []
-    if day_slots:
-        day_slots.sort(key=lambda x: x.start)
-        start_time = day.start
-        end_time = day.end
-        for slot in day_slots:
-            if slot.start > start_time:
-                free_intervals.append(IntervalSchema(start=start_time, end=slot.start))
-            start_time = slot.end
-        if start_time < end_time:
-            free_intervals.append(IntervalSchema(start=start_time, end=end_time))
-    else:
-        free_intervals.append(IntervalSchema(start=day.start, end=day.end))
-    return free_intervals
+    bounds = day_span(day)
+    busy = merge_spans(bounds, slot_spans(bounds, day_slots))
+    return to_intervals(free_spans(bounds, busy))
 
 
 def interval_has_intersections(
-    target: IntervalSchema, day_slots: list[TimeSlotSchema]
+    target: IntervalSchema,
+    day_slots: list[TimeSlotSchema],
+    day: DaySchema | None = None,
 ) -> IsFreeIntervalSchema:
-    overlaps = [
+    """
+    Lists slots overlapping the target. Times are placed on the day when it is
+    given, which matters for overnight days, and on a midnight-to-midnight day
+    otherwise.
+    """
+    bounds = _MIDNIGHT if day is None else day_span(day)
+    target_span = span_in_day(bounds, target.start, target.end)
+    overlapping = [
         slot
         for slot in day_slots
-        if target.overlaps(IntervalSchema(start=slot.start, end=slot.end))
+        if overlaps(target_span, span_in_day(bounds, slot.start, slot.end))
     ]
-    return IsFreeIntervalSchema(is_free=not bool(overlaps), overlaps=overlaps)
+    return IsFreeIntervalSchema(is_free=not bool(overlapping), overlaps=overlapping)
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, tzinfo
+from time import perf_counter
+from typing import Hashable
+
+from schemas import IntervalSchema, TimeSlotSchema
+from utils.compression import available_encodings, cached_body
+from utils.snapshot import DayView
+from utils.storage import ScheduleStorage
+from utils.wire import JSON
+
+logger = logging.getLogger(__name__)
+
+
+class FrequencySketch:
+    """
+    Approximate request counts of keys in fixed memory.
+
+    A count-min sketch estimates counts and a small candidate table keeps the
+    ``top`` keys seen so far. Counts are halved every ``decay_every`` additions,
+    so the popularity follows recent traffic.
+    """
+
+    def __init__(
+        self,
+        top: int = 32,
+        width: int = 1024,
+        depth: int = 4,
+        decay_every: int = 10_000,
+    ) -> None:
+        self.top = top
+        self.width = width
+        self.decay_every = decay_every
+        self._rows = [[0] * width for _ in range(depth)]
+        self._candidates: dict[Hashable, int] = {}
+        self._added = 0
+
+    def _cells(self, key: Hashable):
+        for seed, row in enumerate(self._rows):
+            yield row, hash((seed, key)) % self.width
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[cell] for row, cell in self._cells(key))
+
+    def add(self, key: Hashable) -> None:
+        for row, cell in self._cells(key):
+            row[cell] += 1
+        count = self.estimate(key)
+        candidates = self._candidates
+        if key in candidates or len(candidates) < self.top:
+            candidates[key] = count
+        else:
+            coldest = min(candidates, key=candidates.__getitem__)
+            if candidates[coldest] < count:
+                del candidates[coldest]
+                candidates[key] = count
+        self._added += 1
+        if self._added >= self.decay_every:
+            self._decay()
+
+    def _decay(self) -> None:
+        self._added = 0
+        for row in self._rows:
+            row[:] = [value // 2 for value in row]
+        self._candidates = {
+            key: count // 2 for key, count in self._candidates.items() if count > 1
+        }
+
+    def most_common(self, limit: int | None = None) -> list[Hashable]:
+        ranked = sorted(self._candidates, key=self._candidates.__getitem__)
+        ranked.reverse()
+        return ranked[:limit]
+
+
+def warm_day(
+    view: DayView, encodings: tuple[str, ...] = (), level: int = 6, min_size: int = 0
+) -> None:
+    """
+    Builds what the per-date endpoints read from a view: free intervals and
+    their gap index, the bitmap for overlap checks and the JSON bodies with
+    their compressed forms.
+    """
+    _ = view.gap_index, view.bitmap
+    for key, payload, item_type in (
+        ("taken_slots", view.slots, TimeSlotSchema),
+        ("free_intervals", view.free, IntervalSchema),
+    ):
+        cached = cached_body(view.responses, key, payload, JSON, item_type)
+        if len(cached.body) >= min_size:
+            for encoding in encodings:
+                cached.compressed(encoding, level)
+
+
+class CacheWarmer:
+    """
+    Prepares popular dates of a new schedule version before they are requested.
+
+    After every swap of the storage, the next ``days`` dates from today and the
+    ``top`` most requested dates are warmed with ``warm_day`` in the
+    background. Warming sleeps between days so that it takes at most
+    ``cpu_share`` of the event loop, and a newer swap restarts it.
+    """
+
+    def __init__(
+        self,
+        storage: ScheduleStorage,
+        zone: tzinfo,
+        days: int = 15,
+        top: int = 32,
+        cpu_share: float = 0.25,
+        encodings: tuple[str, ...] = (),
+        level: int = 6,
+        min_size: int = 0,
+    ) -> None:
+        self.storage = storage
+        self.zone = zone
+        self.days = days
+        self.cpu_share = cpu_share
+        self.encodings = encodings
+        self.level = level
+        self.min_size = min_size
+        self.sketch = FrequencySketch(top)
+        self.warmed = 0
+        self._generation = 0
+        self._task: asyncio.Task | None = None
+
+    def record(self, day_date: date) -> None:
+        self.sketch.add(day_date)
+
+    def targets(self) -> list[date]:
+        today = datetime.now(self.zone).date()
+        window = [today + timedelta(days=offset) for offset in range(self.days)]
+        popular = [d for d in self.sketch.most_common() if d not in window]
+        return window + popular  # type: ignore
+
+    def schedule(self) -> None:
+        self._generation += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            generation = self._generation
+            await self._warm(generation)
+            if generation == self._generation:
+                return
+
+    async def _warm(self, generation: int) -> None:
+        for day_date in self.targets():
+            if generation != self._generation:
+                return
+            started = perf_counter()
+            try:
+                view = await self.storage.day(day_date, refresh=False)
+                if view is not None:
+                    warm_day(view, self.encodings, self.level, self.min_size)
+                    self.warmed += 1
+            except Exception:  # pylint: disable=broad-exception-caught
+                # A date that fails here is built by its first request instead
+                logger.exception("Warming %s failed", day_date)
+            spent = perf_counter() - started
+            await asyncio.sleep(spent * (1 - self.cpu_share) / self.cpu_share)
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await self.wait()
+            self._task = None
+
+
+def create_warmer(storage: ScheduleStorage, settings) -> CacheWarmer:
+    encodings = available_encodings() if settings.COMPRESSION_ENABLED else ()
+    return CacheWarmer(
+        storage,
+        settings.zone,
+        days=settings.WARMUP_DAYS,
+        top=settings.WARMUP_TOP_DATES,
+        cpu_share=settings.WARMUP_CPU_SHARE,
+        encodings=encodings,
+        level=settings.COMPRESSION_LEVEL,
+        min_size=settings.COMPRESSION_MIN_SIZE,
+    )
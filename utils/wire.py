@@ -0,0 +1,258 @@
+import struct
+import sys
+from array import array
+from datetime import date, time
+from functools import cache
+from typing import Any, Iterable
+
+from pydantic import BaseModel, TypeAdapter
+
+from schemas import (
+    IntervalSchema,
+    IsFreeIntervalSchema,
+    ScheduleSchema,
+    TimeSlotSchema,
+)
+from utils.minutes import to_minutes
+from utils.imports import lazy_import
+
+try:
+    msgpack = lazy_import("msgpack")
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+COLUMNAR = "application/vnd.timetable.columnar"
+
+MAGIC = b"TTC1"
+KINDS = ("busy", "working_hours")
+FREQS = ("daily", "weekly")
+
+Column = tuple[str, str, Iterable[int]]
+Tables = dict[str, list[Column]]
+
+
+def available_formats() -> tuple[str, ...]:
+    return (JSON, COLUMNAR, MSGPACK) if msgpack is not None else (JSON, COLUMNAR)
+
+
+def negotiate(accept: str | None) -> str:
+    """
+    Picks the response media type from the Accept header.
+
+    JSON is returned unless the client prefers one of the binary formats.
+    """
+    if not accept:
+        return JSON
+    formats = available_formats()
+    best, best_quality = JSON, 0.0
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        # Earlier entries win ties, as clients list them by preference
+        quality -= position * 1e-6
+        if media_type.lower() in formats and quality > best_quality:
+            best, best_quality = media_type.lower(), quality
+    return best
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, time):
+        return to_minutes(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(_plain(key)): _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def encode_msgpack(
+    payload: BaseModel | list[BaseModel], include: dict | None = None
+) -> bytes:
+    """
+    MessagePack with the JSON structure, times as minutes since midnight.
+    """
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    if isinstance(payload, list):
+        data = [item.model_dump() for item in payload]
+    else:
+        data = payload.model_dump(include=include)
+    return msgpack.packb(_plain(data))
+
+
+def _slot_columns(slots: list[TimeSlotSchema]) -> list[Column]:
+    return [
+        ("id", "i", (slot.id for slot in slots)),
+        ("day_id", "i", (slot.day_id for slot in slots)),
+        ("start", "H", (to_minutes(slot.start) for slot in slots)),
+        ("end", "H", (to_minutes(slot.end) for slot in slots)),
+    ]
+
+
+def _interval_columns(intervals: list[IntervalSchema]) -> list[Column]:
+    return [
+        ("start", "H", (to_minutes(interval.start) for interval in intervals)),
+        ("end", "H", (to_minutes(interval.end) for interval in intervals)),
+    ]
+
+
+def to_tables(payload: Any, item_type: type | None = None) -> Tables:
+    """
+    Splits a response payload into named tables of integer columns.
+
+    ``item_type`` names the element schema of list payloads, which can not
+    be told from an empty list.
+    """
+    if isinstance(payload, ScheduleSchema):
+        days = list(payload.days.values())
+        rules = payload.recurrences
+        return {
+            "days": [
+                ("id", "i", (day.id for day in days)),
+                ("date", "i", (day.date.toordinal() for day in days)),
+                ("start", "H", (to_minutes(day.start) for day in days)),
+                ("end", "H", (to_minutes(day.end) for day in days)),
+            ],
+            "timeslots": _slot_columns(payload.timeslots),
+            "recurrences": [
+                ("id", "i", (rule.id for rule in rules)),
+                ("kind", "B", (KINDS.index(rule.kind) for rule in rules)),
+                ("freq", "B", (FREQS.index(rule.freq) for rule in rules)),
+                ("interval", "H", (rule.interval for rule in rules)),
+                (
+                    "weekdays",
+                    "B",
+                    (sum(1 << weekday for weekday in rule.weekdays) for rule in rules),
+                ),
+                ("start", "H", (to_minutes(rule.start) for rule in rules)),
+                ("end", "H", (to_minutes(rule.end) for rule in rules)),
+                ("starts_on", "i", (rule.starts_on.toordinal() for rule in rules)),
+                (
+                    "until",
+                    "i",
+                    (rule.until.toordinal() if rule.until else 0 for rule in rules),
+                ),
+            ],
+        }
+    if isinstance(payload, IsFreeIntervalSchema):
+        return {
+            "result": [("is_free", "B", (int(payload.is_free),))],
+            "overlaps": _slot_columns(payload.overlaps),
+        }
+    if item_type is None and payload:
+        item_type = type(payload[0])
+    if item_type is not None and issubclass(item_type, TimeSlotSchema):
+        return {"timeslots": _slot_columns(payload)}
+    return {"intervals": _interval_columns(payload)}
+
+
+def project(tables: Tables, include: dict) -> Tables:
+    """
+    Keeps the tables and columns named by a pydantic ``include`` spec.
+    """
+    projected = {}
+    for name, columns in tables.items():
+        spec = include.get(name)
+        if spec is True:
+            projected[name] = columns
+        elif spec:
+            fields = spec["__all__"]
+            projected[name] = [column for column in columns if column[0] in fields]
+    return projected
+
+
+def _pack_name(name: str) -> bytes:
+    encoded = name.encode()
+    return struct.pack("<B", len(encoded)) + encoded
+
+
+def encode_columnar(tables: Tables) -> bytes:
+    """
+    Layout: magic, table count, then per table its name, row count, column
+    count and per column its name, array typecode and little-endian values.
+    """
+    chunks = [MAGIC, struct.pack("<B", len(tables))]
+    for table_name, columns in tables.items():
+        packed = []
+        for name, typecode, values in columns:
+            column = array(typecode, values)
+            if sys.byteorder == "big":  # pragma: no cover
+                column.byteswap()
+            packed.append((name, typecode, column))
+        rows = len(packed[0][2]) if packed else 0
+        chunks += [_pack_name(table_name), struct.pack("<IB", rows, len(packed))]
+        for name, typecode, column in packed:
+            chunks += [_pack_name(name), typecode.encode(), column.tobytes()]
+    return b"".join(chunks)
+
+
+def decode_columnar(data: bytes) -> dict[str, dict[str, array]]:
+    """
+    Reads the output of ``encode_columnar`` back into arrays.
+    """
+    if data[:4] != MAGIC:
+        raise ValueError("Not a columnar schedule payload")
+    view = memoryview(data)
+    offset = 5
+    tables: dict[str, dict[str, array]] = {}
+
+    def read_name() -> str:
+        nonlocal offset
+        size = view[offset]
+        name = bytes(view[offset + 1 : offset + 1 + size]).decode()
+        offset += 1 + size
+        return name
+
+    for _ in range(view[4]):
+        table_name = read_name()
+        rows, count = struct.unpack_from("<IB", view, offset)
+        offset += 5
+        columns = tables[table_name] = {}
+        for _ in range(count):
+            name = read_name()
+            column = array(chr(view[offset]))
+            offset += 1
+            size = rows * column.itemsize
+            column.frombytes(view[offset : offset + size])
+            if sys.byteorder == "big":  # pragma: no cover
+                column.byteswap()
+            offset += size
+            columns[name] = column
+    return tables
+
+
+@cache
+def _list_adapter(item_type: type) -> TypeAdapter:
+    return TypeAdapter(list[item_type])  # type: ignore
+
+
+def encode(
+    payload: Any,
+    media_type: str,
+    item_type: type | None = None,
+    include: dict | None = None,
+) -> bytes:
+    """
+    ``include`` is a pydantic include spec applied to model payloads.
+    """
+    if media_type == JSON:
+        if isinstance(payload, BaseModel):
+            return payload.__pydantic_serializer__.to_json(payload, include=include)
+        return _list_adapter(item_type or type(payload[0])).dump_json(payload)
+    if media_type == MSGPACK:
+        return encode_msgpack(payload, include)
+    if media_type == COLUMNAR:
+        tables = to_tables(payload, item_type)
+        return encode_columnar(project(tables, include) if include else tables)
+    raise ValueError(f"Unsupported media type {media_type!r}")